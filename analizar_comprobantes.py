@@ -1,38 +1,59 @@
-import csv
+import os
+import sys
+import glob
+import argparse
+from caja_aggregate import aggregate_files
+from money import pesos
+from pipeline_stats import PipelineStats, NO_STATS, profiled
 
-total_chacras = 0
-total_paseo = 0
-count_chacras = 0
-count_paseo = 0
+# Totales de comprobantes de caja agrupados por cualquier combinación de
+# columnas (Nodo, Vendedor, Tipo Cmp., Tarjeta, Obra Social, ...) y/o
+# dia / hora / dia_semana / mes, sobre uno o varios exports.
+#   python analizar_comprobantes.py "ARCHIVOS/diferencias/*.CSV" --by Nodo Vendedor
 
-with open('ARCHIVOS/diferencias/comprobantes de caja enero 26.CSV', 'r', encoding='latin1') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        try:
-            # Convertir el valor de "Imp. Neto" de formato argentino a float
-            imp_neto_str = row['Imp. Neto'].replace('.', '').replace(',', '.')
-            imp_neto = float(imp_neto_str)
-            
-            # Clasificar por nodo
-            if 'CHACRAS' in row['Nodo'].upper():
-                total_chacras += imp_neto
-                count_chacras += 1
-            else:
-                total_paseo += imp_neto
-                count_paseo += 1
-        except Exception as e:
-            print(f"Error procesando fila: {e}")
-            continue
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ARCHIVOS", "diferencias", "comprobantes de caja enero 26.CSV")
 
-print(f"\n=== ANÁLISIS DE COMPROBANTES ENERO 26 ===")
-print(f"\nBIOSALUD CHACRAS:")
-print(f"  Registros: {count_chacras:,}")
-print(f"  Total: ${total_chacras:,.2f}")
-print(f"\nFCIA BIOSALUD (Paseo):")
-print(f"  Registros: {count_paseo:,}")
-print(f"  Total: ${total_paseo:,.2f}")
-print(f"\nTOTAL GENERAL:")
-print(f"  Registros: {count_chacras + count_paseo:,}")
-print(f"  Total: ${total_chacras + total_paseo:,.2f}")
-print(f"\nDIFERENCIA:")
-print(f"  ${abs(total_chacras - total_paseo):,.2f}")
+def main(argv):
+    parser = argparse.ArgumentParser(description="Análisis de comprobantes de caja")
+    parser.add_argument("files", nargs="*", default=[DEFAULT_FILE])
+    parser.add_argument("--by", nargs="+", default=["Nodo"], help="columnas para agrupar")
+    parser.add_argument("--value", default="Imp. Neto", help="columna de importe a sumar")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--stats", metavar="REPORTE.json", help="tiempos por etapa y contadores en JSON")
+    parser.add_argument("--profile", choices=["cpu", "mem"], help="cProfile / tracemalloc de esta corrida")
+    args = parser.parse_args(argv)
+
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in args.files:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+
+    pipeline = PipelineStats("caja") if args.stats else NO_STATS
+    with profiled(args.profile, "analizar_comprobantes"):
+        totals, stats = aggregate_files(files, args.by, args.value, args.workers, pipeline)
+
+    print(f"\n=== ANÁLISIS DE COMPROBANTES ({stats['files']} archivo/s) ===")
+    grand_total = 0
+    grand_count = 0
+    for key in sorted(totals, key=lambda k: [str(x) for x in k]):
+        total, count = totals[key]
+        grand_total += total
+        grand_count += count
+        print(f"\n{' | '.join(str(k) for k in key)}:")
+        print(f"  Registros: {count:,}")
+        print(f"  Total: ${pesos(total):,.2f}")
+    print(f"\nTOTAL GENERAL:")
+    print(f"  Registros: {grand_count:,}")
+    print(f"  Total: ${pesos(grand_total):,.2f}")
+    if len(totals) == 2:
+        (a_total, _), (b_total, _) = totals.values()
+        print(f"\nDIFERENCIA:")
+        print(f"  ${pesos(abs(a_total - b_total)):,.2f}")
+    if stats["skipped"]:
+        print(f"\nFilas sin {args.value} (o sin fecha) omitidas: {stats['skipped']:,}")
+    if args.stats:
+        pipeline.write(args.stats)
+        pipeline.print_summary()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,19 +1,21 @@
 import pdfplumber
 import os
+from pdf_cache import PdfCache
 
-def extract_pdf_sample(file_path):
+def extract_pdf_sample(file_path, cache=None):
     print(f"--- ANALYZING: {os.path.basename(file_path)} ---")
     try:
         with pdfplumber.open(file_path) as pdf:
             # Extract first 2 pages to understand structure
             for i in range(min(2, len(pdf.pages))):
                 print(f"--- PAGE {i+1} ---")
-                text = pdf.pages[i].extract_text()
+                page = pdf.pages[i]
+                text = cache.page(page, "text:plumber", lambda p: p.extract_text()) if cache else page.extract_text()
                 print(text)
                 print("\n")
                 
                 # Also try to extract tables if any
-                tables = pdf.pages[i].extract_tables()
+                tables = cache.page(page, "tables:plumber", lambda p: p.extract_tables()) if cache else page.extract_tables()
                 if tables:
                     print(f"Found {len(tables)} tables on page {i+1}")
                     for tidx, table in enumerate(tables):
@@ -30,6 +32,7 @@ if __name__ == "__main__":
         "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf"
     ]
     
+    cache = PdfCache()
     for f in files:
-        extract_pdf_sample(os.path.join(base_path, f))
+        extract_pdf_sample(os.path.join(base_path, f), cache)
         print("="*60 + "\n")
@@ -1,13 +1,14 @@
 import pdfplumber
 import os
 import json
+from pdf_cache import PdfCache
 
-def analyze_pdf(file_path):
+def analyze_pdf(file_path, cache=None):
     results = []
     print(f"Opening {file_path}")
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
-            table = page.extract_table()
+            table = cache.page(page, "table:plumber", lambda p: p.extract_table() or []) if cache else page.extract_table()
             if table:
                 for row in table:
                     # Clean row from None and newlines
@@ -22,6 +23,7 @@ def analyze_pdf(file_path):
 
 if __name__ == "__main__":
     base_path = r"c:\programacion\informes\ARCHIVOS\CUENTAS CORRIENTES"
-    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf"))
+    cache = PdfCache()
+    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf"), cache)
     print("\n" + "-"*50 + "\n")
-    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf"))
+    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf"), cache)
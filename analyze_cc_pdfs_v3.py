@@ -1,12 +1,13 @@
 import pdfplumber
 import os
 import json
+from pdf_cache import PdfCache
 
-def analyze_pdf(file_path, output_name):
+def analyze_pdf(file_path, output_name, cache=None):
     all_data = []
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
-            table = page.extract_table()
+            table = cache.page(page, "table:plumber", lambda p: p.extract_table() or []) if cache else page.extract_table()
             if table:
                 for row in table:
                     clean_row = [str(cell).replace('\n', ' ').strip() if cell else "" for cell in row]
@@ -18,6 +19,7 @@ def analyze_pdf(file_path, output_name):
 
 if __name__ == "__main__":
     base_path = r"c:\programacion\informes\ARCHIVOS\CUENTAS CORRIENTES"
-    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf"), "cc_paseo_sample.json")
-    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf"), "cc_chacras_sample.json")
+    cache = PdfCache()
+    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf"), "cc_paseo_sample.json", cache)
+    analyze_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf"), "cc_chacras_sample.json", cache)
     print("Done. Files cc_paseo_sample.json and cc_chacras_sample.json created.")
@@ -0,0 +1,285 @@
+import os
+import re
+import sys
+import csv
+import glob
+import argparse
+import numpy as np
+from money import MISSING, pesos
+
+# Worked time from the reloj (HORARIO ... DELIMITADO.csv) against the caja tickets.
+# Each reloj row "Nombre;Fecha;Entrada 1;Salida 1;...;Entrada 5;Salida 5;Tiem.Total"
+# becomes up to five shifts [entrada, salida) in minutes since 1970:
+#   entrada without salida (or the other way round) -> open punch, no shift
+#   salida before entrada                           -> shift past midnight (FLAG_OVERNIGHT)
+#   shift starting before an earlier one ended      -> FLAG_OVERLAP
+# Shifts are sorted by (node, person, start) into one int64 key array; a
+# ticket is looked up with searchsorted on (Nodo, seller, "Fecha y Hora") and
+# belongs to the last shift that started at or before it at that node, if
+# that shift is still open (a sale at one node never counts as inside a shift
+# the same person worked at the other).
+# Reloj names ("CORIA, BETIANA", "ENRIQUE FERRER") and caja sellers
+# ("BETIANA CORIA", "FERRER") are joined through seller_identity.
+# Void tickets (Anulado = "Si") are left out; sales are "Imp. Neto".
+#   python attendance_sales.py "ARCHIVOS/horarios/*DELIMITADO.csv" --caja "ARCHIVOS/diferencias/*.CSV" --mes 2026-01
+
+PAIRS = 5
+FLAG_OVERNIGHT = 1
+FLAG_OVERLAP = 2
+PERSON_SHIFT = 32      # key = person << 32 | minute; minutes since 1970 fit in 31 bits
+VOID_VALUE = "Si"
+VALUE_COLUMN = "Imp. Neto"
+
+# Reloj file branch -> caja "Nodo", so hours and tickets land on the same node
+HORARIO_NODES = {
+    "FCIA BIOSALUD": "FCIA BIOSALUD",
+    "CHACRAS PARK": "BIOSALUD CHACRAS",
+}
+
+def horario_node(path):
+    # "HORARIO CHACRAS PARK DELIMITADO.csv" -> "BIOSALUD CHACRAS"
+    name = os.path.splitext(os.path.basename(path))[0].upper()
+    branch = re.sub(r'^HORARIO\s+|\s+DELIMITADO$', '', name).strip()
+    return HORARIO_NODES.get(branch, branch)
+
+def parse_punch_days(values):
+    # "2/1/2026" / "15/01/2026" -> datetime64[D], NaT when the cell is not a date
+    s = np.strings.strip(np.asarray(values, dtype=str))
+    day, _, rest = np.strings.partition(s, "/")
+    month, _, year = np.strings.partition(rest, "/")
+    ok = np.strings.isdigit(day) & np.strings.isdigit(month) & np.strings.isdigit(year) & (np.strings.str_len(year) == 4)
+    iso = np.strings.add(np.strings.add(np.strings.add(np.strings.add(year, "-"), np.strings.zfill(month, 2)), "-"), np.strings.zfill(day, 2))
+    return np.where(ok, iso, "NaT").astype("datetime64[D]")
+
+def parse_clock(values):
+    # "08:35:00" / "8:35" -> minutes after midnight, -1 for an empty cell
+    s = np.strings.strip(np.asarray(values, dtype=str))
+    hours, _, rest = np.strings.partition(s, ":")
+    minutes = np.strings.slice(rest, 0, 2)
+    ok = np.strings.isdigit(hours) & np.strings.isdigit(minutes) & (np.strings.str_len(minutes) == 2)
+    total = np.where(ok, hours, "0").astype(np.int64) * 60 + np.where(ok, minutes, "0").astype(np.int64)
+    return np.where(ok, total, -1)
+
+def load_punches(paths, encoding='latin1'):
+    # -> {"name": str array, "node": str array, "day": datetime64[D],
+    #     "clock": int64 (rows, 10) Entrada 1, Salida 1, ... in minutes, -1 empty}
+    names, nodes, days, cells = [], [], [], []
+    for path in paths:
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            reader = csv.reader(f, delimiter=';')
+            header = [h.strip() for h in next(reader)]
+            columns = [header.index(f"{kind} {k}") if f"{kind} {k}" in header else None
+                       for k in range(1, PAIRS + 1) for kind in ("Entrada", "Salida")]
+            for row in reader:
+                if not row or not row[0].strip() or row[0].strip() == header[0]:
+                    continue
+                names.append(row[0].strip())
+                nodes.append(horario_node(path))
+                days.append(row[1] if len(row) > 1 else "")
+                cells.append([row[c] if c is not None and c < len(row) else "" for c in columns])
+    clock = parse_clock(np.asarray(cells, dtype=str).reshape(-1)).reshape(-1, 2 * PAIRS) if cells else np.zeros((0, 2 * PAIRS), dtype=np.int64)
+    return {"name": np.asarray(names, dtype=str), "node": np.asarray(nodes, dtype=str),
+            "day": parse_punch_days(days), "clock": clock}
+
+def build_shifts(punches, person):
+    # person: int64 code per reloj row -> (shifts sorted by person/start, open punches).
+    #   Shifts are matched and checked for overlaps per code; attendance_report
+    #   passes one code per (node, person)
+    #   shifts: {"person", "node", "start", "end", "flags", "cover"}; cover is the
+    #   latest end so far of the same person (a ticket inside an overlapped
+    #   shift still counts as worked time)
+    #   open:   {"person", "node", "at"} one entry per lone entrada / salida
+    day_start = punches["day"].astype("datetime64[m]").astype(np.int64)
+    valid_day = ~np.isnat(punches["day"])
+    entrada = punches["clock"][:, 0::2]
+    salida = punches["clock"][:, 1::2]
+    has_in = (entrada >= 0) & valid_day[:, None]
+    has_out = (salida >= 0) & valid_day[:, None]
+
+    rows, pairs = np.nonzero(has_in & has_out)
+    start = day_start[rows] + entrada[rows, pairs]
+    end = day_start[rows] + salida[rows, pairs]
+    overnight = end <= start
+    end = np.where(overnight, end + 24 * 60, end)
+    flags = np.where(overnight, FLAG_OVERNIGHT, 0).astype(np.int8)
+
+    key = (person[rows] << PERSON_SHIFT) | start
+    order = np.argsort(key, kind="stable")
+    rows, start, end, flags, key = rows[order], start[order], end[order], flags[order], key[order]
+    shift_person = person[rows]
+    # Running max of end per person: the person bits keep each group above the previous ones
+    cover = np.maximum.accumulate((shift_person << PERSON_SHIFT) | end) & ((1 << PERSON_SHIFT) - 1)
+    if len(start) > 1:
+        same = shift_person[1:] == shift_person[:-1]
+        flags[1:] |= np.where(same & (start[1:] < cover[:-1]), FLAG_OVERLAP, 0).astype(np.int8)
+
+    lone_rows, lone_pairs = np.nonzero(has_in ^ has_out)
+    lone_at = np.where(has_in[lone_rows, lone_pairs], entrada[lone_rows, lone_pairs], salida[lone_rows, lone_pairs])
+    shifts = {"person": shift_person, "node": punches["node"][rows], "start": start, "end": end,
+              "flags": flags, "cover": cover, "key": key}
+    open_punches = {"person": person[lone_rows], "node": punches["node"][lone_rows],
+                    "at": day_start[lone_rows] + lone_at}
+    return shifts, open_punches
+
+def assign_tickets(shifts, person, minutes):
+    # -> shift index per ticket, -1 outside every shift (or unknown seller)
+    key = (person << PERSON_SHIFT) | minutes
+    idx = np.searchsorted(shifts["key"], key, side="right") - 1
+    safe = np.maximum(idx, 0)
+    inside = (idx >= 0) & (person >= 0)
+    if len(shifts["key"]):
+        inside &= (shifts["person"][safe] == person) & (minutes < shifts["cover"][safe])
+    else:
+        inside[:] = False
+    return np.where(inside, idx, -1)
+
+def load_tickets(paths, value=VALUE_COLUMN):
+    # -> {"seller", "node": str arrays, "minute": int64, "amount": int64 cents}, void tickets dropped
+    from caja_loader import load_caja
+    sellers, nodes, minutes, amounts = [], [], [], []
+    for path in paths:
+        table = load_caja(path)
+        stamps = np.asarray(table["Fecha y Hora"])
+        keep = ~np.isnat(stamps)
+        if "Anulado" in table.dictionaries:
+            keep &= np.asarray(table["Anulado"]) != table.code_of("Anulado", VOID_VALUE)
+        seller_labels = np.asarray(table.dictionaries["Vendedor"] + [""], dtype=str)
+        node_labels = np.asarray(table.dictionaries["Nodo"] + [""], dtype=str)
+        sellers.append(seller_labels[np.asarray(table["Vendedor"])[keep]])
+        nodes.append(node_labels[np.asarray(table["Nodo"])[keep]])
+        minutes.append(stamps[keep].astype("datetime64[m]").astype(np.int64))
+        cents = np.asarray(table[value], dtype=np.int64)[keep]
+        amounts.append(np.where(cents == MISSING, 0, cents))
+    if not paths:
+        return {"seller": np.zeros(0, dtype=str), "node": np.zeros(0, dtype=str),
+                "minute": np.zeros(0, dtype=np.int64), "amount": np.zeros(0, dtype=np.int64)}
+    return {"seller": np.concatenate(sellers), "node": np.concatenate(nodes),
+            "minute": np.concatenate(minutes), "amount": np.concatenate(amounts)}
+
+def person_codes(index, reloj_names, seller_names):
+    # Reloj names are the staff: each resolves to a person of the identity
+    # table or is added to it (in memory). Sellers are matched against that;
+    # one that matches nobody gets its own code with no shifts.
+    # -> (int64 codes for reloj_names, for seller_names, person labels)
+    from seller_identity import normalize_key
+    ids, labels = {}, []
+
+    def code(person_id, label):
+        if person_id not in ids:
+            ids[person_id] = len(labels)
+            labels.append(label)
+        return ids[person_id]
+
+    reloj = {}
+    for raw in np.unique(reloj_names).tolist():
+        person_id, _, _ = index.resolve(raw)
+        if person_id is None:
+            person_id = index.add_person(raw)
+        reloj[raw] = code(person_id, index.person(person_id)["name"])
+    sellers = {}
+    for raw in np.unique(seller_names).tolist():
+        person_id, _, _ = index.resolve(raw)
+        if person_id is None and raw.strip():
+            person_id = f"SIN-RELOJ-{normalize_key(raw)}"
+        sellers[raw] = code(person_id, raw.strip()) if person_id else -1
+    lookup = lambda mapping, values: np.array([mapping[v] for v in values.tolist()], dtype=np.int64)
+    return lookup(reloj, reloj_names), lookup(sellers, seller_names), labels
+
+def month_filter(days_or_minutes, month, unit):
+    if not month:
+        return np.ones(len(days_or_minutes), dtype=bool)
+    return np.asarray(days_or_minutes).astype(unit).astype("datetime64[M]") == np.datetime64(month, "M")
+
+def attendance_report(horario_paths, caja_paths, month=None, index=None):
+    # -> list of rows per (node, person):
+    #    {"nodo", "persona", "minutos", "turnos", "tickets", "ventas",
+    #     "ventas_hora", "tickets_fuera", "ventas_fuera", "abiertas", "superpuestas"}
+    #    ventas / ventas_fuera in cents, ventas_hora in pesos per worked hour
+    if index is None:
+        from seller_identity import SellerIndex
+        index = SellerIndex()
+    punches = load_punches(horario_paths)
+    keep = month_filter(punches["day"], month, "datetime64[D]")
+    punches = {k: v[keep] for k, v in punches.items()}
+    tickets = load_tickets(caja_paths)
+    keep = month_filter(tickets["minute"].astype("datetime64[m]"), month, "datetime64[m]")
+    tickets = {k: v[keep] for k, v in tickets.items()}
+
+    reloj_person, seller_person, people = person_codes(index, punches["name"], tickets["seller"])
+
+    # One (node, person) code: tickets are matched to shifts on it and
+    # everything is summed on it with bincount
+    node_labels, node_codes = np.unique(np.concatenate([punches["node"], tickets["node"]]), return_inverse=True)
+    n_punch = len(punches["node"])
+    width = max(len(people), 1)
+    size = len(node_labels) * width
+    known = seller_person >= 0
+    reloj_slot = node_codes[:n_punch].astype(np.int64) * width + reloj_person
+    seller_slot = np.where(known, node_codes[n_punch:].astype(np.int64) * width + seller_person, -1)
+
+    shifts, open_punches = build_shifts(punches, reloj_slot)
+    shift = assign_tickets(shifts, seller_slot, tickets["minute"])
+    inside = shift >= 0
+    g_shift, g_open, g_ticket = shifts["person"], open_punches["person"], np.maximum(seller_slot, 0)
+    # Sales stay exact: float weights are whole cents far below 2**53
+    total = lambda g, w=None: np.rint(np.bincount(g, weights=w, minlength=size)).astype(np.int64)
+
+    minutes = total(g_shift, shifts["end"] - shifts["start"])
+    shift_count = total(g_shift)
+    overlaps = total(g_shift, (shifts["flags"] & FLAG_OVERLAP) > 0)
+    opened = total(g_open)
+    tickets_in = total(g_ticket[inside])
+    sales_in = total(g_ticket[inside], tickets["amount"][inside])
+    out = ~inside & known
+    tickets_out = total(g_ticket[out], None)
+    sales_out = total(g_ticket[out], tickets["amount"][out])
+
+    rows = []
+    for g in np.flatnonzero(shift_count + opened + tickets_in + tickets_out).tolist():
+        node, person = divmod(g, width)
+        hours = minutes[g] / 60
+        rows.append({
+            "nodo": str(node_labels[node]), "persona": people[person],
+            "minutos": int(minutes[g]), "turnos": int(shift_count[g]),
+            "tickets": int(tickets_in[g]), "ventas": int(sales_in[g]),
+            "ventas_hora": round(pesos(int(sales_in[g])) / hours, 2) if hours else None,
+            "tickets_fuera": int(tickets_out[g]), "ventas_fuera": int(sales_out[g]),
+            "abiertas": int(opened[g]), "superpuestas": int(overlaps[g]),
+        })
+    unknown = int((~known).sum())
+    return sorted(rows, key=lambda r: (r["nodo"], r["persona"])), unknown
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Horas trabajadas (reloj) contra ventas de caja")
+    parser.add_argument("horarios", nargs="+", help="HORARIO ... DELIMITADO.csv")
+    parser.add_argument("--caja", nargs="+", required=True, help="exports de comprobantes de caja")
+    parser.add_argument("--mes", help="YYYY-MM")
+    parser.add_argument("--table", help="tabla de identidades (seller_identity)")
+    args = parser.parse_args(argv)
+
+    from seller_identity import SellerIndex
+    index = SellerIndex(args.table) if args.table else SellerIndex()
+    rows, unknown = attendance_report(_expand(args.horarios), _expand(args.caja), args.mes, index)
+
+    node = None
+    for r in rows:
+        if r["nodo"] != node:
+            node = r["nodo"]
+            print(f"\n=== {node} ===")
+            print(f"{'Persona':<28} {'Horas':>7} {'Turnos':>6} {'Tickets':>7} {'Ventas':>15} {'$/hora':>11} {'Fuera':>6} {'Ventas fuera':>14} {'Abiertas':>8} {'Superp.':>7}")
+        per_hour = f"{r['ventas_hora']:,.2f}" if r["ventas_hora"] is not None else "-"
+        print(f"{r['persona'][:28]:<28} {r['minutos'] / 60:>7.1f} {r['turnos']:>6} {r['tickets']:>7} "
+              f"{pesos(r['ventas']):>15,.2f} {per_hour:>11} {r['tickets_fuera']:>6} {pesos(r['ventas_fuera']):>14,.2f} "
+              f"{r['abiertas']:>8} {r['superpuestas']:>7}")
+    if unknown:
+        print(f"\nTickets sin vendedor: {unknown:,}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,364 @@
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import subprocess
+import contextlib
+from datetime import datetime
+
+# Benchmarks for the Python parsers over the ARCHIVOS fixtures and scaled
+# copies of them (x10, x100 pages/rows, built once under .cache/bench).
+# Every case runs in its own process so import time and peak RSS are real;
+# results are appended to bench_history.json and compared to the last run.
+#   python bench_parsers.py                      -> every case at x1 and x10
+#   python bench_parsers.py --cases cc_full caja --scales 1 10 100
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVOS = os.path.join(BASE_DIR, "ARCHIVOS")
+BENCH_DIR = os.path.join(BASE_DIR, ".cache", "bench")
+DEFAULT_HISTORY = os.path.join(BASE_DIR, "bench_history.json")
+REGRESSION_THRESHOLD = 0.15  # throughput drop (or RSS growth) that gets flagged
+MIN_SECONDS = 0.05           # shorter runs are too noisy to compare
+
+CC_DIR = os.path.join(ARCHIVOS, "CUENTAS CORRIENTES")
+XLSX_BASE_ROWS = 2000
+
+# --- scaled fixtures ---
+
+def _scaled_path(case, scale, name):
+    out_dir = os.path.join(BENCH_DIR, f"{case}-x{scale}")
+    os.makedirs(out_dir, exist_ok=True)
+    return os.path.join(out_dir, name)
+
+def scale_pdf(src, scale, dst):
+    import fitz
+    out = fitz.open()
+    with fitz.open(src) as doc:
+        for _ in range(scale):
+            out.insert_pdf(doc)
+    out.save(dst)
+    out.close()
+
+def scale_csv(src, scale, dst):
+    # Header once, data lines repeated (bytes as-is, encoding untouched)
+    with open(src, 'rb') as f:
+        header = f.readline()
+        body = f.read()
+    if body and not body.endswith(b"\n"):
+        body += b"\r\n"
+    with open(dst, 'wb') as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+
+def scale_bytes(src, scale, dst):
+    # The clock .xls files are scanned as raw text, so concatenation is enough
+    with open(src, 'rb') as f:
+        data = f.read()
+    with open(dst, 'wb') as f:
+        for _ in range(scale):
+            f.write(data)
+
+def write_xlsx(dst, rows):
+    # Minimal workbook: one sheet, shared strings for the text columns
+    strings = ["CODIGO", "DESCRIPCION", "RUBRO", "CANTIDAD", "PRECIO"] + [f"PRODUCTO {i}" for i in range(200)] + [f"RUBRO {i}" for i in range(20)]
+    sheet = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+             '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>',
+             '<row r="1">' + "".join(f'<c r="{c}1" t="s"><v>{i}</v></c>' for i, c in enumerate("ABCDE")) + '</row>']
+    for r in range(2, rows + 2):
+        sheet.append(f'<row r="{r}"><c r="A{r}"><v>{7790000000000 + r}</v></c>'
+                     f'<c r="B{r}" t="s"><v>{5 + r % 200}</v></c><c r="C{r}" t="s"><v>{205 + r % 20}</v></c>'
+                     f'<c r="D{r}"><v>{r % 12}</v></c><c r="E{r}"><v>{r * 1.25}</v></c></row>')
+    sheet.append('</sheetData></worksheet>')
+    shared = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+              f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{len(strings)}" uniqueCount="{len(strings)}">']
+    shared += [f'<si><t>{s}</t></si>' for s in strings]
+    shared.append('</sst>')
+    with zipfile.ZipFile(dst, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml',
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                   '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                   '<Default Extension="xml" ContentType="application/xml"/>'
+                   '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                   '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                   '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+                   '</Types>')
+        z.writestr('_rels/.rels',
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+                   '</Relationships>')
+        z.writestr('xl/workbook.xml',
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                   'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                   '<sheets><sheet name="Hoja1" sheetId="1" r:id="rId1"/></sheets></workbook>')
+        z.writestr('xl/_rels/workbook.xml.rels',
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                   '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                   '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+                   '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+                   '</Relationships>')
+        z.writestr('xl/worksheets/sheet1.xml', "".join(sheet))
+        z.writestr('xl/sharedStrings.xml', "".join(shared))
+
+def docx_sources():
+    folder = os.path.join(ARCHIVOS, "respuesta")
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith('.docx') and not f.startswith('~$')]
+
+def fixture_paths(case, scale):
+    # Inputs for a case at a scale; x1 uses the fixtures themselves
+    if case == "cc_full":
+        sources = [os.path.join(CC_DIR, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf"),
+                   os.path.join(CC_DIR, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf")]
+        scaler = scale_pdf
+    elif case == "zetti":
+        sources = [os.path.join(CC_DIR, "documentos paseo actualizado.pdf"),
+                   os.path.join(CC_DIR, "documentos chacras actualizado.pdf")]
+        scaler = scale_pdf
+    elif case == "caja":
+        sources = [os.path.join(ARCHIVOS, "diferencias", "comprobantes de caja enero 26.CSV")]
+        scaler = scale_csv
+    elif case == "employees":
+        folder = os.path.join(ARCHIVOS, "horarios")
+        sources = [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.lower().endswith(".xls")]
+        scaler = scale_bytes
+    elif case == "xlsx":
+        # There is no XLSX among the fixtures; the workbook is generated
+        dst = _scaled_path(case, scale, "sintetico.xlsx")
+        if not os.path.exists(dst):
+            write_xlsx(dst, XLSX_BASE_ROWS * scale)
+        return [dst]
+    elif case == "docx":
+        # Documents can't be stretched meaningfully: x10 is ten copies of the folder
+        sources = docx_sources()
+        if scale == 1:
+            return sources
+        paths = []
+        for i in range(scale):
+            for src in sources:
+                dst = _scaled_path(case, scale, f"{i:03d} {os.path.basename(src)}")
+                if not os.path.exists(dst):
+                    shutil.copyfile(src, dst)
+                paths.append(dst)
+        return paths
+    else:
+        raise KeyError(f"Caso desconocido: {case}")
+
+    if scale == 1:
+        return sources
+    paths = []
+    for src in sources:
+        dst = _scaled_path(case, scale, os.path.basename(src))
+        if not os.path.exists(dst):
+            scaler(src, scale, dst)
+        paths.append(dst)
+    return paths
+
+# --- cases (run inside the child process) ---
+# Each returns (import seconds, {"rows": n, "pages": n, "bytes": n}) and
+# parses without the PDF / column caches so the parser itself is measured.
+
+def run_cc_full(paths):
+    t0 = time.perf_counter()
+    from parse_cc_full import parse_cc_pdf
+    from pdf_backends import get_backend
+    t_import = time.perf_counter() - t0
+    backend = get_backend()
+    counts = {"rows": 0, "pages": 0}
+    for p in paths:
+        counts["pages"] += backend.page_count(p)
+        counts["rows"] += len(parse_cc_pdf(p, "FCIA BIOSALUD"))
+    return t_import, counts
+
+def run_zetti(paths):
+    t0 = time.perf_counter()
+    import fitz
+    from process_cc_pdfs import parse_zetti_pdf
+    t_import = time.perf_counter() - t0
+    counts = {"rows": 0, "pages": 0}
+    for p in paths:
+        with fitz.open(p) as doc:
+            counts["pages"] += doc.page_count
+        counts["rows"] += len(parse_zetti_pdf(p, "FCIA BIOSALUD"))
+    return t_import, counts
+
+def run_caja(paths):
+    t0 = time.perf_counter()
+    from caja_loader import parse_caja_csv
+    from caja_aggregate import group_totals
+    t_import = time.perf_counter() - t0
+    counts = {"rows": 0}
+    for p in paths:
+        table = parse_caja_csv(p)
+        group_totals(table, ["Nodo", "dia_semana"])
+        counts["rows"] += len(table)
+    return t_import, counts
+
+def run_employees(paths):
+    t0 = time.perf_counter()
+    from extract_employees import extract_employees_from_xls
+    t_import = time.perf_counter() - t0
+    counts = {"rows": 0}
+    for p in paths:
+        counts["rows"] += len(extract_employees_from_xls(p, "FCIA BIOSALUD"))
+    return t_import, counts
+
+def run_xlsx(paths):
+    t0 = time.perf_counter()
+    from xlsx_reader import iter_rows
+    t_import = time.perf_counter() - t0
+    counts = {"rows": 0}
+    for p in paths:
+        for _ in iter_rows(p):
+            counts["rows"] += 1
+    return t_import, counts
+
+def run_docx(paths):
+    t0 = time.perf_counter()
+    from docx_text import docx_texts
+    t_import = time.perf_counter() - t0
+    counts = {"rows": 0}
+    for _, text, _ in docx_texts(paths):
+        counts["rows"] += text.count("\n") + 1
+    return t_import, counts
+
+CASES = {
+    "cc_full": run_cc_full,
+    "zetti": run_zetti,
+    "caja": run_caja,
+    "employees": run_employees,
+    "xlsx": run_xlsx,
+    "docx": run_docx,
+}
+
+def peak_rss_mb():
+    # VmHWM is reset by exec; ru_maxrss is not (on Linux it keeps the peak of
+    # the parent that built the fixtures), so /proc comes first
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def child_main(case, paths):
+    sys.path.insert(0, BASE_DIR)
+    with contextlib.redirect_stdout(sys.stderr):
+        t0 = time.perf_counter()
+        t_import, counts = CASES[case](paths)
+        elapsed = time.perf_counter() - t0 - t_import
+    counts["bytes"] = sum(os.path.getsize(p) for p in paths)
+    result = {"import_s": round(t_import, 4), "seconds": round(elapsed, 4), "peak_rss_mb": peak_rss_mb()}
+    result.update(counts)
+    for unit in ("rows", "pages", "bytes"):
+        if unit in counts and elapsed > 0:
+            result[f"{unit}_per_s"] = round(counts[unit] / elapsed, 1)
+    print(json.dumps(result))
+
+def run_case(case, scale):
+    paths = fixture_paths(case, scale)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", case] + paths,
+                          capture_output=True, text=True, cwd=BASE_DIR)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["?"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# --- history ---
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BASE_DIR)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_history(path, history):
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp, path)
+
+def previous_result(history, key):
+    for run in reversed(history):
+        if key in run["results"] and "error" not in run["results"][key]:
+            return run["results"][key]
+    return None
+
+def compare(current, previous, threshold):
+    # -> (text, regression?)
+    if previous is None or "error" in current or current["seconds"] < MIN_SECONDS:
+        return "", False
+    notes = []
+    regression = False
+    for metric in ("rows_per_s", "pages_per_s", "bytes_per_s"):
+        if current.get(metric) and previous.get(metric):
+            change = current[metric] / previous[metric] - 1
+            notes.append(f"{metric[:-6]}/s {change:+.0%}")
+            regression |= change < -threshold
+    if current.get("peak_rss_mb") and previous.get("peak_rss_mb"):
+        change = current["peak_rss_mb"] / previous["peak_rss_mb"] - 1
+        notes.append(f"RSS {change:+.0%}")
+        regression |= change > threshold
+    return ", ".join(notes), regression
+
+def main(argv):
+    if argv and argv[0] == "--child":
+        child_main(argv[1], argv[2:])
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmarks de los parsers")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10])
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--no-save", action="store_true", help="no agregar la corrida al historial")
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    run = {"date": datetime.now().isoformat(timespec="seconds"), "revision": _git_revision(),
+           "python": sys.version.split()[0], "platform": sys.platform, "results": {}}
+
+    regressions = 0
+    print(f"{'caso':<16}{'filas':>10}{'pags':>7}{'seg':>9}{'filas/s':>12}{'pags/s':>9}{'RSS MB':>9}{'import':>8}  vs anterior")
+    for case in args.cases:
+        for scale in args.scales:
+            key = f"{case}@x{scale}"
+            res = run_case(case, scale)
+            run["results"][key] = res
+            if "error" in res:
+                print(f"{key:<16}ERROR: {res['error']}")
+                continue
+            note, regression = compare(res, previous_result(history, key), args.threshold)
+            regressions += regression
+            rss = res["peak_rss_mb"] if res["peak_rss_mb"] is not None else "-"
+            print(f"{key:<16}{res.get('rows', 0):>10,}{res.get('pages', '-'):>7}{res['seconds']:>9.2f}"
+                  f"{res.get('rows_per_s', 0):>12,.0f}{res.get('pages_per_s', '-'):>9}{rss:>9}{res['import_s']:>8.2f}"
+                  f"  {note}{'  <-- REGRESIÓN' if regression else ''}")
+
+    if not args.no_save:
+        history.append(run)
+        save_history(args.history, history)
+        print(f"\nCorrida guardada en {args.history}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,20 @@
+# Branch names of the two stores as each export spells them, shared by the
+# parsers, the ingest daemon and informes.py. canonical_branch gives one name
+# per branch for joins: caja / cuenta corriente CSV "Nodo" ("BIOSALUD CHACRAS ",
+# with the trailing space), parse_cc_full ("BIOSALUD CHACRAS PARK"),
+# process_cc_pdfs ("CHACRAS PARK"). The canonical name is the caja "Nodo".
+
+# File key (PASEO / CHACRAS) -> the branch name each report writes in its records
+CC_BRANCHES = {"PASEO": "FCIA BIOSALUD", "CHACRAS": "BIOSALUD CHACRAS PARK"}
+ZETTI_BRANCHES = {"PASEO": "FCIA BIOSALUD", "CHACRAS": "CHACRAS PARK"}
+
+BRANCH_ALIASES = {
+    "BIOSALUD CHACRAS PARK": "BIOSALUD CHACRAS",
+    "CHACRAS PARK": "BIOSALUD CHACRAS",
+    "CHACRAS": "BIOSALUD CHACRAS",
+    "PASEO": "FCIA BIOSALUD",
+}
+
+def canonical_branch(name):
+    name = " ".join((name or "").upper().split())
+    return BRANCH_ALIASES.get(name, name)
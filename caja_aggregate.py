@@ -0,0 +1,103 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from caja_loader import load_caja, DATE_COLUMN
+from money import MISSING
+from pipeline_stats import NO_STATS, PipelineStats
+
+# Group-by totals over any set of caja exports.
+# Each file is aggregated on its own (NumPy, on the cached columns) into a
+# partial {(group values...): [total, count]}; the partials are keyed by the
+# decoded values, so files with different dictionaries merge by simple addition.
+# Totals are int64 cents, exact however many files are merged.
+
+WEEKDAYS = ["LUN", "MAR", "MIE", "JUE", "VIE", "SAB", "DOM"]
+
+# Dimensions derived from "Fecha y Hora"; any dictionary column works as-is
+DERIVED_DIMENSIONS = ("dia", "hora", "dia_semana", "mes")
+
+def _dimension(table, name):
+    # -> (int64 codes per row, labels, valid mask or None)
+    if name in table.dictionaries:
+        return np.asarray(table[name], dtype=np.int64), table.dictionaries[name], None
+    if name not in DERIVED_DIMENSIONS:
+        raise KeyError(f"Columna desconocida para agrupar: {name}")
+
+    stamps = np.asarray(table[DATE_COLUMN])
+    valid = ~np.isnat(stamps)
+    days = stamps.astype("datetime64[D]")
+    if name == "hora":
+        hours = (stamps - days).astype("timedelta64[h]").astype(np.int64)
+        return np.where(valid, hours, 0), list(range(24)), valid
+    if name == "dia_semana":
+        # 1970-01-01 was a Thursday
+        weekday = (days.astype(np.int64) + 3) % 7
+        return np.where(valid, weekday, 0), WEEKDAYS, valid
+    unit = "datetime64[D]" if name == "dia" else "datetime64[M]"
+    values = stamps.astype(unit)
+    uniq, codes = np.unique(values[valid], return_inverse=True)
+    full = np.zeros(len(stamps), dtype=np.int64)
+    full[valid] = codes
+    return full, [str(v) for v in uniq], valid
+
+def group_totals(table, by, value="Imp. Neto"):
+    # -> ({(label, ...): [total cents, count]}, skipped rows)
+    amounts = np.asarray(table[value], dtype=np.int64)
+    valid = amounts != MISSING
+
+    dims = [_dimension(table, name) for name in by]
+    key = np.zeros(len(amounts), dtype=np.int64)
+    for codes, labels, dim_valid in dims:
+        key = key * max(len(labels), 1) + codes
+        if dim_valid is not None:
+            valid &= dim_valid
+
+    uniq, inverse = np.unique(key[valid], return_inverse=True)
+    # float weights are exact integers while a group stays under 2**53 cents
+    totals = np.rint(np.bincount(inverse, weights=amounts[valid], minlength=len(uniq))).astype(np.int64)
+    counts = np.bincount(inverse, minlength=len(uniq))
+
+    result = {}
+    for k, total, count in zip(uniq.tolist(), totals.tolist(), counts.tolist()):
+        labels = []
+        for codes, dim_labels, _ in reversed(dims):
+            k, code = divmod(k, max(len(dim_labels), 1))
+            labels.append(dim_labels[code])
+        result[tuple(reversed(labels))] = [total, count]
+    return result, int((~valid).sum())
+
+def merge_totals(target, partial):
+    for key, (total, count) in partial.items():
+        acc = target.setdefault(key, [0, 0])
+        acc[0] += total
+        acc[1] += count
+    return target
+
+def _aggregate_file(path, by, value, with_stats=False):
+    # -> (totals, rows, skipped, stage report or None)
+    stats = PipelineStats("caja_file") if with_stats else NO_STATS
+    table = load_caja(path, stats=stats)
+    with stats.stage("group"):
+        result, skipped = group_totals(table, by, value)
+    return result, len(table), skipped, (stats.report() if with_stats else None)
+
+def aggregate_files(paths, by, value="Imp. Neto", workers=None, stats=NO_STATS):
+    # -> (merged totals, {"files", "rows", "skipped"}); files run in parallel.
+    # stats: stage timers of every file (collected in the workers) plus merge
+    merged = {}
+    summary = {"files": len(paths), "rows": 0, "skipped": 0}
+    n = len(paths)
+    if workers == 1 or n < 2:
+        partials = [_aggregate_file(p, by, value, bool(stats)) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_aggregate_file, paths, [by] * n, [value] * n, [bool(stats)] * n))
+    with stats.stage("merge"):
+        for result, rows, skipped, report in partials:
+            merge_totals(merged, result)
+            summary["rows"] += rows
+            summary["skipped"] += skipped
+            if report: stats.merge(report)
+    stats.count("files", summary["files"])
+    stats.count("rows", summary["rows"])
+    stats.count("skipped", summary["skipped"])
+    return merged, summary
@@ -0,0 +1,145 @@
+import os
+import csv
+import sys
+import json
+import numpy as np
+from money import parse_cents, MISSING
+from pipeline_stats import NO_STATS
+
+# Typed, cached loader for Zetti "comprobantes de caja" CSV exports.
+# The CSV is parsed once into NumPy columns:
+#   "Imp. ..."      -> int64 cents (money.parse_cents, "" -> MISSING)
+#   "Fecha y Hora"  -> datetime64[m]
+#   everything else -> dictionary encoded: int32 codes + list of distinct values
+# and saved next to the CSV in "<file>.colcache/" as one .npy per column plus
+# meta.json, so later runs open the columns memory-mapped without re-parsing.
+
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".colcache"
+DATE_COLUMN = "Fecha y Hora"
+
+def is_amount_column(name):
+    return name.startswith("Imp.")
+
+def parse_datetimes(values):
+    # "dd/mm/yyyy hh:mm" -> datetime64[m], NaT for empty cells
+    iso = [f"{v[6:10]}-{v[3:5]}-{v[0:2]}T{v[11:16] or '00:00'}" if v else "NaT" for v in values]
+    return np.array(iso, dtype="datetime64[m]")
+
+def encode_dictionary(values):
+    # Strings are stripped first: Zetti pads values like "BIOSALUD CHACRAS "
+    categories, codes = np.unique(np.char.strip(np.asarray(values, dtype=str)), return_inverse=True)
+    return codes.astype(np.int32), categories.tolist()
+
+class CajaTable:
+    def __init__(self, columns, dictionaries, source):
+        self.columns = columns            # name -> ndarray
+        self.dictionaries = dictionaries  # name -> list of values (for encoded columns)
+        self.source = source
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def names(self):
+        return list(self.columns)
+
+    def strings(self, name):
+        # Decoded values of a dictionary column
+        return np.asarray(self.dictionaries[name], dtype=object)[self.columns[name]]
+
+    def code_of(self, name, value):
+        # Code for a value (-1 if it never appears), to filter without decoding
+        try:
+            return self.dictionaries[name].index(value)
+        except ValueError:
+            return -1
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "version": CACHE_VERSION}
+
+def parse_caja_csv(csv_path, encoding='latin1'):
+    with open(csv_path, 'r', encoding=encoding, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [r for r in reader if r]
+
+    # Pad short rows so every column has one value per row
+    width = len(header)
+    raw = list(zip(*[r + [""] * (width - len(r)) if len(r) < width else r[:width] for r in rows])) if rows else [()] * width
+
+    columns = {}
+    dictionaries = {}
+    for name, values in zip(header, raw):
+        if is_amount_column(name):
+            columns[name] = parse_cents(values, name) if values else np.zeros(0, dtype=np.int64)
+        elif name == DATE_COLUMN:
+            columns[name] = parse_datetimes(values) if values else np.zeros(0, dtype="datetime64[m]")
+        else:
+            codes, cats = encode_dictionary(values) if values else (np.zeros(0, dtype=np.int32), [])
+            columns[name] = codes
+            dictionaries[name] = cats
+    return CajaTable(columns, dictionaries, csv_path)
+
+def save_cache(table, cache_dir):
+    tmp_dir = cache_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    files = {}
+    for idx, (name, arr) in enumerate(table.columns.items()):
+        files[name] = f"c{idx:02d}.npy"
+        np.save(os.path.join(tmp_dir, files[name]), arr)
+    meta = {
+        "source": _source_stamp(table.source),
+        "rows": len(table),
+        "files": files,
+        "dictionaries": table.dictionaries,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    # Swap in the new cache in one go
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
+        os.rmdir(cache_dir)
+    os.replace(tmp_dir, cache_dir)
+
+def open_cache(csv_path, cache_dir):
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta["source"] != _source_stamp(csv_path):
+        return None
+    columns = {name: np.load(os.path.join(cache_dir, fname), mmap_mode='r') for name, fname in meta["files"].items()}
+    return CajaTable(columns, meta["dictionaries"], csv_path)
+
+def load_caja(csv_path, use_cache=True, stats=NO_STATS):
+    cache_dir = csv_path + CACHE_SUFFIX
+    if use_cache:
+        with stats.stage("cache_open"):
+            table = open_cache(csv_path, cache_dir)
+        if table is not None:
+            stats.count("cache_hits")
+            return table
+        stats.count("cache_misses")
+    with stats.stage("parse_csv"):
+        table = parse_caja_csv(csv_path)
+    if use_cache:
+        try:
+            with stats.stage("save_cache"):
+                save_cache(table, cache_dir)
+        except OSError as e:
+            print(f"No se pudo guardar la cache de {csv_path}: {e}")
+    return table
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        t = load_caja(path)
+        print(f"{os.path.basename(path)}: {len(t)} comprobantes, {len(t.names())} columnas")
+        for name in ("Nodo", "Vendedor", "Tarjeta", "Obra Social"):
+            if name in t.dictionaries:
+                print(f"  {name}: {len(t.dictionaries[name])} valores distintos")
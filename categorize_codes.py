@@ -1,55 +1,44 @@
-import zipfile
-import xml.etree.ElementTree as ET
+import os
+import sys
+import argparse
+from xlsx_reader import iter_rows
+from keyword_categorizer import Categorizer, DEFAULT_CACHE_DIR
+
+# Rows of the CODIGOS EXCEL table by category. The keywords are in
+# categorias_codigos.json (plain substrings, as always); a row is listed under
+# every category with some keyword in it. All the keywords are matched by one
+# automaton (keyword_categorizer.py), one pass per row.
+#   python categorize_codes.py
+#   python categorize_codes.py "ARCHIVOS/CODIGOS EXCEL.xlsx" --reglas categorias_codigos.json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_XLSX = os.path.join(BASE_DIR, "ARCHIVOS", "CODIGOS EXCEL.xlsx")
+DEFAULT_RULES = os.path.join(BASE_DIR, "categorias_codigos.json")
 
 def read_xlsx(file_path):
-    shared_strings = []
-    data = []
     try:
-        with zipfile.ZipFile(file_path, 'r') as z:
-            if 'xl/sharedStrings.xml' in z.namelist():
-                with z.open('xl/sharedStrings.xml') as f:
-                    tree = ET.parse(f)
-                    for t in tree.findall('.//{http://schemas.openxmlformats.org/spreadsheetml/2006/main}t'):
-                        shared_strings.append(t.text)
-            
-            with z.open('xl/worksheets/sheet1.xml') as f:
-                tree = ET.parse(f)
-                root = tree.getroot()
-                ns = {'ns': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
-                for row in root.findall('.//ns:row', ns):
-                    vals = []
-                    for cell in row.findall('ns:c', ns):
-                        v = cell.find('ns:v', ns)
-                        if v is not None:
-                            val = v.text
-                            if cell.get('t') == 's':
-                                val = shared_strings[int(val)]
-                            vals.append(val)
-                    if vals:
-                        data.append(vals)
-        return data
+        return list(iter_rows(file_path))
     except Exception as e:
         print(f"Error: {e}")
         return []
 
-data = read_xlsx(r'e:\programacion\informes\ARCHIVOS\CODIGOS EXCEL.xlsx')
-
-keywords = {
-    "Proveedores": ["PROVEEDOR", "COMPRA"],
-    "Gastos": ["GASTOS", "SERVICIOS"],
-    "Cuentas Corrientes": ["CLIENTE", "RECIBO", "COBRO", "PAGO", "CUENTA CORRIENTE", "LIQUIDACION"],
-    "Auditoria": ["RECETA", "MANDATARIA", "AFIP", "VALIDA"]
-}
+def categorize(rows, categorizer):
+    # -> {category: [rows]} in rule order
+    hits = categorizer.matches([" ".join(str(x) for x in row) for row in rows])
+    return {category: [row for row, hit in zip(rows, hits[:, i]) if hit]
+            for i, category in enumerate(categorizer.categories)}
 
-results = {k: [] for k in keywords}
+def main(argv):
+    parser = argparse.ArgumentParser(description="Códigos del Excel por categoría")
+    parser.add_argument("xlsx", nargs="?", default=DEFAULT_XLSX)
+    parser.add_argument("--reglas", default=DEFAULT_RULES)
+    args = parser.parse_args(argv)
 
-for row in data:
-    txt = " ".join([str(x) for x in row]).upper()
-    for cat, kws in keywords.items():
-        if any(kw in txt for kw in kws):
-            results[cat].append(row)
+    categorizer = Categorizer.load(args.reglas, DEFAULT_CACHE_DIR)
+    for cat, rows in categorize(read_xlsx(args.xlsx), categorizer).items():
+        print(f"\n--- {cat} ---")
+        for r in rows:
+            print(", ".join([str(x) for x in r]))
 
-for cat, rows in results.items():
-    print(f"\n--- {cat} ---")
-    for r in rows:
-        print(", ".join([str(x) for x in r]))
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,353 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+import numpy as np
+from money import parse_cents, MISSING
+
+# Columnar store for the monthly COMISIONES exports.
+# Each CSV is split by the month of "Fecha Ticket" into one partition per month
+# (<store>/<YYYY-MM>/, one .npy per column), rows sorted by date:
+#   "$", "Comision"  -> int64 cents (no float drift when adding a whole year)
+#   "Cantidad"       -> float64
+#   "Fecha Ticket"   -> datetime64[m]
+#   everything else  -> int32 codes into store-wide dictionaries
+# The dictionaries live in store.json and only ever grow, so codes mean the same
+# in every partition and a year-long group-by never has to decode strings.
+# store.json also keeps each partition's min/max date (zone map): a date-range
+# query skips partitions outside the range and, inside a partition, cuts the
+# sorted date column with searchsorted on the memory-mapped array.
+# Adding a CSV replaces only the (Nodo_venta, day) slices it contains, so a
+# daily export ("comisiones dia 9.CSV") updates that day of the monthly data
+# and a re-export of a month replaces the whole month. Every row keeps the
+# file it came from (column "_archivo"); a file whose rows were all replaced
+# is dropped from the sources, so adding it again imports it again.
+#   python comisiones_store.py build "ARCHIVOS/testers/COMISIONES*.CSV"
+#   python comisiones_store.py query --by Usuario Rubro --desde 2025-03-01 --hasta 2025-06-30
+
+STORE_VERSION = 2
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "comisiones")
+DATE_COLUMN = "Fecha Ticket"
+CENTS_COLUMNS = ("$", "Comision")
+NUMBER_COLUMNS = ("Cantidad",)
+NODE_COLUMN = "Nodo_venta"
+SOURCE_COLUMN = "_archivo"
+
+def parse_numbers(values):
+    arr = np.char.strip(np.asarray(values, dtype=str))
+    arr = np.where(arr == "", "0", np.char.replace(arr, ",", "."))
+    return arr.astype(np.float64)
+
+def parse_ticket_dates(values):
+    # "dd-mm-yyyy hh:mm" -> datetime64[m], NaT when the cell is not a date
+    iso = []
+    for v in values:
+        v = v.strip()
+        if len(v) >= 10 and v[2] == "-" and v[5] == "-":
+            iso.append(f"{v[6:10]}-{v[3:5]}-{v[0:2]}T{v[11:16] or '00:00'}")
+        else:
+            iso.append("NaT")
+    return np.array(iso, dtype="datetime64[m]")
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _read_csv(csv_path, encoding='latin1'):
+    with open(csv_path, 'r', encoding=encoding, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        width = len(header)
+        rows = [r + [""] * (width - len(r)) if len(r) < width else r[:width] for r in reader if r]
+    return header, rows
+
+class ComisionesStore:
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = root
+        self.meta_path = os.path.join(root, "store.json")
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {"version": STORE_VERSION, "columns": [], "dictionaries": {}, "partitions": {}, "sources": {}}
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Version de store no soportada en {root}: {self.meta.get('version')}")
+        self._index = {name: {v: i for i, v in enumerate(values)} for name, values in self.meta["dictionaries"].items()}
+
+    # --- escritura ---
+
+    def _encode(self, name, values):
+        # Append-only: new values get the next code, old codes never move
+        values_list = self.meta["dictionaries"].setdefault(name, [])
+        index = self._index.setdefault(name, {})
+        uniq, inverse = np.unique(np.char.strip(np.asarray(values, dtype=str)), return_inverse=True)
+        mapping = np.empty(len(uniq), dtype=np.int32)
+        for i, v in enumerate(uniq.tolist()):
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(values_list)
+                values_list.append(v)
+            mapping[i] = code
+        return mapping[inverse]
+
+    def _save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    def _blank(self, name, n):
+        # Filler for a column one side of a merge doesn't have
+        if name in CENTS_COLUMNS:
+            return np.zeros(n, dtype=np.int64)
+        if name in NUMBER_COLUMNS:
+            return np.zeros(n, dtype=np.float64)
+        return np.full(n, self._encode(name, [""])[0], dtype=np.int32)
+
+    def _slices(self, columns):
+        # (day, Nodo_venta code) of every row, as one int64
+        days = columns[DATE_COLUMN].astype("datetime64[D]").astype(np.int64)
+        nodes = columns[NODE_COLUMN].astype(np.int64) if NODE_COLUMN in columns else 0
+        return (days << 32) | nodes
+
+    def _read_partition(self, month):
+        info = self.meta["partitions"].get(month)
+        if info is None:
+            return None
+        return {name: np.load(os.path.join(self.root, month, f)) for name, f in info["files"].items()}
+
+    def _merge(self, month, new):
+        # Old rows of the partition outside the slices of new + new, by date
+        old = self._read_partition(month)
+        if old is None:
+            return new
+        kept = ~np.isin(self._slices(old), self._slices(new))
+        old_rows, new_rows = int(kept.sum()), len(new[DATE_COLUMN])
+        merged = {}
+        for name in list(new) + [n for n in old if n not in new]:
+            merged[name] = np.concatenate([old[name][kept] if name in old else self._blank(name, old_rows),
+                                           new[name] if name in new else self._blank(name, new_rows)])
+        order = np.argsort(merged[DATE_COLUMN], kind="stable")
+        return {name: arr[order] for name, arr in merged.items()}
+
+    def _write_partition(self, month, columns):
+        part_dir = os.path.join(self.root, month)
+        tmp_dir = part_dir + ".tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        files = {}
+        for idx, (name, arr) in enumerate(columns.items()):
+            files[name] = f"c{idx:02d}.npy"
+            np.save(os.path.join(tmp_dir, files[name]), arr)
+        if os.path.isdir(part_dir):
+            for name in os.listdir(part_dir):
+                os.remove(os.path.join(part_dir, name))
+            os.rmdir(part_dir)
+        os.replace(tmp_dir, part_dir)
+        dates = columns[DATE_COLUMN]
+        codes, counts = np.unique(columns[SOURCE_COLUMN], return_counts=True)
+        names = self.meta["dictionaries"][SOURCE_COLUMN]
+        self.meta["partitions"][month] = {
+            "rows": int(len(dates)),
+            "min": str(dates[0]) if len(dates) else None,
+            "max": str(dates[-1]) if len(dates) else None,
+            "files": files,
+            "sources": {names[c]: n for c, n in zip(codes.tolist(), counts.tolist())},
+        }
+
+    def add_csv(self, csv_path, force=False):
+        # -> (rows stored, rows without date, months written); None if unchanged.
+        # Only the (Nodo_venta, day) slices present in the file are replaced.
+        key = os.path.basename(csv_path)
+        stamp = _source_stamp(csv_path)
+        if not force and self.meta["sources"].get(key) == stamp:
+            return None
+
+        header, rows = _read_csv(csv_path)
+        raw = dict(zip(header, zip(*rows))) if rows else {name: () for name in header}
+        dates = parse_ticket_dates(raw.get(DATE_COLUMN, ()))
+        valid = ~np.isnat(dates)
+        order = np.argsort(dates[valid], kind="stable")
+        keep = np.flatnonzero(valid)[order]
+        dates = dates[keep]
+
+        columns = {}
+        for name in header:
+            values = np.asarray(raw[name], dtype=str)[keep] if len(keep) else np.zeros(0, dtype=str)
+            if name == DATE_COLUMN:
+                columns[name] = dates
+            elif name in CENTS_COLUMNS:
+                cents = parse_cents(values, name)
+                columns[name] = np.where(cents == MISSING, 0, cents)
+            elif name in NUMBER_COLUMNS:
+                columns[name] = parse_numbers(values)
+            else:
+                columns[name] = self._encode(name, values)
+        columns[SOURCE_COLUMN] = self._encode(SOURCE_COLUMN, np.full(len(dates), key))
+        for name in header:
+            if name not in self.meta["columns"]:
+                self.meta["columns"].append(name)
+
+        months = dates.astype("datetime64[M]")
+        bounds = np.flatnonzero(months[1:] != months[:-1]) + 1
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [len(dates)]
+        written = []
+        for start, end in zip(starts, ends):
+            if start == end:
+                continue
+            month = str(months[start])
+            self._write_partition(month, self._merge(month, {n: a[start:end] for n, a in columns.items()}))
+            written.append(month)
+
+        # Files with no rows left anywhere were replaced entirely
+        alive = {name for info in self.meta["partitions"].values() for name in info["sources"]}
+        for name in list(self.meta["sources"]):
+            if name != key and name not in alive:
+                del self.meta["sources"][name]
+        self.meta["sources"][key] = stamp
+        self._save_meta()
+        return len(dates), int((~valid).sum()), written
+
+    # --- lectura ---
+
+    def months(self):
+        return sorted(self.meta["partitions"])
+
+    def column(self, month, name):
+        info = self.meta["partitions"][month]
+        return np.load(os.path.join(self.root, month, info["files"][name]), mmap_mode='r')
+
+    def code_of(self, name, value):
+        return self._index.get(name, {}).get(value, -1)
+
+    def _row_range(self, month, start, end):
+        # Zone map first (whole partition out of range), then searchsorted
+        info = self.meta["partitions"][month]
+        if not info["rows"]:
+            return None
+        if start is not None and np.datetime64(info["max"]) < start:
+            return None
+        if end is not None and np.datetime64(info["min"]) >= end:
+            return None
+        if (start is None or np.datetime64(info["min"]) >= start) and (end is None or np.datetime64(info["max"]) < end):
+            return 0, info["rows"]
+        dates = self.column(month, DATE_COLUMN)
+        lo = int(np.searchsorted(dates, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(dates, end, side="left")) if end is not None else info["rows"]
+        return (lo, hi) if lo < hi else None
+
+    def group_sum(self, by, value="Comision", start=None, end=None, where=None):
+        # -> {(label, ...): [total, count]}; cents columns come back in cents.
+        # start/end: "yyyy-mm-dd" (end exclusive); where: {column: value}.
+        # "mes" groups by partition without touching any column.
+        start = np.datetime64(start, "m") if start else None
+        end = np.datetime64(end, "m") if end else None
+        for name in list(by) + list(where or {}):
+            if name != "mes" and name not in self.meta["dictionaries"]:
+                raise KeyError(f"Columna desconocida para agrupar: {name}")
+        filters = [(name, self.code_of(name, v)) for name, v in (where or {}).items()]
+        if any(code < 0 for _, code in filters):
+            return {}
+
+        dims = [name for name in by if name != "mes"]
+        sizes = [max(len(self.meta["dictionaries"][name]), 1) for name in dims]
+        integer = value in CENTS_COLUMNS
+        result = {}
+        for month in self.months():
+            rows = self._row_range(month, start, end)
+            if rows is None:
+                continue
+            lo, hi = rows
+            amounts = np.asarray(self.column(month, value)[lo:hi])
+            mask = None
+            for name, code in filters:
+                m = np.asarray(self.column(month, name)[lo:hi]) == code
+                mask = m if mask is None else mask & m
+            key = np.zeros(hi - lo, dtype=np.int64)
+            for name, size in zip(dims, sizes):
+                key = key * size + self.column(month, name)[lo:hi]
+            if mask is not None:
+                key, amounts = key[mask], amounts[mask]
+
+            uniq, inverse = np.unique(key, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(uniq))
+            if integer:
+                totals = np.zeros(len(uniq), dtype=np.int64)
+                np.add.at(totals, inverse, amounts)
+            else:
+                totals = np.bincount(inverse, weights=amounts, minlength=len(uniq))
+
+            for k, total, count in zip(uniq.tolist(), totals.tolist(), counts.tolist()):
+                labels = []
+                for name, size in zip(reversed(dims), reversed(sizes)):
+                    k, code = divmod(k, size)
+                    labels.append(self.meta["dictionaries"][name][code])
+                labels.reverse()
+                label_key = tuple(month if name == "mes" else labels.pop(0) for name in by)
+                acc = result.setdefault(label_key, [0, 0])
+                acc[0] += total
+                acc[1] += count
+        return result
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def _format_value(total, value):
+    if value in CENTS_COLUMNS:
+        return f"${total / 100:,.2f}"
+    return f"{total:,.2f}"
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Store columnar de COMISIONES")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="importar CSVs de comisiones")
+    build.add_argument("files", nargs="+")
+    build.add_argument("--force", action="store_true", help="reimportar aunque no hayan cambiado")
+
+    query = sub.add_parser("query", help="totales agrupados")
+    query.add_argument("--by", nargs="+", default=["Usuario", "Rubro"])
+    query.add_argument("--value", default="Comision")
+    query.add_argument("--desde", help="yyyy-mm-dd (inclusive)")
+    query.add_argument("--hasta", help="yyyy-mm-dd (inclusive)")
+    query.add_argument("--where", nargs="*", default=[], help="Columna=valor")
+    args = parser.parse_args(argv)
+
+    store = ComisionesStore(args.store)
+    if args.command == "build":
+        os.makedirs(args.store, exist_ok=True)
+        for path in _expand(args.files):
+            res = store.add_csv(path, force=args.force)
+            if res is None:
+                print(f"{os.path.basename(path)}: sin cambios")
+                continue
+            rows, skipped, months = res
+            extra = f", {skipped} sin fecha" if skipped else ""
+            print(f"{os.path.basename(path)}: {rows:,} filas -> {', '.join(months)}{extra}")
+        return
+
+    end = None
+    if args.hasta:
+        end = str(np.datetime64(args.hasta, "D") + 1)
+    where = dict(w.split("=", 1) for w in args.where)
+    totals = store.group_sum(args.by, args.value, args.desde, end, where)
+
+    print(f"\n=== COMISIONES: {args.value} por {' / '.join(args.by)} ===")
+    grand_total = 0
+    grand_count = 0
+    for key in sorted(totals, key=lambda k: [str(x) for x in k]):
+        total, count = totals[key]
+        grand_total += total
+        grand_count += count
+        print(f"{' | '.join(str(k) for k in key)}: {_format_value(total, args.value)} ({count:,} items)")
+    print(f"\nTOTAL: {_format_value(grand_total, args.value)} ({grand_count:,} items)")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
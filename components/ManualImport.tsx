@@ -6,6 +6,23 @@ interface ManualImportProps {
     onImported: (data: any) => void;
 }
 
+// NDJSON exports (scripts run with --ndjson): read the file in slices, one record per line,
+// so a large export never has to be held as a single string
+const NDJSON_CHUNK_BYTES = 1024 * 1024;
+
+const readNdjson = async (file: File, onRecord: (r: any) => void) => {
+    const decoder = new TextDecoder();
+    let rest = '';
+    for (let offset = 0; offset < file.size; offset += NDJSON_CHUNK_BYTES) {
+        const buf = await file.slice(offset, offset + NDJSON_CHUNK_BYTES).arrayBuffer();
+        const lines = (rest + decoder.decode(buf, { stream: true })).split('\n');
+        rest = lines.pop() || '';
+        lines.forEach(line => { if (line.trim()) onRecord(JSON.parse(line)); });
+    }
+    rest += decoder.decode();
+    if (rest.trim()) onRecord(JSON.parse(rest));
+};
+
 export const ManualImport: React.FC<ManualImportProps> = ({ onImported }) => {
     const [file, setFile] = useState<File | null>(null);
     const [isProcessing, setIsProcessing] = useState(false);
@@ -24,25 +41,31 @@ export const ManualImport: React.FC<ManualImportProps> = ({ onImported }) => {
         setResult(null);
 
         try {
-            const content = await file.text();
-            const data = JSON.parse(content);
+            let data: any = null;
             let message = "";
             let count = 0;
 
             let combinedRecords: any[] = [];
 
-            // Check for multiple possible keys (GLOBAL, PASEO, CHACRAS)
-            const keysToProcess = ['GLOBAL', 'PASEO', 'CHACRAS'];
-            keysToProcess.forEach(key => {
-                if (data[key] && Array.isArray(data[key])) {
-                    // Tag records with their source key to handle missing branch info
-                    const tagged = data[key].map((r: any) => ({
-                        ...r,
-                        _sourceKey: key
-                    }));
-                    combinedRecords = [...combinedRecords, ...tagged];
-                }
-            });
+            if (/\.(ndjson|jsonl)$/i.test(file.name)) {
+                // Branch files carry the branch on every record
+                await readNdjson(file, r => { combinedRecords.push(r); });
+            } else {
+                data = JSON.parse(await file.text());
+
+                // Check for multiple possible keys (GLOBAL, PASEO, CHACRAS)
+                const keysToProcess = ['GLOBAL', 'PASEO', 'CHACRAS'];
+                keysToProcess.forEach(key => {
+                    if (data[key] && Array.isArray(data[key])) {
+                        // Tag records with their source key to handle missing branch info
+                        const tagged = data[key].map((r: any) => ({
+                            ...r,
+                            _sourceKey: key
+                        }));
+                        combinedRecords = [...combinedRecords, ...tagged];
+                    }
+                });
+            }
 
             if (combinedRecords.length > 0) {
                 // Map to records usable by the dashboard (Current Accounts)
@@ -120,12 +143,12 @@ export const ManualImport: React.FC<ManualImportProps> = ({ onImported }) => {
             <div className="p-6 border-2 border-dashed border-slate-200 rounded-3xl bg-slate-50 flex flex-col items-center justify-center text-center space-y-4">
                 <FileText className="w-12 h-12 text-slate-300" />
                 <div>
-                    <p className="text-sm font-black text-slate-700 uppercase">Seleccionar archivo .JSON</p>
+                    <p className="text-sm font-black text-slate-700 uppercase">Seleccionar archivo .JSON / .NDJSON</p>
                     <p className="text-[10px] text-slate-400 font-bold mt-1 uppercase">Debe ser el archivo generado por el script de análisis</p>
                 </div>
                 <input
                     type="file"
-                    accept=".json"
+                    accept=".json,.ndjson,.jsonl"
                     onChange={handleFileChange}
                     className="hidden"
                     id="manual-json-upload"
@@ -0,0 +1,145 @@
+import os
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pdf_cache import PdfCache, file_hash
+
+# Plain text of .docx files without python-docx: word/document.xml is streamed
+# out of the zip in chunks into expat and only the text nodes are kept.
+#   paragraph            -> one line (w:t text, w:tab "\t", w:br / w:cr "\n")
+#   table row            -> one line, cells joined by " | "
+# Body order is kept, so the tables of the Zetti support replies come out
+# where they are in the document. Batches run in a thread pool (reads and
+# zip inflate release the GIL) and the text is cached by file hash in
+# .cache/docx (same sqlite store as the PDF cache).
+#   python docx_text.py ARCHIVOS/respuesta
+
+# Bump when the extracted text changes so cached entries get re-extracted
+EXTRACT_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "docx")
+CELL_SEPARATOR = " | "
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+BREAKS = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n", W + "noBreakHyphen": "-"}
+
+class _TextTarget:
+    # expat target: gets start/end/data callbacks straight from the parser, no
+    # Element objects are built
+    def __init__(self):
+        self.lines = []
+        self.paragraphs = []   # text pieces of the open paragraphs (text boxes nest them)
+        self.rows = []         # cells of the open table rows (tables nest too)
+        self.cells = []        # paragraph texts of the open cells
+        self.in_text = False
+        self.skip = 0          # inside mc:Fallback, a duplicate of the AlternateContent choice
+
+    def start(self, tag, attrib):
+        if tag == MC_FALLBACK:
+            self.skip += 1
+        elif self.skip:
+            pass
+        elif tag == W + "t":
+            self.in_text = bool(self.paragraphs)
+        elif tag == W + "p":
+            self.paragraphs.append([])
+        elif tag in BREAKS:
+            if self.paragraphs:
+                self.paragraphs[-1].append(BREAKS[tag])
+        elif tag == W + "tr":
+            self.rows.append([])
+        elif tag == W + "tc":
+            self.cells.append([])
+
+    def data(self, text):
+        if self.in_text:
+            self.paragraphs[-1].append(text)
+
+    def end(self, tag):
+        if tag == MC_FALLBACK:
+            self.skip -= 1
+        elif self.skip:
+            pass
+        elif tag == W + "t":
+            self.in_text = False
+        elif tag == W + "p":
+            self._line("".join(self.paragraphs.pop()))
+        elif tag == W + "tc":
+            text = " ".join(t for t in self.cells.pop() if t)
+            if self.rows:
+                self.rows[-1].append(text)
+        elif tag == W + "tr":
+            self._line(CELL_SEPARATOR.join(self.rows.pop()))
+
+    def _line(self, text):
+        if self.cells:
+            self.cells[-1].append(text)
+        else:
+            self.lines.append(text)
+
+    def close(self):
+        return "\n".join(self.lines)
+
+def docx_text(path, chunk_size=1 << 16):
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as xml:
+        parser = ET.XMLParser(target=_TextTarget())
+        for chunk in iter(lambda: xml.read(chunk_size), b""):
+            parser.feed(chunk)
+        return parser.close()
+
+def docx_paths(inputs):
+    # Files as given, folders expanded to their .docx (Word lock files "~$" skipped)
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(os.path.join(item, f) for f in sorted(os.listdir(item))
+                         if f.lower().endswith('.docx') and not f.startswith('~$'))
+        else:
+            paths.append(item)
+    return paths
+
+def _safe(func, path):
+    try:
+        return func(path), None
+    except Exception as e:
+        return None, e
+
+def docx_texts(paths, workers=None, cache=None):
+    # -> [(path, text or None, error or None)] in the order of paths.
+    # Hashes first (threads), then only the cache misses are extracted (threads);
+    # the cache itself is only touched from this thread.
+    kind = f"docx:{EXTRACT_VERSION}"
+    texts = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        keys = {}
+        if cache:
+            for path, (digest, error) in zip(paths, pool.map(lambda p: _safe(file_hash, p), paths)):
+                if error is not None:
+                    errors[path] = error
+                    continue
+                keys[path] = f"file:{digest}:{kind}"
+                text = cache.get(keys[path])
+                if text is not None:
+                    texts[path] = text
+        missing = [p for p in paths if p not in texts and p not in errors]
+        for path, (text, error) in zip(missing, pool.map(lambda p: _safe(docx_text, p), missing)):
+            if error is not None:
+                errors[path] = error
+                continue
+            texts[path] = text
+            if path in keys:
+                cache.put(keys[path], text)
+    return [(p, texts.get(p), errors.get(p)) for p in paths]
+
+def open_cache(use_cache=True):
+    return PdfCache(DEFAULT_CACHE_DIR) if use_cache else None
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--no-cache"]
+    cache = open_cache("--no-cache" not in sys.argv)
+    for path, text, error in docx_texts(docx_paths(args or ["."]), cache=cache):
+        print(f"--- FILE: {os.path.basename(path)} ---")
+        print(text if error is None else f"Error reading file: {error}")
+        print("\n" + "=" * 50 + "\n")
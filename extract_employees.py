@@ -1,52 +1,93 @@
-
 import re
+import sys
 import json
 import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+# Pattern 1: SURNAME, NAME formats
+NAME_PATTERN_1 = re.compile(r'([A-Z\s]{2,},[\sA-Z]{2,})')
+# Pattern 2: NAME SURNAME formats (like ENRIQUE FERRER)
+# Looking for two or more uppercase words of at least 3 chars
+NAME_PATTERN_2 = re.compile(r'\b([A-Z]{3,}\s+[A-Z]{3,}(?:\s+[A-Z]{3,})?)\b')
+
+CUIL_PATTERN = re.compile(r'(\d{1,2}-\d{8}-\d{1})')
+NO_CUIL = "00-00000000-0"
+
+# A CUIL belongs to a name only if it sits inside this window around it
+CUIL_BEFORE = 100
+CUIL_AFTER = 200
+
+# Words to ignore that might look like names
+IGNORE_LIST = ["TOTAL", "FECHA", "ENTRADA", "SALIDA", "BIOSALUD", "PHARMACY", "REPORT", "PAGINA", "CHACRAS"]
+
+# Combined clock reports -> branch. Any other .xls in the folder is a
+# per-employee report; its people take the branch of the combined report
+# they also appear in.
+BRANCH_FILES = {
+    "todos horarios paseo.xls": "FCIA BIOSALUD",
+    "todos informe reloj chacras.xls": "CHACRAS PARK",
+}
+HORARIOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ARCHIVOS", "horarios")
+
+def normalize_name(name):
+    return name.replace(" ", "").upper().replace(",", "")
+
+def nearest_cuil(cuils, starts, name_start, name_end):
+    # cuils: [(start, end, text)] sorted by start, starts: their start offsets.
+    # Only the CUILs around the insertion point can be the closest one.
+    i = bisect_left(starts, name_start)
+    best = None
+    best_dist = None
+    for start, end, text in cuils[max(0, i - 1):i + 1]:
+        if start < name_start - CUIL_BEFORE or end > name_start + CUIL_AFTER:
+            continue
+        dist = name_start - end if end <= name_start else max(0, start - name_end)
+        if best_dist is None or dist < best_dist:
+            best, best_dist = text, dist
+    return best
 
 def extract_employees_from_xls(file_path, branch):
-    employees = []
-    # Pattern 1: SURNAME, NAME formats
-    name_pattern_1 = re.compile(r'([A-Z\s]{2,},[\sA-Z]{2,})')
-    # Pattern 2: NAME SURNAME formats (like ENRIQUE FERRER)
-    # Looking for two or more uppercase words of at least 3 chars
-    name_pattern_2 = re.compile(r'\b([A-Z]{3,}\s+[A-Z]{3,}(?:\s+[A-Z]{3,})?)\b')
-    
-    cuil_pattern = re.compile(r'(\d{1,2}-\d{8}-\d{1})')
-    
-    # Words to ignore that might look like names
-    ignore_list = ["TOTAL", "FECHA", "ENTRADA", "SALIDA", "BIOSALUD", "PHARMACY", "REPORT", "PAGINA", "CHACRAS"]
+    employees = {}
 
     try:
         with open(file_path, 'rb') as f:
             content = f.read().decode('latin-1', errors='ignore')
-            
-            # Extract names from both patterns
-            potential_names = name_pattern_1.findall(content) + name_pattern_2.findall(content)
-            
-            for name in potential_names:
-                name = name.strip()
-                
+
+        # One pass per pattern; every match keeps its own position, so the CUIL
+        # is looked up next to that occurrence and not the first one in the file
+        cuils = [(m.start(), m.end(), m.group(0)) for m in CUIL_PATTERN.finditer(content)]
+        starts = [c[0] for c in cuils]
+
+        for pattern in (NAME_PATTERN_1, NAME_PATTERN_2):
+            for m in pattern.finditer(content):
+                name = m.group(1)
+                stripped = name.strip()
+
                 # Filter out garbage
-                if len(name) < 8 or any(word in name for word in ignore_list) or name.count(' ') > 3:
+                if len(stripped) < 8 or any(word in stripped for word in IGNORE_LIST) or stripped.count(' ') > 3:
+                    continue
+
+                key = normalize_name(stripped)
+                known = employees.get(key)
+                if known is not None and known["cuil"] != NO_CUIL:
                     continue
-                
-                # Check for CUIL nearby
-                pos = content.find(name)
-                near_content = content[max(0, pos-100):pos+200]
-                cuil_match = cuil_pattern.search(near_content)
-                cuil = cuil_match.group(0) if cuil_match else "00-00000000-0"
-                
+
+                name_start = m.start(1) + (len(name) - len(name.lstrip()))
+                cuil = nearest_cuil(cuils, starts, name_start, name_start + len(stripped)) or NO_CUIL
+                if known is not None and cuil == NO_CUIL:
+                    continue
+
                 # Deduce Zetti alias
-                zetti_alias = ""
-                if ',' in name:
-                    parts = name.split(',')
-                    zetti_alias = parts[1].strip().split(' ' )[0] if len(parts) > 1 else name
+                if ',' in stripped:
+                    parts = stripped.split(',')
+                    zetti_alias = parts[1].strip().split(' ')[0] if len(parts) > 1 else stripped
                 else:
-                    zetti_alias = name.split(' ')[0]
+                    zetti_alias = stripped.split(' ')[0]
 
-                employees.append({
-                    "id": cuil if cuil != "00-00000000-0" else f"GEN-{name.replace(' ', '')}",
-                    "name": name,
+                employees[key] = {
+                    "id": cuil if cuil != NO_CUIL else f"GEN-{stripped.replace(' ', '')}",
+                    "name": stripped,
                     "cuil": cuil,
                     "branch": branch,
                     "position": "Vendedor",
@@ -54,37 +95,48 @@ def extract_employees_from_xls(file_path, branch):
                     "startDate": "2025-01-01",
                     "baseSalary": 0,
                     "zettiSellerName": zetti_alias
-                })
-                        
+                }
+
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
-        
-    return employees
 
-if __name__ == "__main__":
-    paseo_file = r"c:\programacion\informes\ARCHIVOS\horarios\todos horarios paseo.xls"
-    chacras_file = r"c:\programacion\informes\ARCHIVOS\horarios\todos informe reloj chacras.xls"
-    
-    all_emp = []
-    if os.path.exists(paseo_file):
-        all_emp.extend(extract_employees_from_xls(paseo_file, "FCIA BIOSALUD"))
-    if os.path.exists(chacras_file):
-        all_emp.extend(extract_employees_from_xls(chacras_file, "CHACRAS PARK"))
-        
+    return list(employees.values())
+
+def extract_all(folder, workers=None):
+    # Combined reports first (they carry the branch), then the per-employee ones;
+    # all files are parsed in parallel and merged in this fixed order
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(".xls"))
+    names.sort(key=lambda n: n.lower() not in BRANCH_FILES)
+    paths = [os.path.join(folder, n) for n in names]
+    branches = [BRANCH_FILES.get(n.lower()) for n in names]
+
+    if workers == 1 or len(paths) < 2:
+        results = [extract_employees_from_xls(p, b) for p, b in zip(paths, branches)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(extract_employees_from_xls, paths, branches))
+
     unique = {}
-    for e in all_emp:
-        norm_name = e["name"].replace(" ", "").upper().replace(",", "")
-        if norm_name not in unique:
-            unique[norm_name] = e
-        elif e["cuil"] != "00-00000000-0" and unique[norm_name]["cuil"] == "00-00000000-0":
-            unique[norm_name] = e
-            
-    final_list = list(unique.values())
+    for employees in results:
+        for e in employees:
+            norm_name = normalize_name(e["name"])
+            known = unique.get(norm_name)
+            if known is None:
+                unique[norm_name] = e
+            elif e["cuil"] != NO_CUIL and known["cuil"] == NO_CUIL:
+                e["branch"] = e["branch"] or known["branch"]
+                unique[norm_name] = e
+    return list(unique.values())
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else HORARIOS_DIR
+
+    final_list = extract_all(folder)
     final_list.sort(key=lambda x: x["name"])
-    
+
     with open("employees_import_initial.json", 'w', encoding='utf-8') as f:
         json.dump(final_list, f, indent=2)
-        
+
     print(f"Extracted {len(final_list)} employees.")
     for e in final_list:
-        print(f"- {e['name']} ({e['branch']})")
+        print(f"- {e['name']} ({e['branch'] or 'sin sucursal'})")
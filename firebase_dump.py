@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import glob
+import codecs
+import hashlib
+import argparse
+from collections import Counter
+
+# Firebase dumps (ARCHIVOS/testers/json firebase/invoices.txt, expenses.txt):
+# one-line JSON arrays of documents with "monthYear" and "branch".
+# iter_documents streams the array in chunks and yields (byte offset, byte
+# length, document) without holding more than the current chunk. The index
+# (.cache/firebase/<dump>-<path hash>.json) keeps, per "monthYear|branch",
+# runs of consecutive documents as [offset, length, count]; reading one month
+# seeks to its runs and parses only those bytes. Dumps grow at the end, so a
+# refresh hashes the already indexed prefix and, when it is unchanged, scans
+# only the new tail; any other change rebuilds the index.
+#   python firebase_dump.py index "ARCHIVOS/testers/json firebase/*.txt"
+#   python firebase_dump.py mes "ARCHIVOS/testers/json firebase/invoices.txt" --mes 2026-01
+#   python firebase_dump.py diff "ARCHIVOS/testers/json firebase/invoices.txt" --mes 2026-01 --caja "ARCHIVOS/diferencias/*.CSV"
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "firebase")
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\r\n"
+
+# Firebase "branch" -> caja "Nodo"
+FIREBASE_NODES = {
+    "BIOSALUD CHACRAS PARK": "BIOSALUD CHACRAS",
+}
+# Firebase invoice "type" -> first word of caja "Tipo Cmp."
+FIREBASE_TYPES = {"FDVP": "FV", "NC": "NC", "TRSU": "TX"}
+# Kinds Firebase stores as positive amounts while caja books them negative
+CREDIT_KINDS = ("NC",)
+
+def iter_documents(path, start=0, chunk_size=CHUNK_SIZE):
+    # -> (byte offset, byte length, document) for every element of the array.
+    # start: 0, or the byte right after a document already read (resume).
+    # Between documents there is only ASCII ("[", ",", whitespace), so the
+    # byte position advances by one per skipped char and by the encoded
+    # length of each document.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        buf, pos, at = "", 0, start
+        opened = start > 0
+        eof = False
+        while True:
+            while pos < len(buf) and (buf[pos] in WHITESPACE or (opened and buf[pos] == ",")):
+                pos += 1
+                at += 1
+            if pos < len(buf):
+                if not opened:
+                    if buf[pos] != "[":
+                        raise ValueError(f"{path}: se esperaba un array JSON")
+                    opened, pos, at = True, pos + 1, at + 1
+                    continue
+                if buf[pos] == "]":
+                    return
+                try:
+                    doc, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    length = len(buf[pos:end].encode("utf-8"))
+                    yield at, length, doc
+                    pos, at = end, at + length
+                    continue
+            if eof:
+                raise ValueError(f"{path}: array JSON sin cerrar")
+            # Need more text: drop what was consumed and read the next chunk
+            buf, pos = buf[pos:], 0
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += utf8.decode(chunk, final=eof)
+
+def partition_key(doc):
+    return f"{doc.get('monthYear') or 'sin-mes'}|{doc.get('branch') or 'sin-sucursal'}"
+
+def _prefix_hash(path, length):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        left = length
+        while left > 0:
+            block = f.read(min(1 << 20, left))
+            if not block:
+                break
+            h.update(block)
+            left -= len(block)
+    return h.hexdigest()
+
+class DumpIndex:
+    def __init__(self, dump_path, index_dir=DEFAULT_INDEX_DIR):
+        self.dump_path = dump_path
+        tag = hashlib.sha1(os.path.abspath(dump_path).encode("utf-8")).hexdigest()[:8]
+        stem = os.path.splitext(os.path.basename(dump_path))[0]
+        self.path = os.path.join(index_dir, f"{stem}-{tag}.json")
+        self.meta = None
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("version") == INDEX_VERSION:
+                self.meta = meta
+
+    def _empty(self):
+        return {"version": INDEX_VERSION, "size": 0, "mtime_ns": 0, "scanned": 0,
+                "prefix_sha256": None, "documents": 0, "partitions": {}}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def refresh(self, force=False):
+        # -> ("sin cambios" | "incremental" | "completo", documents read)
+        st = os.stat(self.dump_path)
+        meta = self.meta
+        if not force and meta and (meta["size"], meta["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            return "sin cambios", 0
+        resume = (not force and meta and meta["scanned"] and st.st_size >= meta["scanned"]
+                  and _prefix_hash(self.dump_path, meta["scanned"]) == meta["prefix_sha256"])
+        if not resume:
+            meta = self._empty()
+        mode = "incremental" if resume else "completo"
+
+        read = 0
+        partitions = meta["partitions"]
+        previous = None
+        for offset, length, doc in iter_documents(self.dump_path, meta["scanned"]):
+            key = partition_key(doc)
+            runs = partitions.setdefault(key, [])
+            # Same partition as the previous document: extend its run (the
+            # bytes in between are only the "," separator and whitespace)
+            if key == previous:
+                runs[-1][1] = offset + length - runs[-1][0]
+                runs[-1][2] += 1
+            else:
+                runs.append([offset, length, 1])
+            previous = key
+            meta["scanned"] = offset + length
+            read += 1
+        meta["documents"] += read
+        meta["size"], meta["mtime_ns"] = st.st_size, st.st_mtime_ns
+        meta["prefix_sha256"] = _prefix_hash(self.dump_path, meta["scanned"])
+        self.meta = meta
+        self.save()
+        return mode, read
+
+    def partitions(self):
+        # -> {"monthYear|branch": documents}
+        return {key: sum(r[2] for r in runs) for key, runs in sorted(self.meta["partitions"].items())}
+
+    def read(self, month=None, branch=None):
+        # Documents of the matching partitions, in file order; only their bytes are read
+        runs = []
+        for key, key_runs in self.meta["partitions"].items():
+            key_month, key_branch = key.split("|", 1)
+            if (month is None or key_month == month) and (branch is None or key_branch == branch):
+                runs.extend(key_runs)
+        with open(self.dump_path, 'rb') as f:
+            for offset, length, _ in sorted(runs):
+                f.seek(offset)
+                yield from json.loads(b"[" + f.read(length) + b"]")
+
+def open_index(dump_path, index_dir=DEFAULT_INDEX_DIR, force=False):
+    index = DumpIndex(dump_path, index_dir)
+    index.refresh(force)
+    return index
+
+def _cents(value):
+    from money import cents_from_float
+    return cents_from_float(value or 0)
+
+def diff_caja(invoices, caja_paths):
+    # Firebase invoices vs a Zetti caja export, keyed by (Nodo, document kind,
+    # number). -> {"solo_firebase", "solo_caja", "importe_distinto", "iguales"}
+    import numpy as np
+    from caja_loader import load_caja
+    from money import MISSING
+
+    caja = {}
+    for path in caja_paths:
+        table = load_caja(path)
+        void = table.code_of("Anulado", "Si") if "Anulado" in table.dictionaries else -2
+        labels = {name: np.asarray(table.dictionaries[name], dtype=object)
+                  for name in ("Nodo", "Tipo Cmp.", "Nro de Comprobante")}
+        nodes = labels["Nodo"][np.asarray(table["Nodo"])]
+        kinds = labels["Tipo Cmp."][np.asarray(table["Tipo Cmp."])]
+        numbers = labels["Nro de Comprobante"][np.asarray(table["Nro de Comprobante"])]
+        amounts = np.asarray(table["Imp. Neto"])
+        stamps = np.asarray(table["Fecha y Hora"]).astype(str)
+        voided = np.asarray(table["Anulado"]) == void if void != -2 else np.zeros(len(table), dtype=bool)
+        for node, kind, number, cents, stamp, is_void in zip(nodes.tolist(), kinds.tolist(), numbers.tolist(),
+                                                             amounts.tolist(), stamps.tolist(), voided.tolist()):
+            if not is_void:
+                caja.setdefault((node, kind.split(" ")[0], number), []).append(
+                    {"importe": None if cents == MISSING else cents, "fecha": stamp})
+
+    result = {"solo_firebase": [], "solo_caja": [], "importe_distinto": [], "iguales": 0}
+    for doc in invoices:
+        node = FIREBASE_NODES.get(doc.get("branch"), doc.get("branch"))
+        key = (node, FIREBASE_TYPES.get(doc.get("type"), doc.get("type")), doc.get("invoiceNumber"))
+        amount = _cents(doc.get("netAmount"))
+        if key[1] in CREDIT_KINDS:
+            amount = -abs(amount)
+        rows = caja.get(key)
+        if not rows:
+            result["solo_firebase"].append({"clave": list(key), "id": doc.get("id"), "importe": amount})
+            continue
+        found = rows.pop(0)
+        if found["importe"] != amount:
+            result["importe_distinto"].append({"clave": list(key), "firebase": amount, "caja": found["importe"]})
+        else:
+            result["iguales"] += 1
+    result["solo_caja"] = [{"clave": list(key), **row} for key, rows in sorted(caja.items()) for row in rows]
+    return result
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Dumps de Firebase (invoices / expenses) indexados por mes y sucursal")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("index", help="crear / actualizar el índice")
+    p.add_argument("dumps", nargs="+")
+    p.add_argument("--force", action="store_true", help="reconstruir aunque no haya cambios")
+
+    p = sub.add_parser("mes", help="documentos de un mes (y sucursal)")
+    p.add_argument("dump")
+    p.add_argument("--mes", required=True, help="YYYY-MM")
+    p.add_argument("--sucursal")
+    p.add_argument("-o", "--output", help="guardar los documentos en JSON")
+
+    p = sub.add_parser("diff", help="comparar un mes de invoices contra exports de caja")
+    p.add_argument("dump")
+    p.add_argument("--mes", required=True, help="YYYY-MM")
+    p.add_argument("--caja", nargs="+", required=True)
+    p.add_argument("--sucursal")
+    p.add_argument("--top", type=int, default=20, help="diferencias a listar por tipo")
+    p.add_argument("-o", "--output", help="detalle completo en JSON (importes en centavos)")
+    args = parser.parse_args(argv)
+
+    if args.command == "index":
+        for path in _expand(args.dumps):
+            index = DumpIndex(path, args.index_dir)
+            mode, read = index.refresh(args.force)
+            print(f"{os.path.basename(path)}: {mode}, {read:,} documentos leídos, {index.meta['documents']:,} indexados")
+            for key, count in index.partitions().items():
+                print(f"  {key}: {count:,}")
+        return
+
+    index = open_index(args.dump, args.index_dir)
+    docs = list(index.read(args.mes, args.sucursal))
+
+    if args.command == "mes":
+        by_branch = Counter(d.get("branch") for d in docs)
+        for branch, count in sorted(by_branch.items()):
+            print(f"{branch}: {count:,} documentos")
+        if args.output:
+            tmp = args.output + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(docs, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, args.output)
+            print(f"Guardado {args.output}")
+        return
+
+    from money import pesos
+    result = diff_caja(docs, _expand(args.caja))
+    print(f"Iguales: {result['iguales']:,}")
+    print(f"Solo en Firebase: {len(result['solo_firebase']):,}")
+    for d in result["solo_firebase"][:args.top]:
+        print(f"  {' '.join(d['clave'])}: ${pesos(d['importe']):,.2f}")
+    print(f"Solo en caja: {len(result['solo_caja']):,}")
+    for d in result["solo_caja"][:args.top]:
+        amount = f"${pesos(d['importe']):,.2f}" if d["importe"] is not None else "sin importe"
+        print(f"  {' '.join(d['clave'])} ({d['fecha']}): {amount}")
+    print(f"Importe distinto: {len(result['importe_distinto']):,}")
+    for d in result["importe_distinto"][:args.top]:
+        print(f"  {' '.join(d['clave'])}: Firebase ${pesos(d['firebase']):,.2f} | caja ${pesos(d['caja']):,.2f}")
+    if args.output:
+        tmp = args.output + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, args.output)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,222 @@
+import os
+import sys
+import argparse
+from branches import CC_BRANCHES, ZETTI_BRANCHES
+
+# Single entry point for the Python tools. Only argparse is loaded up front:
+# every subcommand imports its parser (fitz, pdfplumber, numpy, python-docx...)
+# when it runs, so a small dump doesn't pay for the PDF stack. Paths are
+# arguments; the defaults point at ARCHIVOS/ next to this file.
+#   python informes.py cc-parse --paseo "ARCHIVOS/CUENTAS CORRIENTES/x.pdf" -o cc.json
+#   python informes.py caja-summary "ARCHIVOS/diferencias/*.CSV" --by Nodo Vendedor
+#   python informes.py xlsx-dump "CODIGOS EXCEL.xlsx" --all
+#   python informes.py employees ARCHIVOS/horarios -o employees_import_initial.json
+#   python informes.py docx-dump ARCHIVOS/respuesta
+#   python informes.py ingest --once
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVOS = os.path.join(BASE_DIR, "ARCHIVOS")
+CC_DIR = os.path.join(ARCHIVOS, "CUENTAS CORRIENTES")
+
+def _write_json(data, path):
+    import json
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def _cc_jobs(args, branches):
+    jobs = []
+    for key, pdf in (("PASEO", args.paseo), ("CHACRAS", args.chacras)):
+        if not pdf:
+            continue
+        if not os.path.exists(pdf):
+            print(f"No existe {pdf}, se omite {key}")
+            continue
+        jobs.append((key, pdf, branches[key]))
+    return jobs
+
+def _write_cc(args, jobs, parse, iterate, stats, cache):
+    # Either NDJSON per branch (streamed) or the {"PASEO", "CHACRAS", "GLOBAL"}
+    # JSON the UI imports
+    if args.ndjson:
+        from ndjson_export import export_ndjson
+        os.makedirs(args.ndjson, exist_ok=True)
+        with stats.stage("export"):
+            index = export_ndjson(args.ndjson, args.prefix, ((key, iterate(pdf, branch)) for key, pdf, branch in jobs))
+        for b in index["branches"]:
+            print(f"{b['key']}: {b['records']} registros | Debe: {b['debit']:.2f} | Haber: {b['credit']:.2f} -> {b['file']}")
+    else:
+        output = {}
+        for key, pdf, branch in jobs:
+            output[key] = parse(pdf, branch)
+            print(f"{key}: {len(output[key])} registros")
+        output["GLOBAL"] = [r for key, _, _ in jobs for r in output[key]]
+        with stats.stage("json_dump"):
+            _write_json(output, args.output)
+        print(f"Guardado {args.output} ({len(output['GLOBAL'])} registros)")
+
+    if args.stats:
+        if cache:
+            stats.count("cache_hits", cache.hits)
+            stats.count("cache_misses", cache.misses)
+        stats.write(args.stats)
+        stats.print_summary()
+
+def cmd_cc_parse(args):
+    from pipeline_stats import PipelineStats, NO_STATS, profiled
+    from pdf_cache import PdfCache
+    from parse_cc_full import parse_cc_pdf, iter_cc_pdf, parse_cc_files
+
+    cache = None if args.no_cache else PdfCache()
+    stats = PipelineStats("cc-parse") if args.stats else NO_STATS
+    jobs = _cc_jobs(args, CC_BRANCHES)
+    with profiled(args.profile, "cc-parse"):
+        if args.workers and args.workers > 1 and not args.ndjson:
+            # All pages of all files share one pool
+            results = parse_cc_files([(pdf, branch) for _, pdf, branch in jobs], args.workers,
+                                     cache=cache, backend=args.backend, stats=stats)
+            parsed = {pdf: recs for (_, pdf, _), recs in zip(jobs, results)}
+            parse = lambda pdf, branch: parsed[pdf]
+        else:
+            parse = lambda pdf, branch: parse_cc_pdf(pdf, branch, cache=cache, backend=args.backend, stats=stats)
+        iterate = lambda pdf, branch: iter_cc_pdf(pdf, branch, cache, args.backend, stats)
+        _write_cc(args, jobs, parse, iterate, stats, cache)
+
+def cmd_cc_update(args):
+    from pipeline_stats import PipelineStats, NO_STATS, profiled
+    from pdf_cache import PdfCache
+    from process_cc_pdfs import parse_zetti_pdf, iter_zetti_pdf
+
+    cache = None if args.no_cache else PdfCache()
+    stats = PipelineStats("cc-update") if args.stats else NO_STATS
+    jobs = _cc_jobs(args, ZETTI_BRANCHES)
+    with profiled(args.profile, "cc-update"):
+        parse = lambda pdf, branch: parse_zetti_pdf(pdf, branch, cache, stats, args.limit)
+        iterate = lambda pdf, branch: iter_zetti_pdf(pdf, branch, cache, stats, args.limit)
+        _write_cc(args, jobs, parse, iterate, stats, cache)
+
+def cmd_xlsx_dump(args):
+    import csv
+    from xlsx_reader import iter_rows, iter_all_sheets, sheet_names
+
+    if args.list:
+        for i, name in enumerate(sheet_names(args.file)):
+            print(f"{i}: {name}")
+        return
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.writer(out, lineterminator='\n')
+        if args.all:
+            current = None
+            for sheet, row in iter_all_sheets(args.file):
+                if sheet != current:
+                    writer.writerow([f"--- {sheet} ---"])
+                    current = sheet
+                writer.writerow(row)
+        else:
+            sheet = int(args.sheet) if args.sheet.isdigit() else args.sheet
+            for row in iter_rows(args.file, sheet):
+                writer.writerow(row)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def cmd_employees(args):
+    from extract_employees import extract_all
+
+    employees = extract_all(args.folder, args.workers)
+    employees.sort(key=lambda x: x["name"])
+    _write_json(employees, args.output)
+    print(f"Extracted {len(employees)} employees.")
+    for e in employees:
+        print(f"- {e['name']} ({e['branch'] or 'sin sucursal'})")
+
+def cmd_docx_dump(args):
+    from docx_text import docx_texts, docx_paths, open_cache
+
+    for path, text, error in docx_texts(docx_paths(args.inputs), args.workers, open_cache(not args.no_cache)):
+        print(f"--- FILE: {os.path.basename(path)} ---")
+        print(text if error is None else f"Error reading file: {error}")
+        print("\n" + "=" * 50 + "\n")
+
+# Tools that already have their own argparse main(): the rest of the command
+# line is handed over untouched
+DELEGATED = {
+    "caja-summary": ("analizar_comprobantes", "totales de comprobantes de caja"),
+    "comisiones": ("comisiones_store", "store columnar de COMISIONES (build / query)"),
+    "sellers": ("seller_identity", "índice de identidades de vendedores"),
+    "reconcile": ("reconcile_cc", "conciliación cuenta corriente CSV vs PDF"),
+    "bench": ("bench_parsers", "benchmarks de los parsers"),
+    "stock": ("stock_ledger", "ledger de stock por código de barras"),
+    "proveedores": ("supplier_debt", "deuda con proveedores (aging, deudores, historial)"),
+    "ingest": ("ingest_daemon", "ingesta automática de la carpeta ARCHIVOS"),
+    "horas": ("attendance_sales", "horas trabajadas (reloj) contra ventas de caja"),
+    "firebase": ("firebase_dump", "dumps de Firebase indexados por mes y sucursal"),
+    "cubos": ("sales_cube", "cubos de ventas por día de semana y hora (heatmap)"),
+    "categorias": ("keyword_categorizer", "categorización de productos y códigos por palabras clave"),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="informes", description="Herramientas de importación de Biosalud")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def cc_options(p, paseo, chacras, output, prefix):
+        p.add_argument("--paseo", default=os.path.join(CC_DIR, paseo), help="PDF de FCIA BIOSALUD")
+        p.add_argument("--chacras", default=os.path.join(CC_DIR, chacras), help="PDF de CHACRAS PARK")
+        p.add_argument("-o", "--output", default=output)
+        p.add_argument("--ndjson", metavar="DIR", help="exportar NDJSON por sucursal en DIR en lugar del JSON")
+        p.add_argument("--prefix", default=prefix, help="prefijo de los archivos NDJSON")
+        p.add_argument("--no-cache", action="store_true")
+        p.add_argument("--stats", metavar="REPORTE.json")
+        p.add_argument("--profile", choices=["cpu", "mem"])
+
+    p = sub.add_parser("cc-parse", help="Documentos Pendientes (parse_cc_full)")
+    cc_options(p, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf", "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf",
+               "current_accounts_import.json", "current_accounts_import")
+    p.add_argument("--workers", type=int, default=0)
+    p.add_argument("--backend", default="auto", choices=["auto", "pymupdf", "pdfplumber"])
+    p.set_defaults(func=cmd_cc_parse)
+
+    p = sub.add_parser("cc-update", help="reporte detallado actualizado (process_cc_pdfs)")
+    cc_options(p, "documentos paseo actualizado.pdf", "documentos chacras actualizado.pdf",
+               "current_accounts_updated.json", "current_accounts_updated")
+    p.add_argument("--limit", type=int, help="solo los primeros N registros por sucursal (muestra rápida)")
+    p.set_defaults(func=cmd_cc_update)
+
+    p = sub.add_parser("xlsx-dump", help="volcar un XLSX como CSV")
+    p.add_argument("file")
+    p.add_argument("--sheet", default="0", help="índice o nombre de la hoja")
+    p.add_argument("--all", action="store_true", help="todas las hojas")
+    p.add_argument("--list", action="store_true", help="solo listar las hojas")
+    p.add_argument("-o", "--output")
+    p.set_defaults(func=cmd_xlsx_dump)
+
+    p = sub.add_parser("employees", help="empleados desde los .xls del reloj")
+    p.add_argument("folder", nargs="?", default=os.path.join(ARCHIVOS, "horarios"))
+    p.add_argument("-o", "--output", default="employees_import_initial.json")
+    p.add_argument("--workers", type=int, default=None)
+    p.set_defaults(func=cmd_employees)
+
+    p = sub.add_parser("docx-dump", help="texto de documentos .docx (archivos o carpetas)")
+    p.add_argument("inputs", nargs="*", default=[os.path.join(ARCHIVOS, "respuesta")])
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--no-cache", action="store_true")
+    p.set_defaults(func=cmd_docx_dump)
+
+    for name, (_, help_text) in DELEGATED.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+def main(argv):
+    # Delegated tools get their arguments verbatim (argparse would reject the
+    # options it doesn't know before REMAINDER kicks in)
+    if argv and argv[0] in DELEGATED:
+        import importlib
+        module = importlib.import_module(DELEGATED[argv[0]][0])
+        return module.main(argv[1:])
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
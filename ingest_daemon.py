@@ -0,0 +1,527 @@
+import os
+import sys
+import json
+import time
+import fnmatch
+import signal
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Watch-folder ingestion: new or changed exports dropped under ARCHIVOS/ are
+# routed to their parser and the result written under the output folder.
+#   python ingest_daemon.py                  # watch ARCHIVOS/ until Ctrl+C
+#   python ingest_daemon.py --once           # one pass and exit (cron / tarea programada)
+# Change detection goes through manifest.json: (size, mtime_ns) first, and the
+# sha256 only when the stamp moved, so a touched but identical file is not
+# re-parsed. An entry is only written after its job finished, and every output
+# goes through tmp + os.replace: killing the daemon at any point leaves the
+# previous outputs intact and the next start re-runs whatever was pending.
+# A file whose parser failed is recorded as "error" and retried when it changes.
+# Events come from inotify on Linux (ctypes, no extra package); elsewhere the
+# tree is re-scanned every --interval seconds (a stat per file).
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WATCH_DIR = os.path.join(BASE_DIR, "ARCHIVOS")
+STATE_DIR = os.path.join(BASE_DIR, ".cache", "ingest")
+OUT_DIR = os.path.join(BASE_DIR, "ingest_out")
+MANIFEST_VERSION = 1
+
+SETTLE_SECONDS = 2.0   # a file must keep the same stamp this long (copy finished)
+POLL_SECONDS = 10.0
+IGNORED = ("~$*", "*.tmp", ".*")
+
+# --- handlers: run in the worker processes, (path, out_dir) -> summary dict ---
+
+def _write_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+def _output(out_dir, route, path):
+    return os.path.join(out_dir, route, os.path.splitext(os.path.basename(path))[0] + ".json")
+
+def _branch_key(path):
+    name = os.path.basename(path).upper()
+    if "CHACRAS" in name:
+        return "CHACRAS"
+    if "PASEO" in name:
+        return "PASEO"
+    return None
+
+def _fold_cube(path, out_dir):
+    # Replaces the days this export brings in the monthly sales cubes
+    from sales_cube import SalesCube
+    cubes = SalesCube(os.path.join(out_dir, "cubos"))
+    cubes.fold(path, force=True)
+    return cubes.root
+
+def ingest_caja(path, out_dir):
+    # Rebuilds the .colcache, leaves daily totals per Nodo and folds the
+    # tickets into the sales cubes
+    from caja_loader import load_caja
+    from caja_aggregate import group_totals
+    from money import pesos
+    table = load_caja(path)
+    totals, _ = group_totals(table, ["dia", "Nodo"], "Imp. Neto")
+    rows = [{"dia": dia, "nodo": nodo, "total": pesos(total), "comprobantes": int(count)}
+            for (dia, nodo), (total, count) in sorted(totals.items())]
+    return {"rows": len(table), "outputs": [_write_json(rows, _output(out_dir, "caja", path)), _fold_cube(path, out_dir)]}
+
+def ingest_comisiones(path, out_dir):
+    from comisiones_store import ComisionesStore
+    store = ComisionesStore(os.path.join(out_dir, "comisiones"))
+    rows, skipped, months = store.add_csv(path, force=True)
+    return {"rows": rows, "skipped": skipped, "months": months, "outputs": [store.root, _fold_cube(path, out_dir)]}
+
+def ingest_stock(path, out_dir):
+    from stock_ledger import StockLedger
+    ledger = StockLedger(os.path.join(out_dir, "stock"))
+    rows, skipped, flagged = ledger.add_csv(path, force=True)
+    return {"rows": rows, "skipped": skipped, "flagged": flagged, "outputs": [ledger.root]}
+
+def ingest_suppliers(path, out_dir):
+    from supplier_debt import SupplierDebt
+    store = SupplierDebt(os.path.join(out_dir, "proveedores"))
+    rows, skipped, written = store.add_csv(path, force=True)
+    return {"rows": rows, "skipped": skipped, "partitions": len(written), "outputs": [store.root]}
+
+def ingest_cc_pending(path, out_dir):
+    from pdf_cache import PdfCache
+    from parse_cc_full import parse_cc_pdf
+    from branches import CC_BRANCHES
+    key = _branch_key(path)
+    records = parse_cc_pdf(path, CC_BRANCHES.get(key, key or "DESCONOCIDA"), cache=PdfCache())
+    return {"rows": len(records), "outputs": [_write_json(records, _output(out_dir, "cc", path))]}
+
+def ingest_cc_updated(path, out_dir):
+    from pdf_cache import PdfCache
+    from process_cc_pdfs import parse_zetti_pdf
+    from branches import ZETTI_BRANCHES
+    key = _branch_key(path)
+    records = parse_zetti_pdf(path, ZETTI_BRANCHES.get(key, key or "DESCONOCIDA"), PdfCache())
+    return {"rows": len(records), "outputs": [_write_json(records, _output(out_dir, "cc_actualizado", path))]}
+
+def ingest_horarios(path, out_dir):
+    # The employee list merges every .xls of the folder, so any change
+    # rebuilds the whole list
+    from extract_employees import extract_all
+    employees = sorted(extract_all(os.path.dirname(path), workers=1), key=lambda e: e["name"])
+    return {"rows": len(employees), "outputs": [_write_json(employees, os.path.join(out_dir, "employees.json"))]}
+
+def ingest_horario_delimitado(path, out_dir):
+    # Shifts (and lone punches) of every reloj CSV of the folder, one list
+    import numpy as np
+    from attendance_sales import load_punches, build_shifts
+    folder = os.path.dirname(path)
+    paths = [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if fnmatch.fnmatch(f.lower(), "*delimitado*.csv")]
+    punches = load_punches(paths)
+    names, person = np.unique(punches["name"], return_inverse=True)
+    shifts, open_punches = build_shifts(punches, person.astype(np.int64))
+    stamp = lambda minutes: str(np.datetime64(int(minutes), "m"))
+    data = {
+        "turnos": [{"persona": str(names[p]), "nodo": str(n), "entrada": stamp(a), "salida": stamp(b), "minutos": int(b - a), "flags": int(f)}
+                   for p, n, a, b, f in zip(shifts["person"], shifts["node"], shifts["start"], shifts["end"], shifts["flags"])],
+        "abiertas": [{"persona": str(names[p]), "nodo": str(n), "fichada": stamp(a)}
+                     for p, n, a in zip(open_punches["person"], open_punches["node"], open_punches["at"])],
+    }
+    return {"rows": len(punches["name"]), "shifts": len(data["turnos"]), "open": len(data["abiertas"]),
+            "outputs": [_write_json(data, os.path.join(out_dir, "turnos.json"))]}
+
+# First matching rule wins; patterns are matched on the lowercased name and
+# "folder" on the lowercased name of the parent directory. Routes without a
+# handler are recorded as "sin_parser" and picked up once one is added here.
+# "serial" routes write to shared outputs and never run two jobs at once;
+# serial set to a name instead of True puts routes in one group that runs one
+# job at a time among all of them (caja and comisiones both fold into
+# cubos/cubes.json). Routes with "folder" parse the whole folder, one job
+# covers all its files.
+ROUTES = [
+    {"route": "caja", "patterns": ["*comprobantes de caja*.csv", "facturacion*.csv"], "handler": ingest_caja, "serial": "cubos"},
+    {"route": "comisiones", "patterns": ["comisiones*.csv"], "handler": ingest_comisiones, "serial": "cubos"},
+    {"route": "stock", "patterns": ["movimiento stock*.csv", "stock dia*.csv"], "handler": ingest_stock, "serial": True},
+    {"route": "cc", "patterns": ["documentos pendientes*.pdf"], "handler": ingest_cc_pending},
+    {"route": "cc_actualizado", "patterns": ["documentos*actualizado*.pdf"], "handler": ingest_cc_updated},
+    {"route": "horarios", "folder": "horarios", "patterns": ["*.xls"], "handler": ingest_horarios, "serial": True},
+    {"route": "horario_delimitado", "folder": "horarios", "patterns": ["*delimitado*.csv"], "handler": ingest_horario_delimitado, "serial": True},
+    {"route": "proveedores", "patterns": ["proveedores*.csv", "gastos externos*.csv"], "handler": ingest_suppliers, "serial": True},
+]
+
+def serial_group(rule):
+    # -> name of the group of jobs that never run at the same time, None if free
+    serial = rule.get("serial")
+    if not serial:
+        return None
+    return serial if isinstance(serial, str) else rule["route"]
+
+def route_for(path):
+    name = os.path.basename(path).lower()
+    if any(fnmatch.fnmatch(name, p) for p in IGNORED):
+        return None
+    folder = os.path.basename(os.path.dirname(path)).lower()
+    for rule in ROUTES:
+        if rule.get("folder") and rule["folder"] != folder:
+            continue
+        if any(fnmatch.fnmatch(name, p) for p in rule["patterns"]):
+            return rule
+    return None
+
+# --- manifest ---
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+class Manifest:
+    # {relative path: {"size", "mtime_ns", "sha256", "route", "status", "result" | "error", "at"}}
+    # status: "ok" | "error" | "sin_parser"
+    def __init__(self, state_dir, watch_dir):
+        self.path = os.path.join(state_dir, "manifest.json")
+        self.watch_dir = watch_dir
+        os.makedirs(state_dir, exist_ok=True)
+        self.files = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.files = data["files"]
+
+    def key(self, path):
+        return os.path.relpath(path, self.watch_dir).replace(os.sep, "/")
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def unchanged(self, path, stamp, rule):
+        # Cheap test for rescans: same stamp as the last finished job
+        entry = self.files.get(self.key(path))
+        if entry is None or (entry["size"], entry["mtime_ns"]) != stamp:
+            return False
+        return not (entry["status"] == "sin_parser" and rule["handler"] is not None)
+
+    def check(self, path, rule):
+        # -> (needs a job, sha256 or None); refreshes the stamp of files whose
+        # content did not change
+        try:
+            size, mtime_ns = _stamp(path)
+        except OSError:
+            return False, None
+        entry = self.files.get(self.key(path))
+        pending = entry is not None and entry["status"] == "sin_parser" and rule["handler"] is not None
+        if entry and entry["size"] == size and entry["mtime_ns"] == mtime_ns and not pending:
+            return False, entry["sha256"]
+        digest = file_sha256(path)
+        if entry and entry["sha256"] == digest and not pending:
+            entry["size"], entry["mtime_ns"] = size, mtime_ns
+            self.save()
+            return False, digest
+        return True, digest
+
+    def record(self, path, rule, size, mtime_ns, digest, status, detail=None):
+        entry = {"size": size, "mtime_ns": mtime_ns, "sha256": digest, "route": rule["route"],
+                 "status": status, "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        if detail is not None:
+            entry["result" if status == "ok" else "error"] = detail
+        self.files[self.key(path)] = entry
+        self.save()
+
+# --- watchers ---
+
+class PollWatcher:
+    # No events: wait() asks for a full rescan (None) once per interval
+    def __init__(self, root, interval=POLL_SECONDS):
+        self.root = root
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def wait(self, timeout):
+        left = self.last + self.interval - time.monotonic()
+        if left > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(left, 0))
+        self.last = time.monotonic()
+        return None
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    # Linux inotify through libc, one watch per directory (it is not recursive)
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+        import struct
+        self.struct = struct
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs = {}
+        for folder, subdirs, _ in os.walk(root):
+            subdirs[:] = [d for d in subdirs if not d.startswith(".") and not d.endswith(".colcache")]
+            self._watch(folder)
+
+    def _watch(self, folder):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK)
+        if wd >= 0:
+            self.dirs[wd] = folder
+
+    def wait(self, timeout):
+        # -> set of touched file paths, or None when the queue overflowed
+        import select
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        touched = set()
+        if not ready:
+            return touched
+        data = os.read(self.fd, 64 * 1024)
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = self.struct.unpack_from("iIII", data, pos)
+            name = os.fsdecode(data[pos + 16:pos + 16 + length].rstrip(b"\0"))
+            pos += 16 + length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            folder = self.dirs.get(wd)
+            if folder is None or not name:
+                continue
+            path = os.path.join(folder, name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and not name.startswith("."):
+                    self._watch(path)
+                    touched.update(iter_files(path))
+                continue
+            touched.add(path)
+        return touched
+
+    def close(self):
+        os.close(self.fd)
+
+def make_watcher(root, interval, polling=False):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"inotify no disponible ({e}), se usa sondeo cada {interval:g}s")
+    return PollWatcher(root, interval)
+
+def iter_files(root):
+    for folder, subdirs, files in os.walk(root):
+        subdirs[:] = [d for d in subdirs if not d.startswith(".") and not d.endswith(".colcache")]
+        for name in files:
+            yield os.path.join(folder, name)
+
+# --- dispatcher ---
+
+def _worker_init():
+    # Ctrl+C goes to the dispatcher only; running jobs finish and get recorded
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+class Ingestor:
+    def __init__(self, watch_dir, out_dir, state_dir, workers=2, settle=SETTLE_SECONDS):
+        self.watch_dir = watch_dir
+        self.out_dir = out_dir
+        self.manifest = Manifest(state_dir, watch_dir)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init)
+        self.max_running = workers
+        self.settle = settle
+        self.candidates = {}   # path -> (stamp, first seen with that stamp)
+        self.queue = []        # (path, rule, stamp, sha256) ready to run
+        self.running = {}      # future -> [queued jobs it covers]
+        self.done = 0
+        self.failed = 0
+
+    def offer(self, paths):
+        now = time.monotonic()
+        for path in paths:
+            rule = route_for(path)
+            if rule is None or not os.path.isfile(path):
+                continue
+            try:
+                stamp = _stamp(path)
+            except OSError:
+                continue
+            if self.manifest.unchanged(path, stamp, rule):
+                continue
+            known = self.candidates.get(path)
+            if known is None or known[0] != stamp:
+                self.candidates[path] = (stamp, now)
+
+    def _settled(self, now):
+        # Files whose stamp did not move for `settle` seconds
+        for path, (stamp, since) in list(self.candidates.items()):
+            if now - since < self.settle:
+                continue
+            try:
+                current = _stamp(path)
+            except OSError:
+                del self.candidates[path]
+                continue
+            if current != stamp:
+                self.candidates[path] = (current, now)
+                continue
+            del self.candidates[path]
+            yield path, stamp
+
+    def _enqueue(self, now):
+        queued = {p for p, *_ in self.queue} | {job[0] for jobs in self.running.values() for job in jobs}
+        for path, stamp in self._settled(now):
+            rule = route_for(path)
+            needed, digest = self.manifest.check(path, rule)
+            if not needed:
+                continue
+            if rule["handler"] is None:
+                self.manifest.record(path, rule, *stamp, digest, "sin_parser")
+                print(f"[sin parser] {self.manifest.key(path)} ({rule['route']})")
+                continue
+            if path in queued:
+                # Changed again while queued or running: picked up on the next pass
+                self.candidates[path] = (stamp, now)
+                continue
+            self.queue.append((path, rule, stamp, digest))
+            queued.add(path)
+
+    def _submit(self):
+        # Bounded: never more futures than workers; serial groups one at a time.
+        # A "folder" route runs once for every queued file of the same folder.
+        busy = {serial_group(jobs[0][1]) for jobs in self.running.values()} - {None}
+        waiting = []
+        taken = set()
+        for i, job in enumerate(self.queue):
+            if i in taken:
+                continue
+            path, rule = job[0], job[1]
+            group = serial_group(rule)
+            if len(self.running) >= self.max_running or (group and group in busy):
+                waiting.append(job)
+                continue
+            jobs = [job]
+            if rule.get("folder"):
+                for j in range(i + 1, len(self.queue)):
+                    other = self.queue[j]
+                    if other[1] is rule and os.path.dirname(other[0]) == os.path.dirname(path):
+                        jobs.append(other)
+                        taken.add(j)
+            self.running[self.pool.submit(rule["handler"], path, self.out_dir)] = jobs
+            if group:
+                busy.add(group)
+            extra = f" (+{len(jobs) - 1})" if len(jobs) > 1 else ""
+            print(f"[{rule['route']}] {self.manifest.key(path)}{extra}")
+        self.queue = waiting
+
+    def _collect(self, timeout):
+        if not self.running:
+            return
+        finished, _ = wait(list(self.running), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in finished:
+            jobs = self.running.pop(future)
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            for path, rule, (size, mtime_ns), digest in jobs:
+                if error:
+                    self.manifest.record(path, rule, size, mtime_ns, digest, "error", error)
+                else:
+                    self.manifest.record(path, rule, size, mtime_ns, digest, "ok", result)
+            key = self.manifest.key(jobs[0][0])
+            if error:
+                self.failed += len(jobs)
+                print(f"  ERROR {key}: {error}")
+            else:
+                self.done += len(jobs)
+                print(f"  ok {key}: {result.get('rows', 0):,} filas")
+
+    def busy(self):
+        return bool(self.candidates or self.queue or self.running)
+
+    def step(self, timeout):
+        now = time.monotonic()
+        self._enqueue(now)
+        self._submit()
+        self._collect(timeout)
+
+    def run_once(self):
+        self.offer(iter_files(self.watch_dir))
+        for path in self.candidates:
+            self.candidates[path] = (self.candidates[path][0], time.monotonic() - self.settle)
+        while self.busy():
+            self.step(0.5)
+
+    def watch(self, watcher):
+        # Start-up pass covers whatever changed while the daemon was down
+        self.offer(iter_files(self.watch_dir))
+        while True:
+            if self.busy():
+                self.step(0.2)
+            touched = watcher.wait(0.2 if self.busy() else self.settle)
+            self.offer(iter_files(self.watch_dir) if touched is None else touched)
+
+    def close(self):
+        # Jobs already started finish and are recorded; queued ones wait for
+        # the next start
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.running = {f: jobs for f, jobs in self.running.items() if not f.cancelled()}
+        self._collect(0)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Ingesta automática de exportaciones (carpeta vigilada)")
+    parser.add_argument("folder", nargs="?", default=WATCH_DIR, help="carpeta a vigilar")
+    parser.add_argument("--out", default=OUT_DIR, help="carpeta de salidas")
+    parser.add_argument("--state", default=STATE_DIR, help="carpeta del manifest")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS, help="segundos sin cambios antes de procesar")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="segundos entre sondeos (sin inotify)")
+    parser.add_argument("--poll", action="store_true", help="forzar sondeo aunque haya inotify")
+    parser.add_argument("--once", action="store_true", help="una pasada y salir")
+    parser.add_argument("--status", action="store_true", help="mostrar el manifest y salir")
+    args = parser.parse_args(argv)
+
+    folder = os.path.abspath(args.folder)
+    if args.status:
+        manifest = Manifest(args.state, folder)
+        for key, entry in sorted(manifest.files.items()):
+            print(f"{entry['status']:<11}{entry['route']:<20}{entry['at']}  {key}")
+        return 0
+
+    ingestor = Ingestor(folder, os.path.abspath(args.out), args.state, max(1, args.workers), args.settle)
+    try:
+        if args.once:
+            ingestor.run_once()
+        else:
+            watcher = make_watcher(folder, args.interval, args.poll)
+            print(f"Vigilando {folder} ({type(watcher).__name__}), Ctrl+C para salir")
+            try:
+                ingestor.watch(watcher)
+            finally:
+                watcher.close()
+    except KeyboardInterrupt:
+        print("\nInterrumpido: lo pendiente se retoma en el próximo inicio")
+    finally:
+        ingestor.close()
+    print(f"Procesados {ingestor.done}, con error {ingestor.failed}")
+    return 1 if ingestor.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
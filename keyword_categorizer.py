@@ -0,0 +1,385 @@
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import hashlib
+import argparse
+import unicodedata
+from collections import deque, Counter
+import numpy as np
+
+# Keyword categorization of product names / code descriptions with one
+# Aho-Corasick automaton for every keyword of every category. The automaton is
+# compiled from a rule file into a dense transition table (states x symbols)
+# and run over a whole column at once: column j of the text matrix moves every
+# string one state forward, so each string is read exactly once no matter how
+# many categories or keywords there are. The compiled tables are cached in
+# .cache/categorias/<rules>-<hash>.npz and rebuilt only when the rules change.
+# Rule file (JSON):
+#   {"version": 1, "boundary": "word",
+#    "rules": [{"category": "panales", "priority": 10, "boundary": "prefix",
+#               "keywords": ["PAÑAL", "PAMPERS"], "alias": ["PAÑALES"]}, ...]}
+# Matching ignores case and accents (Ñ -> N). boundary: "word" = the keyword is
+# a whole word, "prefix" = the word starts with it (PAÑAL matches PAÑALES),
+# "suffix" = the word ends with it (MG matches 400MG), "none" = plain
+# substring (what categorize_codes.py always did). The boundary is only
+# checked on keyword ends that are letters/digits ("ALCOH." works).
+# When several keywords match, the highest priority wins, then the longest
+# match, then the rule listed first. alias: other spellings of the category in
+# exports (Rubro column), only used by --evaluar.
+#   python keyword_categorizer.py clasificar "ARCHIVOS/testers/rubros/*.csv" --evaluar
+#   python keyword_categorizer.py clasificar "ARCHIVOS/testers/COMISIONES*.CSV" --evaluar --esperado Rubro
+#   python keyword_categorizer.py probar "PAÑAL PAMPERS XG X30" "IBUPROFENO 400MG X10"
+
+RULES_VERSION = 1
+AUTOMATON_VERSION = 1
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULES = os.path.join(BASE_DIR, "categorias_rubros.json")
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "categorias")
+BOUNDARIES = ("word", "prefix", "suffix", "none")
+FOLD_LIMIT = 0x250   # Latin-1 + Latin Extended A/B; other code points are "no letter"
+CHUNK_ROWS = 8192
+MAX_RULES = 0xFFFF
+NO_CATEGORY = ""
+
+def _fold_table():
+    # code point -> upper case without accents (whitespace -> " ")
+    table = np.zeros(FOLD_LIMIT, dtype=np.int32)
+    for cp in range(1, FOLD_LIMIT):
+        ch = chr(cp)
+        if ch.isspace():
+            table[cp] = ord(" ")
+            continue
+        base = "".join(c for c in unicodedata.normalize("NFD", ch) if not unicodedata.combining(c)).upper()
+        table[cp] = ord(base) if len(base) == 1 and ord(base) < FOLD_LIMIT else cp
+    return table
+
+FOLD = _fold_table()
+IS_WORD = np.array([chr(c).isalnum() for c in FOLD], dtype=bool)
+IS_WORD[0] = False
+
+def fold(text):
+    # The same folding the automaton applies to the texts
+    out = []
+    for ch in text:
+        cp = ord(ch)
+        if cp >= FOLD_LIMIT:
+            raise ValueError(f"carácter no soportado en palabra clave: {ch!r} en {text!r}")
+        out.append(chr(FOLD[cp]))
+    return "".join(out)
+
+def _chars(strings, width):
+    # Fixed-width code point matrix, one row per string ("" pads with 0)
+    return np.asarray(strings, dtype=f"U{width}").view(np.uint32).reshape(len(strings), width)
+
+def load_rules(path):
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    if rules.get("version") != RULES_VERSION:
+        raise ValueError(f"{path}: versión de reglas {rules.get('version')!r} (se espera {RULES_VERSION})")
+    default = rules.get("boundary", "word")
+    if not rules.get("rules"):
+        raise ValueError(f"{path}: sin reglas")
+    if len(rules["rules"]) > MAX_RULES:
+        raise ValueError(f"{path}: más de {MAX_RULES} reglas")
+    for i, rule in enumerate(rules["rules"]):
+        if not rule.get("category") or not rule.get("keywords"):
+            raise ValueError(f"{path}: la regla {i} necesita category y keywords")
+        if rule.get("boundary", default) not in BOUNDARIES:
+            raise ValueError(f"{path}: regla {i}: boundary {rule['boundary']!r} (opciones: {', '.join(BOUNDARIES)})")
+        if not -0x8000 <= int(rule.get("priority", 0)) < 0x8000:
+            raise ValueError(f"{path}: regla {i}: priority fuera de rango")
+    return rules
+
+def compile_rules(rules):
+    # rules (load_rules) -> dict of arrays (what goes into the .npz)
+    categories = []
+    rule_category, rule_priority = [], []
+    keywords = []   # (folded keyword, rule, check start, check end)
+    default = rules.get("boundary", "word")
+    for r, rule in enumerate(rules["rules"]):
+        if rule["category"] not in categories:
+            categories.append(rule["category"])
+        rule_category.append(categories.index(rule["category"]))
+        rule_priority.append(int(rule.get("priority", 0)))
+        boundary = rule.get("boundary", default)
+        for keyword in rule["keywords"]:
+            text = fold(keyword.strip())
+            if not text:
+                continue
+            keywords.append((text, r, boundary in ("word", "prefix") and IS_WORD[ord(text[0])],
+                             boundary in ("word", "suffix") and IS_WORD[ord(text[-1])]))
+
+    # Trie
+    children = [{}]
+    outputs = [[]]
+    for p, (text, _, _, _) in enumerate(keywords):
+        state = 0
+        for ch in text:
+            nxt = children[state].get(ch)
+            if nxt is None:
+                nxt = len(children)
+                children[state][ch] = nxt
+                children.append({})
+                outputs.append([])
+            state = nxt
+        outputs[state].append(p)
+
+    # Symbols: 0 = any character that is in no keyword
+    alphabet = sorted({ch for text, _, _, _ in keywords for ch in text})
+    symbol = {ch: i + 1 for i, ch in enumerate(alphabet)}
+    char_index = np.zeros(FOLD_LIMIT, dtype=np.int32)
+    for cp in range(1, FOLD_LIMIT):
+        char_index[cp] = symbol.get(chr(FOLD[cp]), 0)
+
+    # Fail links in BFS order; every state's row starts as its fail state's
+    # row, so the table has a transition for every (state, symbol)
+    delta = np.zeros((len(children), len(alphabet) + 1), dtype=np.int32)
+    fail = np.zeros(len(children), dtype=np.int32)
+    queue = deque()
+    for ch, nxt in children[0].items():
+        delta[0, symbol[ch]] = nxt
+        queue.append(nxt)
+    while queue:
+        state = queue.popleft()
+        outputs[state] = outputs[state] + outputs[fail[state]]
+        if state:
+            delta[state] = delta[fail[state]]
+        for ch, nxt in children[state].items():
+            if state:
+                fail[nxt] = delta[fail[state], symbol[ch]]
+            delta[state, symbol[ch]] = nxt
+            queue.append(nxt)
+
+    counts = np.array([len(o) for o in outputs], dtype=np.int32)
+    return {
+        "delta": delta,
+        "out_start": np.concatenate([[0], np.cumsum(counts)]).astype(np.int32),
+        "out_flat": np.array([p for o in outputs for p in o], dtype=np.int32),
+        "keyword_length": np.array([len(k[0]) for k in keywords], dtype=np.int32),
+        "keyword_rule": np.array([k[1] for k in keywords], dtype=np.int32),
+        "check_start": np.array([k[2] for k in keywords], dtype=bool),
+        "check_end": np.array([k[3] for k in keywords], dtype=bool),
+        "rule_category": np.array(rule_category, dtype=np.int32),
+        "rule_priority": np.array(rule_priority, dtype=np.int64),
+        "char_index": char_index,
+        "categories": np.array(categories, dtype=str),
+    }
+
+def rules_hash(rules):
+    text = json.dumps([AUTOMATON_VERSION, rules], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+class Categorizer:
+    def __init__(self, arrays):
+        self.delta = arrays["delta"]
+        self.out_start = arrays["out_start"]
+        self.out_count = np.diff(self.out_start).astype(np.int32)
+        self.out_flat = arrays["out_flat"]
+        self.keyword_length = arrays["keyword_length"]
+        self.check_start = arrays["check_start"]
+        self.check_end = arrays["check_end"]
+        self.char_index = arrays["char_index"]
+        self.categories = [str(c) for c in arrays["categories"]]
+        self.rule_category = arrays["rule_category"]
+        # priority, then match length, then the earlier rule; unique per rule
+        rule = arrays["keyword_rule"].astype(np.int64)
+        self.score = (((arrays["rule_priority"][rule] + 0x8000) << 32)
+                      | (np.minimum(self.keyword_length, 0xFFFF).astype(np.int64) << 16) | (MAX_RULES - rule))
+        self.keyword_category = self.rule_category[rule]
+
+    @property
+    def states(self):
+        return self.delta.shape[0]
+
+    @classmethod
+    def load(cls, rules_path=DEFAULT_RULES, cache_dir=DEFAULT_CACHE_DIR, use_cache=True):
+        rules = load_rules(rules_path)
+        stem = os.path.splitext(os.path.basename(rules_path))[0]
+        cache_path = os.path.join(cache_dir, f"{stem}-{rules_hash(rules)}.npz")
+        if use_cache and os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                return cls({name: data[name] for name in data.files})
+        arrays = compile_rules(rules)
+        if use_cache:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = cache_path + ".tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, cache_path)
+        return cls(arrays)
+
+    def _scan(self, texts, hits):
+        # -> best score per text (-1 = no match), [text, category] bool matrix if hits
+        texts = np.asarray(texts, dtype=str).reshape(-1)
+        n = len(texts)
+        best = np.full(n, -1, dtype=np.int64)
+        matched = np.zeros((n, len(self.categories)), dtype=bool) if hits else None
+        if not n:
+            return best, matched
+        lengths = np.strings.str_len(texts)
+        # Similar lengths together: the matrix of each chunk is only as wide as its longest text
+        order = np.argsort(lengths, kind="stable")
+        for lo in range(0, n, CHUNK_ROWS):
+            rows = order[lo:lo + CHUNK_ROWS]
+            width = int(lengths[rows[-1]])
+            if not width:
+                continue
+            chars = _chars(texts[rows], width)
+            chars = np.where(chars < FOLD_LIMIT, chars, 0)
+            symbols = np.ascontiguousarray(self.char_index[chars].T)
+            # word[:, k + 1] is character k; the extra columns are the text edges
+            word = np.zeros((len(rows), width + 2), dtype=bool)
+            word[:, 1:-1] = IS_WORD[chars]
+            state = np.zeros(len(rows), dtype=np.int32)
+            for j in range(width):
+                state = self.delta[state, symbols[j]]
+                count = self.out_count[state]
+                found = np.flatnonzero(count)
+                if not len(found):
+                    continue
+                count = count[found]
+                row = np.repeat(found, count)
+                first = np.repeat(self.out_start[state[found]] - (np.cumsum(count) - count), count)
+                keyword = self.out_flat[first + np.arange(len(row))]
+                start = j + 1 - self.keyword_length[keyword]
+                ok = ~(self.check_start[keyword] & word[row, start]) & ~(self.check_end[keyword] & word[row, j + 2])
+                if not ok.any():
+                    continue
+                row, keyword = row[ok], keyword[ok]
+                np.maximum.at(best, rows[row], self.score[keyword])
+                if hits:
+                    matched[rows[row], self.keyword_category[keyword]] = True
+        return best, matched
+
+    def category_codes(self, texts):
+        # -> int array, index into self.categories (-1 = no keyword matched)
+        best, _ = self._scan(texts, False)
+        rule = MAX_RULES - (best & 0xFFFF)
+        return np.where(best >= 0, self.rule_category[rule], -1)
+
+    def classify(self, texts):
+        # -> str array with the winning category per text ("" = none)
+        labels = np.array(self.categories + [NO_CATEGORY], dtype=str)
+        return labels[self.category_codes(texts)]
+
+    def matches(self, texts):
+        # -> bool matrix [text, category]: every category with some keyword in the text
+        return self._scan(texts, True)[1]
+
+def read_texts(path, columns, encoding=None):
+    # CSV -> one string per row (the columns joined by " "), plus the header
+    encodings = [encoding] if encoding else ["utf-8-sig", "latin1"]
+    for enc in encodings:
+        try:
+            with open(path, "r", encoding=enc, newline="") as f:
+                sample = f.read(4096)
+                f.seek(0)
+                delimiter = ";" if sample.count(";") > sample.count(",") else ","
+                reader = csv.reader(f, delimiter=delimiter)
+                header = [h.strip() for h in next(reader, [])]
+                rows = [r for r in reader if r]
+            break
+        except UnicodeDecodeError:
+            if enc == encodings[-1]:
+                raise
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"{path}: no tiene las columnas {', '.join(missing)} ({', '.join(header)})")
+    idx = [header.index(c) for c in columns]
+    return [" ".join(r[i] if i < len(r) else "" for i in idx) for r in rows], header, rows
+
+def _label_key(label):
+    return "".join(ch for ch in fold(label) if IS_WORD[ord(ch)]) if label else ""
+
+def _aliases(rules):
+    # normalized label -> category (the category itself and its "alias" list)
+    aliases = {}
+    for rule in rules["rules"]:
+        for label in [rule["category"]] + rule.get("alias", []):
+            aliases.setdefault(_label_key(label), rule["category"])
+    return aliases
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Categorización por palabras clave (Aho-Corasick)")
+    parser.add_argument("--reglas", default=DEFAULT_RULES, help="archivo JSON de reglas")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("clasificar", help="categorizar una columna de CSVs")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--columna", nargs="+", default=["Producto"], help="columnas a categorizar (se unen con espacio)")
+    p.add_argument("--salida", metavar="CSV", help="escribir archivo, texto y categoría por fila")
+    p.add_argument("--evaluar", action="store_true", help="comparar con el rubro esperado")
+    p.add_argument("--esperado", metavar="COLUMNA", help="columna con el rubro esperado (por defecto el nombre del archivo)")
+    p = sub.add_parser("probar", help="categorizar textos sueltos")
+    p.add_argument("texts", nargs="+")
+    sub.add_parser("compilar", help="compilar las reglas y mostrar el tamaño del autómata")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    categorizer = Categorizer.load(args.reglas, args.cache_dir, not args.no_cache)
+    loaded = time.perf_counter() - started
+
+    if args.command == "compilar":
+        print(f"{args.reglas}: {len(categorizer.categories)} categorías, {len(categorizer.keyword_length)} palabras clave, "
+              f"{categorizer.states:,} estados x {categorizer.delta.shape[1]} símbolos ({loaded * 1000:.0f} ms)")
+        return
+
+    if args.command == "probar":
+        for text, category in zip(args.texts, categorizer.classify(args.texts).tolist()):
+            print(f"{category or '(sin categoría)'}\t{text}")
+        return
+
+    aliases = _aliases(load_rules(args.reglas)) if args.evaluar else {}
+    totals = Counter()
+    right = seen = 0
+    writer = out = None
+    if args.salida:
+        out = open(args.salida + ".tmp", "w", encoding="utf-8", newline="")
+        writer = csv.writer(out)
+        writer.writerow(["archivo", "texto", "categoria"])
+    for path in _expand(args.files):
+        texts, header, rows = read_texts(path, args.columna)
+        started = time.perf_counter()
+        labels = categorizer.classify(texts)
+        elapsed = time.perf_counter() - started
+        totals.update(labels.tolist())
+        line = f"{os.path.basename(path)}: {len(texts):,} filas, {int((labels != NO_CATEGORY).sum()):,} categorizadas ({elapsed * 1000:.0f} ms)"
+        if args.evaluar:
+            if args.esperado:
+                i = header.index(args.esperado)
+                expected = [aliases.get(_label_key(r[i] if i < len(r) else ""), r[i] if i < len(r) else "") for r in rows]
+            else:
+                stem = os.path.splitext(os.path.basename(path))[0]
+                expected = [aliases.get(_label_key(stem), stem)] * len(texts)
+            hits = int((labels == np.asarray(expected, dtype=str)).sum())
+            right += hits
+            seen += len(texts)
+            line += f", aciertos {hits:,} ({hits / max(len(texts), 1):.1%})"
+        print(line)
+        if writer:
+            name = os.path.basename(path)
+            writer.writerows([name, t, c] for t, c in zip(texts, labels.tolist()))
+    if out:
+        out.close()
+        os.replace(args.salida + ".tmp", args.salida)
+
+    print()
+    for category, count in sorted(totals.items(), key=lambda kv: -kv[1]):
+        print(f"{category or '(sin categoría)':<30} {count:>10,}")
+    if args.evaluar and seen:
+        print(f"\nAciertos: {right:,} de {seen:,} ({right / seen:.1%})")
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,99 @@
+import re
+import numpy as np
+
+# Argentine money strings -> int64 cents, a whole column at a time.
+#   "4708,44"  "-57.299,04"  "$ 1.070.747,55"  "$ 000,00"  "12"  "4708,4"
+# Accepted: optional "$" and spaces, optional leading "-", digits either plain
+# or grouped by "." in threes, optional "," with up to two decimals (some
+# COMISIONES rows end in a bare "12362997,"). Anything else ("1,234.56",
+# "12.5", "1.2345,00", "--5", ".123", "abc") raises ValueError with
+# the offending values: a format change in an export stops the import instead
+# of turning into wrong totals. Empty cells come back as MISSING.
+# Everything runs on numpy.strings ufuncs, no Python loop per value, and sums
+# of cents are exact (no float drift over a year of rows).
+
+MISSING = np.iinfo(np.int64).min
+MAX_DIGITS = 16   # integer part; keeps cents well inside int64
+
+# The same grammar for one value in plain Python (cents() on a single cell)
+_SCALAR = re.compile(r'(-?)([0-9]{1,3}(?:\.[0-9]{3})+|[0-9]+)(?:,([0-9]{0,2}))?')
+# Amounts inside a text line ("$ 1.234,56"), two decimals, never more than
+# MAX_DIGITS: everything this finds parse_cents / cents accept
+AMOUNT_PATTERN = r'(?<![0-9.])-?(?:[0-9]{1,3}(?:\.[0-9]{3}){1,4}|[0-9]{1,16}),[0-9]{2}(?![0-9])'
+
+def _grouped(whole):
+    # Thousands separators: counting from the right, every 4th char is "."
+    # and only those ("1.070.747" yes, "1070.747" / "1.07.0747" no)
+    width = max(int(np.strings.str_len(whole).max()), 1)
+    chars = _chars(whole, width)
+    lengths = np.strings.str_len(whole)[:, None]
+    from_right = lengths - 1 - np.arange(width)
+    inside = from_right >= 0
+    want_dot = inside & (from_right % 4 == 3)
+    leading_digit = (lengths[:, 0] - 1) % 4 != 3
+    return leading_digit & ~(inside & ((chars == ord(".")) != want_dot)).any(axis=1)
+
+def _chars(strings, width):
+    # Fixed-width code point matrix, one row per string ("" pads with 0)
+    return np.asarray(strings, dtype=f"U{width}").view(np.uint32).reshape(len(strings), width)
+
+def _digits_to_int(digits):
+    # Validated digit strings -> int64 from the code points (several times
+    # faster than astype(np.int64) on strings)
+    width = max(int(np.strings.str_len(digits).max()), 1)
+    values = _chars(digits, width).astype(np.int64) - ord("0")
+    power = np.strings.str_len(digits)[:, None] - 1 - np.arange(width)
+    return np.where(power >= 0, values * 10 ** np.maximum(power, 0), 0).sum(axis=1)
+
+def parse_cents(values, name="importe"):
+    # -> int64 array; "" -> MISSING. name only goes into the error message.
+    raw = np.asarray(values, dtype=str)
+    if raw.ndim != 1:
+        raw = raw.reshape(-1)
+    if not len(raw):
+        return np.zeros(0, dtype=np.int64)
+    s = np.strings.replace(np.strings.replace(raw, "$", ""), " ", "")
+    s = np.strings.strip(s)
+    empty = s == ""
+    negative = np.strings.startswith(s, "-")
+    s = np.where(negative, np.strings.slice(s, 1, None), s)
+    whole, sep, frac = np.strings.partition(s, ",")
+    digits = np.strings.replace(whole, ".", "")
+    frac_len = np.strings.str_len(frac)
+    ok = np.strings.isdigit(digits) & (np.strings.str_len(digits) <= MAX_DIGITS)
+    ok &= (frac_len == 0) | (np.strings.isdigit(frac) & (frac_len <= 2))
+    dotted = np.strings.find(whole, ".") >= 0
+    if dotted.any():
+        ok[dotted] &= _grouped(whole[dotted])
+
+    bad = ~ok & ~empty
+    if bad.any():
+        shown = ", ".join(repr(v) for v in np.unique(raw[bad])[:5].tolist())
+        raise ValueError(f"{int(bad.sum())} valores de {name} con formato inválido: {shown}")
+
+    digits = np.where(ok, digits, "0")
+    frac = _chars(np.where(ok, np.strings.ljust(frac, 2, "0"), "00"), 2).astype(np.int64) - ord("0")
+    cents = _digits_to_int(digits) * 100 + frac[:, 0] * 10 + frac[:, 1]
+    cents = np.where(negative, -cents, cents)
+    return np.where(empty, MISSING, cents)
+
+def cents(text, name="importe"):
+    # One value: int cents, None for an empty cell (ValueError if malformed).
+    # Same result as parse_cents without building arrays for a single string
+    s = (text or "").replace("$", "").replace(" ", "").strip()
+    if not s:
+        return None
+    m = _SCALAR.fullmatch(s)
+    if m is None or len(m.group(2).replace(".", "")) > MAX_DIGITS:
+        raise ValueError(f"1 valores de {name} con formato inválido: {text!r}")
+    sign, whole, frac = m.groups()
+    value = int(whole.replace(".", "")) * 100 + int((frac or "").ljust(2, "0"))
+    return -value if sign else value
+
+def pesos(cents_value):
+    # int cents -> float pesos; cents / 100 is the same double as float("1234.56")
+    return cents_value / 100
+
+def cents_from_float(value):
+    # Amounts that already come as floats (parsed records, JSON)
+    return int(round(value * 100))
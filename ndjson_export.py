@@ -0,0 +1,89 @@
+import os
+import json
+
+# Streaming export for the current-account importers.
+# Each branch goes to <prefix>.<KEY>.ndjson (one record per line, written as the
+# parser yields) with a <prefix>.<KEY>.manifest.json next to it. The
+# <prefix>.manifest.json index lists the branches in order; GLOBAL is simply
+# all branch files read one after the other, so no second copy is written.
+
+CHUNK_RECORDS = 1000
+
+class NdjsonBranchWriter:
+    def __init__(self, out_dir, prefix, key):
+        self.key = key
+        self.file_name = f"{prefix}.{key}.ndjson"
+        self.path = os.path.join(out_dir, self.file_name)
+        self.manifest_path = os.path.join(out_dir, f"{prefix}.{key}.manifest.json")
+        self.f = open(self.path + ".tmp", 'wb')
+        self.count = 0
+        self.offset = 0
+        self.debit = 0.0
+        self.credit = 0.0
+        self.entities = set()
+        # Byte offset every CHUNK_RECORDS records so readers can seek/slice
+        self.chunks = []
+
+    def write(self, rec):
+        if self.count % CHUNK_RECORDS == 0:
+            self.chunks.append({"offset": self.offset, "first_record": self.count})
+        line = (json.dumps(rec, ensure_ascii=False) + "\n").encode('utf-8')
+        self.f.write(line)
+        self.offset += len(line)
+        self.count += 1
+        self.debit += rec.get("debit") or 0.0
+        self.credit += rec.get("credit") or 0.0
+        if rec.get("entity"):
+            self.entities.add(rec["entity"])
+
+    def close(self):
+        self.f.close()
+        os.replace(self.path + ".tmp", self.path)
+        manifest = {
+            "key": self.key,
+            "file": self.file_name,
+            "records": self.count,
+            "bytes": self.offset,
+            "entities": len(self.entities),
+            "debit": round(self.debit, 2),
+            "credit": round(self.credit, 2),
+            "chunk_records": CHUNK_RECORDS,
+            "chunks": self.chunks
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        return manifest
+
+def export_ndjson(out_dir, prefix, branches):
+    # branches: [(key, iterable of records), ...] -> index dict (also written to disk)
+    manifests = []
+    for key, records in branches:
+        writer = NdjsonBranchWriter(out_dir, prefix, key)
+        try:
+            for rec in records:
+                writer.write(rec)
+        except BaseException:
+            writer.f.close()
+            os.remove(writer.path + ".tmp")
+            raise
+        manifests.append(writer.close())
+
+    index = {
+        "format": "ndjson",
+        "global": [m["file"] for m in manifests],
+        "records": sum(m["records"] for m in manifests),
+        "branches": manifests
+    }
+    with open(os.path.join(out_dir, f"{prefix}.manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index
+
+def read_ndjson(path, start_offset=0, limit=None):
+    # Reads one branch file lazily, optionally from a manifest chunk offset
+    with open(path, 'rb') as f:
+        f.seek(start_offset)
+        for n, line in enumerate(f):
+            if limit is not None and n >= limit:
+                break
+            if line.strip():
+                yield json.loads(line)
@@ -1,141 +1,292 @@
-import pdfplumber
 import os
+import sys
 import json
-import re
+from concurrent.futures import ProcessPoolExecutor
+from pdf_cache import PdfCache, file_key
+from ndjson_export import export_ndjson
+from pdf_backends import get_backend
+from money import cents, pesos
+from cc_line_rules import classify_line, scan_transaction, reference_text
+from pipeline_stats import NO_STATS, PipelineStats, stats_from_argv, profiled
 
-def parse_cc_pdf(file_path, branch_default):
+# Bump when parse_lines changes its output so cached files get re-parsed
+PARSER_VERSION = 2
+
+def page_lines(page, cache=None, backend=None, stats=NO_STATS):
+    # Word extraction is delegated to the backend (pdf_backends): PyMuPDF when
+    # installed, pdfplumber otherwise. Both give the same words.
+    backend = backend or get_backend()
+    with stats.stage("words"):
+        words = cache.page(page, backend.words_kind, backend.page_words) if cache else backend.page_words(page)
+    if not words: return []
+    stats.count("words", len(words))
+
+    # Reconstruct lines
+    with stats.stage("lines"):
+        words.sort(key=lambda w: (w['top'], w['x0']))
+        lines = []
+        current_line = [words[0]]
+        for w in words[1:]:
+            if abs(w['top'] - current_line[-1]['top']) < 3:
+                current_line.append(w)
+            else:
+                lines.append(current_line)
+                current_line = [w]
+        lines.append(current_line)
+        text_lines = [" ".join([w['text'] for w in line_words]).strip() for line_words in lines]
+    stats.count("lines", len(text_lines))
+    return text_lines
+
+def parse_lines(lines, branch_default, current_entity, records, offset=0, stats=NO_STATS):
+    # current_entity=None means "still inherited from the previous page"; the
+    # rows get entity/cuit None and are filled in when the chunks are merged.
+    # offset = records already emitted before this list (keeps ids global).
+    # stats: counts the hits of every line/status/reference rule.
+    for line_str in lines:
+        if not line_str: continue
+
+        kind, value, pos = classify_line(line_str)
+        if stats: stats.count(f"rule:{kind or 'sin_regla'}")
+
+        # Entity Detection
+        if kind == "entity_cuit":
+            name_part = line_str[:pos].strip()
+            if name_part:
+                current_entity = {"name": name_part, "cuit": value}
+            continue
+
+        # Name header without CUIT
+        if kind == "entity_name":
+            current_entity = {"name": line_str, "cuit": ""}
+            continue
+
+        # Transaction Row Detection
+        if kind == "transaction":
+            money_matches, status_rule, ref_rule = scan_transaction(line_str)
+
+            # Only the last amount (Importe Pend.) is used; every match of the
+            # money pattern converts cleanly, so just that one is parsed
+            final_amt = pesos(cents(money_matches[-1])) if money_matches else 0.0
+
+            status = status_rule["status"]
+            ref = reference_text(line_str, ref_rule) if ref_rule else ""
+
+            # RULE: TX (Transferencias) do NOT sum or subtract from totals
+            is_transfer = bool(ref_rule and ref_rule["transfer"])
+            if stats:
+                stats.count(f"status:{status}")
+                stats.count(f"ref:{ref_rule['code'] if ref_rule else 'ninguna'}")
+                stats.count("records")
+
+            debit = 0.0
+            credit = 0.0
+
+            if not is_transfer:
+                if status_rule["side"] == "credit":
+                    credit = final_amt
+                else:
+                    debit = final_amt
+
+            records.append({
+                "id": f"{ref}-{value}-{final_amt}-{status}-{offset + len(records)}",
+                "entity": current_entity["name"] if current_entity else None,
+                "cuit": current_entity["cuit"] if current_entity else None,
+                "date": value,
+                "type": "TRANSFERENCIA" if is_transfer else status,
+                "reference": ref or line_str[11:30].strip(),
+                "branch": branch_default,
+                "debit": debit,
+                "credit": credit,
+                "status": status,
+                "is_transfer": is_transfer,
+                "raw_line": line_str # For debugging
+            })
+
+    return current_entity
+
+def parse_cc_pdf(file_path, branch_default, workers=0, cache=None, backend="auto", stats=NO_STATS):
+    if workers and workers > 1:
+        return parse_cc_files([(file_path, branch_default)], workers, cache=cache, backend=backend, stats=stats)[0]
+    backend = get_backend(backend)
+    if cache:
+        return cache.file(file_path, records_kind(branch_default, backend),
+                          lambda: list(iter_cc_pdf(file_path, branch_default, cache, backend, stats)))
+    return list(iter_cc_pdf(file_path, branch_default, backend=backend, stats=stats))
+
+def records_kind(branch_default, backend):
+    return f"cc_full:{PARSER_VERSION}:{backend.name}:{branch_default}"
+
+def iter_cc_pdf(file_path, branch_default, cache=None, backend="auto", stats=NO_STATS):
+    # Yields records page by page; only one page is held in memory at a time
+    if isinstance(backend, str): backend = get_backend(backend)
+    count = 0
+    current_entity = {"name": "DESCONOCIDO", "cuit": ""}
+
+    for page in stats.timed_iter("page_load", backend.iter_pages(file_path)):
+        stats.count("pages")
+        lines = page_lines(page, cache, backend, stats)
+        page_records = []
+        with stats.stage("classify"):
+            current_entity = parse_lines(lines, branch_default, current_entity, page_records, count, stats)
+        count += len(page_records)
+        yield from page_records
+
+def _parse_page_range(file_path, branch_default, start, stop, cache_dir=None, backend="auto", with_stats=False):
+    # Worker: parse pages [start, stop) without knowing the entity that was
+    # open at the end of the previous chunk. -> (records, entity, stats report or None)
+    records = []
+    current_entity = None
+    backend = get_backend(backend)
+    cache = PdfCache(cache_dir) if cache_dir else None
+    stats = PipelineStats("chunk") if with_stats else NO_STATS
+    for page in stats.timed_iter("page_load", backend.iter_pages(file_path, start, stop)):
+        stats.count("pages")
+        lines = page_lines(page, cache, backend, stats)
+        with stats.stage("classify"):
+            current_entity = parse_lines(lines, branch_default, current_entity, records, stats=stats)
+    if cache: cache.close()
+    return records, current_entity, (stats.report() if with_stats else None)
+
+def _merge_chunks(chunks):
+    # Chunks arrive in page order. Carry the open entity across chunk borders
+    # and renumber the ids so the result is identical to the serial run.
     records = []
     current_entity = {"name": "DESCONOCIDO", "cuit": ""}
-    cuit_pattern = re.compile(r'\d{2}-\d{8}-\d{1}')
-    
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            words = page.extract_words(x_tolerance=3, y_tolerance=3)
-            if not words: continue
-            
-            # Reconstruct lines
-            words.sort(key=lambda w: (w['top'], w['x0']))
-            lines = []
-            if words:
-                current_line = [words[0]]
-                for w in words[1:]:
-                    if abs(w['top'] - current_line[-1]['top']) < 3:
-                        current_line.append(w)
-                    else:
-                        lines.append(current_line)
-                        current_line = [w]
-                lines.append(current_line)
-            
-            for line_words in lines:
-                line_str = " ".join([w['text'] for w in line_words]).strip()
-                if not line_str: continue
-
-                # Entity Detection
-                cuit_match = cuit_pattern.search(line_str)
-                if cuit_match:
-                    cuit_val = cuit_match.group()
-                    name_part = line_str.split(cuit_val)[0].strip()
-                    if name_part:
-                        current_entity = {"name": name_part, "cuit": cuit_val}
-                    continue
-                
-                # Check for Name header without CUIT
-                if (len(line_str) > 3 and line_str.isupper() and "," in line_str and not re.search(r'\d{2}/\d{2}', line_str)):
-                    current_entity = {"name": line_str, "cuit": ""}
-                    continue
-
-                # Transaction Row Detection
-                date_match = re.match(r'^(\d{2}/\d{2}/\d{4})', line_str)
-                if date_match:
-                    # Amounts Pattern
-                    money_matches = re.findall(r'(\d{1,3}(?:\.\d{3})*,\d{2})', line_str)
-                    
-                    amounts = []
-                    for am in money_matches:
-                        try:
-                            amounts.append(float(am.replace('.', '').replace(',', '.')))
-                        except: pass
-                    
-                    # Status logic
-                    status = "PENDIENTE"
-                    line_upper = line_str.upper()
-                    if "COBRADO PMENTE" in line_upper: status = "COBRADO PMENTE"
-                    elif "COBRADO" in line_upper: status = "COBRADO"
-                    elif "INGRESADO" in line_upper: status = "INGRESADO"
-                    
-                    final_amt = amounts[-1] if amounts else 0.0
-                    
-                    # Reference
-                    ref = ""
-                    if "FV" in line_upper: 
-                        try: ref = "FV " + line_str.split("FV ")[1].split(" ")[0]
-                        except: ref = "FV"
-                    elif "TX" in line_upper:
-                        try: ref = "TX " + line_str.split("TX ")[1].split(" ")[0]
-                        except: ref = "TX"
-                    elif "NC" in line_upper:
-                        try: ref = "NC " + line_str.split("NC ")[1].split(" ")[0]
-                        except: ref = "NC"
-                    
-                    # RULE: TX (Transferencias) do NOT sum or subtract from totals
-                    is_transfer = ref.startswith("TX")
-                    
-                    debit = 0.0
-                    credit = 0.0
-                    
-                    if not is_transfer:
-                        if "INGRESADO" in status:
-                            debit = final_amt
-                        elif "COBRADO" in status:
-                            credit = final_amt
-                        else:
-                            debit = final_amt
-                    
-                    records.append({
-                        "id": f"{ref}-{date_match.group()}-{final_amt}-{status}-{len(records)}",
-                        "entity": current_entity["name"],
-                        "cuit": current_entity["cuit"],
-                        "date": date_match.group(),
-                        "type": "TRANSFERENCIA" if is_transfer else status,
-                        "reference": ref or line_str[11:30].strip(),
-                        "branch": branch_default,
-                        "debit": debit,
-                        "credit": credit,
-                        "status": status,
-                        "is_transfer": is_transfer,
-                        "raw_line": line_str # For debugging
-                    })
-    
+    for chunk_records, chunk_entity in chunks:
+        for rec in chunk_records:
+            if rec["entity"] is None:
+                rec["entity"] = current_entity["name"]
+                rec["cuit"] = current_entity["cuit"]
+            rec["id"] = f"{rec['id'].rsplit('-', 1)[0]}-{len(records)}"
+            records.append(rec)
+        if chunk_entity is not None:
+            current_entity = chunk_entity
     return records
 
+def parse_cc_files(jobs, workers=None, pages_per_chunk=4, cache=None, backend="auto", stats=NO_STATS):
+    # jobs: [(file_path, branch_default), ...] -> one record list per job.
+    # All page ranges of all files share a single process pool; with a cache,
+    # unchanged files skip the pool and workers reuse cached page words.
+    workers = workers or os.cpu_count() or 1
+    backend = get_backend(backend)
+    results = [None] * len(jobs)
+    file_keys = [None] * len(jobs)
+    if cache:
+        for idx, (file_path, branch_default) in enumerate(jobs):
+            file_keys[idx] = file_key(file_path, records_kind(branch_default, backend))
+            results[idx] = cache.get(file_keys[idx])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for idx, (file_path, branch_default) in enumerate(jobs):
+            if results[idx] is not None: continue
+            page_count = backend.page_count(file_path)
+            futures = []
+            for start in range(0, page_count, pages_per_chunk):
+                stop = min(start + pages_per_chunk, page_count)
+                futures.append(pool.submit(_parse_page_range, file_path, branch_default, start, stop,
+                                           cache.cache_dir if cache else None, backend.name, bool(stats)))
+            pending.append((idx, futures))
+
+        for idx, futures in pending:
+            chunks = []
+            for f in futures:
+                chunk_records, chunk_entity, report = f.result()
+                if report: stats.merge(report)
+                chunks.append((chunk_records, chunk_entity))
+            with stats.stage("merge"):
+                results[idx] = _merge_chunks(chunks)
+            if cache: cache.put(file_keys[idx], results[idx])
+
+    return results
+
 if __name__ == "__main__":
     base_path = r"c:\programacion\informes\ARCHIVOS\CUENTAS CORRIENTES"
-    paseo_data = parse_cc_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf"), "FCIA BIOSALUD")
-    chacras_data = parse_cc_pdf(os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf"), "BIOSALUD CHACRAS PARK")
-    
-    all_combined = paseo_data + chacras_data
-    
-    # Validation against User Example: Rabino, Sol
-    rabino_recs = [r for r in all_combined if "RABINO" in r["entity"]]
-    print(f"\n--- VALIDACIÓN: RABINO, SOL ---")
-    total_debit = 0
-    for r in rabino_recs:
-        print(f"Fec: {r['date']} | Ref: {r['reference']} | Status: {r['status']} | Debit: {r['debit']} | Credit: {r['credit']}")
-        total_debit += r['debit']
-    print(f"TOTAL DEUDA RABINO (MATH): {total_debit} (Debe dar 142.505,76)")
-    
-    # Check TX logic
-    tx_samples = [r for r in all_combined if r["is_transfer"]][:2]
-    if tx_samples:
-        print(f"\n--- VALIDACIÓN: TRANSFERENCIAS (TX) ---")
-        for t in tx_samples:
-            print(f"Ref: {t['reference']} | Debit: {t['debit']} | Credit: {t['credit']} (Deben ser 0)")
-    
-    with open("current_accounts_import.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            "PASEO": paseo_data,
-            "CHACRAS": chacras_data,
-            "GLOBAL": all_combined
-        }, f, indent=2)
-    
-    print(f"\nDone. Saved JSON for imports.")
+    paseo_pdf = os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTE PASEO.pdf")
+    chacras_pdf = os.path.join(base_path, "DOCUMENTOS PENDIENTES CUENTAS CORRIENTES CHACRAS.pdf")
+
+    # Optional: --workers N splits pages of both PDFs across N processes
+    workers = 0
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+
+    # --backend pymupdf|pdfplumber (default: PyMuPDF if installed)
+    backend = "auto"
+    if "--backend" in sys.argv:
+        backend = sys.argv[sys.argv.index("--backend") + 1]
+
+    # --check-backends: parse both PDFs with each backend and compare records
+    if "--check-backends" in sys.argv:
+        ok = True
+        for pdf_path, branch in [(paseo_pdf, "FCIA BIOSALUD"), (chacras_pdf, "BIOSALUD CHACRAS PARK")]:
+            fast = parse_cc_pdf(pdf_path, branch, backend="pymupdf")
+            slow = parse_cc_pdf(pdf_path, branch, backend="pdfplumber")
+            diffs = [(a, b) for a, b in zip(fast, slow) if a != b]
+            same = not diffs and len(fast) == len(slow)
+            ok = ok and same
+            print(f"{os.path.basename(pdf_path)}: pymupdf {len(fast)} / pdfplumber {len(slow)} registros -> {'IGUALES' if same else 'DIFERENTES'}")
+            for a, b in diffs[:5]:
+                print(f"  pymupdf:    {a['raw_line']}\n  pdfplumber: {b['raw_line']}")
+        sys.exit(0 if ok else 1)
+
+    # Extracted pages and parsed files are cached in .cache/pdf unless --no-cache
+    cache = None if "--no-cache" in sys.argv else PdfCache()
+
+    # --stats report.json: time per stage (page_load, words, lines, classify,
+    # json_dump) and counters (pages, words, lines, records, hits per rule).
+    # --profile cpu|mem: cProfile / tracemalloc for this run.
+    stats, stats_path, profile_mode = stats_from_argv("parse_cc_full", sys.argv)
+    stats = stats or NO_STATS
+
+    with profiled(profile_mode, "parse_cc_full"):
+        # --ndjson: stream records to current_accounts_import.<BRANCH>.ndjson while
+        # parsing, plus one manifest per branch, instead of the big JSON below
+        if "--ndjson" in sys.argv:
+            with stats.stage("export"):
+                index = export_ndjson(".", "current_accounts_import", [
+                    ("PASEO", iter_cc_pdf(paseo_pdf, "FCIA BIOSALUD", cache, backend, stats)),
+                    ("CHACRAS", iter_cc_pdf(chacras_pdf, "BIOSALUD CHACRAS PARK", cache, backend, stats)),
+                ])
+            for b in index["branches"]:
+                print(f"{b['key']}: {b['records']} registros | Debe: {b['debit']:.2f} | Haber: {b['credit']:.2f} -> {b['file']}")
+        else:
+            if workers > 1:
+                paseo_data, chacras_data = parse_cc_files([(paseo_pdf, "FCIA BIOSALUD"), (chacras_pdf, "BIOSALUD CHACRAS PARK")], workers, cache=cache, backend=backend, stats=stats)
+            else:
+                paseo_data = parse_cc_pdf(paseo_pdf, "FCIA BIOSALUD", cache=cache, backend=backend, stats=stats)
+                chacras_data = parse_cc_pdf(chacras_pdf, "BIOSALUD CHACRAS PARK", cache=cache, backend=backend, stats=stats)
+
+            all_combined = paseo_data + chacras_data
+
+            # Validation against User Example: Rabino, Sol
+            rabino_recs = [r for r in all_combined if "RABINO" in r["entity"]]
+            print(f"\n--- VALIDACIÓN: RABINO, SOL ---")
+            total_debit = 0
+            for r in rabino_recs:
+                print(f"Fec: {r['date']} | Ref: {r['reference']} | Status: {r['status']} | Debit: {r['debit']} | Credit: {r['credit']}")
+                total_debit += r['debit']
+            print(f"TOTAL DEUDA RABINO (MATH): {total_debit} (Debe dar 142.505,76)")
+
+            # Check TX logic
+            tx_samples = [r for r in all_combined if r["is_transfer"]][:2]
+            if tx_samples:
+                print(f"\n--- VALIDACIÓN: TRANSFERENCIAS (TX) ---")
+                for t in tx_samples:
+                    print(f"Ref: {t['reference']} | Debit: {t['debit']} | Credit: {t['credit']} (Deben ser 0)")
+
+            with stats.stage("json_dump"):
+                with open("current_accounts_import.json", 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "PASEO": paseo_data,
+                        "CHACRAS": chacras_data,
+                        "GLOBAL": all_combined
+                    }, f, indent=2)
+
+            print(f"\nDone. Saved JSON for imports.")
+
+    if stats_path:
+        if cache:
+            stats.count("cache_hits", cache.hits)
+            stats.count("cache_misses", cache.misses)
+        stats.write(stats_path)
+        stats.print_summary()
@@ -0,0 +1,130 @@
+import itertools
+
+# PDF word extraction backends for the current-account parser.
+# Both return the same trimmed word dicts ({"text", "x0", "top"}) that
+# parse_cc_full.page_lines rebuilds into lines:
+#   pdfplumber - the original path (pdfminer layout, slow, kept as fallback)
+#   pymupdf    - reads the chars with fitz and groups them into words with the
+#                same rules pdfplumber's extract_words uses (x/y tolerance 3)
+
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+class PdfplumberBackend:
+    name = "pdfplumber"
+    words_kind = "words:plumber:x3y3"
+
+    def page_count(self, file_path):
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+
+    def iter_pages(self, file_path, start=0, stop=None):
+        import pdfplumber
+        pages = None if start == 0 and stop is None else list(range(start + 1, stop + 1))
+        with pdfplumber.open(file_path, pages=pages) as pdf:
+            for page in pdf.pages:
+                yield page
+                page.close()
+
+    def page_words(self, page):
+        words = page.extract_words(x_tolerance=X_TOLERANCE, y_tolerance=Y_TOLERANCE)
+        return [{"text": w['text'], "x0": w['x0'], "top": w['top']} for w in words]
+
+class PymupdfBackend:
+    name = "pymupdf"
+    words_kind = "words:pymupdf:x3y3"
+
+    def page_count(self, file_path):
+        import fitz
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+
+    def iter_pages(self, file_path, start=0, stop=None):
+        import fitz
+        with fitz.open(file_path) as doc:
+            for i in range(start, doc.page_count if stop is None else stop):
+                yield doc[i]
+
+    def page_chars(self, page):
+        # Chars in display (rotated) coordinates, with pdfminer's box: the top
+        # is baseline - size * (1 + descender), the x range is the glyph advance.
+        # The rotation is applied by hand, fitz.Point/Rect per char is too slow.
+        a, b, c, d, e, f = page.rotation_matrix
+        chars = []
+        for block in page.get_text("rawdict")["blocks"]:
+            for line in block.get("lines", []):
+                upright = line["dir"][1] == 0
+                for span in line["spans"]:
+                    rise = span["size"] * (1 + span["descender"])
+                    for ch in span["chars"]:
+                        ox, oy = ch["origin"]
+                        x0, y0, x1, y1 = ch["bbox"]
+                        xa = a * x0 + c * y0 + e
+                        xb = a * x1 + c * y1 + e
+                        chars.append({
+                            "text": ch["c"],
+                            "x0": xa if xa < xb else xb,
+                            "x1": xb if xa < xb else xa,
+                            "top": b * ox + d * oy + f - rise,
+                            "upright": upright,
+                        })
+        return chars
+
+    def page_words(self, page):
+        return chars_to_words(self.page_chars(page))
+
+def _cluster_by_top(chars, tolerance):
+    # Same clustering as pdfplumber.utils.cluster_objects(chars, "top", tol)
+    values = sorted(set(c["top"] for c in chars))
+    cluster_of = {}
+    idx = 0
+    last = values[0]
+    for v in values:
+        if v > last + tolerance:
+            idx += 1
+        cluster_of[v] = idx
+        last = v
+    ordered = sorted(chars, key=lambda c: cluster_of[c["top"]])
+    return [list(g) for _, g in itertools.groupby(ordered, key=lambda c: cluster_of[c["top"]])]
+
+def chars_to_words(chars, x_tolerance=X_TOLERANCE, y_tolerance=Y_TOLERANCE):
+    # Horizontal left-to-right text only, which is all Zetti prints
+    words = []
+    for _, group in itertools.groupby(chars, key=lambda c: c["upright"]):
+        group = list(group)
+        for line in _cluster_by_top(group, y_tolerance):
+            current = []
+            for c in sorted(line, key=lambda c: c["x0"]):
+                if c["text"].isspace():
+                    if current: words.append(current)
+                    current = []
+                elif current and (c["x0"] < current[-1]["x0"]
+                                  or c["x0"] > current[-1]["x1"] + x_tolerance
+                                  or abs(c["top"] - current[-1]["top"]) > y_tolerance):
+                    words.append(current)
+                    current = [c]
+                else:
+                    current.append(c)
+            if current: words.append(current)
+
+    return [{
+        "text": "".join(c["text"] for c in w),
+        "x0": min(c["x0"] for c in w),
+        "top": min(c["top"] for c in w),
+    } for w in words]
+
+BACKENDS = {
+    "pdfplumber": PdfplumberBackend,
+    "pymupdf": PymupdfBackend,
+}
+
+def get_backend(name="auto"):
+    # "auto": PyMuPDF when it is installed, pdfplumber otherwise
+    if name == "auto":
+        try:
+            import fitz
+            name = "pymupdf"
+        except ImportError:
+            name = "pdfplumber"
+    return BACKENDS[name]()
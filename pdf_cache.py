@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# Persistent cache for everything we pull out of the CUENTAS CORRIENTES PDFs.
+#   page:<sha256 of page content stream>:<kind>  -> words / text / tables of one page
+#   file:<sha256 of the whole file>:<kind>       -> parsed records of one file
+# An unchanged PDF is served from the file entry; an updated "actualizado.pdf"
+# only re-extracts the pages whose content stream changed.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "pdf")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def file_hash(file_path):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def file_key(file_path, kind):
+    return f"file:{file_hash(file_path)}:{kind}"
+
+def page_hash(page):
+    # Works for PyMuPDF pages (read_contents) and pdfplumber pages (pdfminer streams).
+    # Page size goes in too, the same stream on another mediabox lays out differently.
+    h = hashlib.sha256()
+    if hasattr(page, "read_contents"):
+        h.update(page.read_contents())
+        h.update(repr(tuple(page.rect)).encode())
+    else:
+        from pdfminer.pdftypes import resolve1
+        for stream in page.page_obj.contents:
+            h.update(resolve1(stream).get_data())
+        h.update(repr(tuple(page.page_obj.mediabox)).encode())
+    return h.hexdigest()
+
+class PdfCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(os.path.join(cache_dir, "cache.sqlite3"), timeout=30)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def get(self, key):
+        row = self.db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        blob = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, blob, len(blob), time.time())
+        )
+        self.db.commit()
+        self.evict()
+
+    def evict(self):
+        # Drop least recently used entries until we are back under the limit
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+        self.db.commit()
+
+    def page(self, page, kind, extract):
+        key = f"page:{page_hash(page)}:{kind}"
+        value = self.get(key)
+        if value is None:
+            value = extract(page)
+            self.put(key, value)
+        return value
+
+    def file(self, file_path, kind, parse):
+        key = file_key(file_path, kind)
+        value = self.get(key)
+        if value is None:
+            value = parse()
+            self.put(key, value)
+        return value
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import time
+from collections import Counter
+
+# Optional instrumentation for the import pipelines (parse_cc_full,
+# process_cc_pdfs, caja analysis). Functions take stats=NO_STATS by default,
+# whose stage()/count() do nothing, so the hot loops stay as they were.
+#   stats = PipelineStats("cc_full")
+#   with stats.stage("words"): ...
+#   stats.count("lines", len(lines))
+#   stats.write("report.json")
+# profiled("cpu" | "mem", prefix) wraps one run in cProfile or tracemalloc.
+
+class _Stage:
+    __slots__ = ("stats", "name", "t0")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timer = self.stats.timers.setdefault(self.name, [0.0, 0])
+        timer[0] += time.perf_counter() - self.t0
+        timer[1] += 1
+        return False
+
+class PipelineStats:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.timers = {}           # stage -> [seconds, calls]
+        self.counters = Counter()
+
+    def __bool__(self):
+        return True
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def timed_iter(self, name, iterable):
+        # Times every next() of an iterator (page loading inside a generator)
+        it = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def merge(self, report):
+        # Adds a report() coming from a worker process
+        for name, t in report["stages"].items():
+            timer = self.timers.setdefault(name, [0.0, 0])
+            timer[0] += t["seconds"]
+            timer[1] += t["calls"]
+        self.counters.update(report["counters"])
+
+    def report(self):
+        return {
+            "pipeline": self.name,
+            "wall_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": {name: {"seconds": round(sec, 4), "calls": calls} for name, (sec, calls) in self.timers.items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def write(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def print_summary(self, out=sys.stdout):
+        rep = self.report()
+        print(f"\n--- ETAPAS ({rep['pipeline']}, {rep['wall_seconds']:.2f}s) ---", file=out)
+        for name, t in sorted(rep["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+            print(f"  {name:<24}{t['seconds']:>9.3f}s  x{t['calls']}", file=out)
+        for name, n in rep["counters"].items():
+            print(f"  {name:<24}{n:>10,}", file=out)
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class _NullStats:
+    _stage = _NullStage()
+
+    def __bool__(self):
+        return False
+
+    def stage(self, name):
+        return self._stage
+
+    def count(self, name, n=1):
+        pass
+
+    def timed_iter(self, name, iterable):
+        return iterable
+
+    def merge(self, report):
+        pass
+
+NO_STATS = _NullStats()
+
+class profiled:
+    # mode "cpu": cProfile -> <prefix>.prof + top 25 by cumulative time
+    # mode "mem": tracemalloc -> peak and top 15 allocation sites
+    # mode None: does nothing
+    def __init__(self, mode, prefix="profile"):
+        self.mode = mode
+        self.prefix = prefix
+
+    def __enter__(self):
+        if self.mode == "cpu":
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.mode == "mem":
+            import tracemalloc
+            tracemalloc.start(25)
+        elif self.mode is not None:
+            raise ValueError(f"Modo de perfil desconocido: {self.mode} (cpu|mem)")
+        return self
+
+    def __exit__(self, *exc):
+        if self.mode == "cpu":
+            import pstats
+            self.profiler.disable()
+            self.profiler.dump_stats(self.prefix + ".prof")
+            pstats.Stats(self.profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+            print(f"Perfil CPU guardado en {self.prefix}.prof", file=sys.stderr)
+        elif self.mode == "mem":
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\n--- MEMORIA: pico {peak / 1048576:.1f} MB, al final {current / 1048576:.1f} MB ---", file=sys.stderr)
+            for stat in snapshot.statistics("lineno")[:15]:
+                print(f"  {stat}", file=sys.stderr)
+        return False
+
+def stats_from_argv(name, argv):
+    # Shared flags of the script entry points:
+    #   --stats report.json   per-stage timers and counters as JSON
+    #   --profile cpu|mem     cProfile / tracemalloc for this run
+    # -> (PipelineStats or None, report path or None, profile mode or None)
+    path = argv[argv.index("--stats") + 1] if "--stats" in argv else None
+    mode = argv[argv.index("--profile") + 1] if "--profile" in argv else None
+    return (PipelineStats(name) if path else None), path, mode
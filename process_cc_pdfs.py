@@ -3,148 +3,211 @@ import fitz
 import json
 import re
 import os
+import sys
+from pdf_cache import PdfCache
+from money import AMOUNT_PATTERN, cents, pesos
+from ndjson_export import export_ndjson
+from pipeline_stats import NO_STATS, stats_from_argv, profiled
 
-def parse_zetti_pdf(file_path, branch):
-    doc = fitz.open(file_path)
-    records = []
-    
-    date_pattern = re.compile(r'(\d{2}/\d{2}/\d{4})')
-    # Match strings like "$ 1.234,56" or "$ 0,00"
-    money_pattern = re.compile(r'\$\s*(-?\d+(?:\.\d{3})*(?:,\d{2}))')
-    
-    current_entity = "Desconocido"
-    current_cuit = ""
-    
-    for page in doc:
-        text = page.get_text("text")
-        lines = text.split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # 1. Detection of Entity and CUIT
-            # Usually format:
-            # NAME, SURNAME
-            # 20-XXXXXXXX-X
-            if "," in line and line.isupper() and i + 1 < len(lines):
-                next_line = lines[i+1].strip()
-                if re.match(r'\d{2}-\d{8}-\d{1}', next_line):
-                    current_entity = line
-                    current_cuit = next_line
-                    i += 2
-                    continue
-
-            # 2. Detection of Document block
-            # In Zetti detailed report, info is spread over several lines:
-            # Line 1: CUENTA CORRIENTE (Type)
-            # Line 2: INGRESADO / COBRADO (Status)
-            # Line 3: $ X.XXX,XX (Amount 1 - usually Total or Pending)
-            # Line 4: $ X.XXX,XX (Amount 2)
-            # Line 5: $ X.XXX,XX (Amount 3)
-            # Line 6: FV XXXX-XXXXXXXX / NAME (Reference)
-            # Line 7: DD/MM/YYYY (Issue Date)
-            # Line 8: DD/MM/YYYY (Due Date)
-            # Line 9: BRANCH
-            
-            if "CUENTA CORRIENTE" in line:
-                try:
-                    status_line = lines[i+1].strip()
-                    # Collect up to 3 money values
-                    amounts = []
-                    k = i + 2
-                    while len(amounts) < 3 and k < len(lines):
-                        m = money_pattern.search(lines[k])
-                        if m:
-                            val = m.group(1).replace('.', '').replace(',', '.')
-                            amounts.append(float(val))
-                        k += 1
-                    
-                    # Look for reference (contains / or FV/NC)
-                    ref = "S/N"
-                    while k < len(lines) and "/" not in lines[k]:
-                        k += 1
-                    if k < len(lines):
-                        ref = lines[k].split('/')[0].strip()
-                    
-                    # Look for dates
-                    dates = []
-                    while len(dates) < 2 and k < len(lines):
-                        d = date_pattern.search(lines[k])
-                        if d:
-                            dates.append(d.group(0))
-                        k += 1
-                    
-                    issue_date = dates[0] if len(dates) > 0 else "01/01/2026"
-                    
-                    # Zetti logic: 
-                    # If status is COBRADO -> Credit
-                    # If status is INGRESADO -> Debit
-                    # BUT if Reference has NC -> Credit
-                    
-                    debit = 0.0
-                    credit = 0.0
-                    is_nc = "NC" in ref or "CREDITO" in status_line.upper()
-                    
-                    # The "Importe Pend." is usually the 3rd amount or the highest non-zero
-                    # For simplicty, Zetti detailed layout usually shows Total in one of them.
-                    # We take the max non-zero value as the primary transaction value
-                    amount = max(amounts) if amounts else 0.0
-                    
-                    if is_nc or "COBRADO" in status_line.upper():
-                        credit = amount
-                    else:
-                        debit = amount
-
-                    records.append({
-                        "id": f"{ref}-{issue_date}-{amount}-{len(records)}",
-                        "entity": current_entity,
-                        "cuit": current_cuit,
-                        "date": issue_date,
-                        "type": "NC" if is_nc else status_line,
-                        "reference": ref,
-                        "branch": branch,
-                        "debit": debit,
-                        "credit": credit,
-                        "status": status_line,
-                        "raw_line": f"{ref} | {status_line} | {amount}"
-                    })
-                    i = k # jump to where we left
-                    continue
-                except Exception as e:
-                    pass
-            
-            i += 1
-            
-    doc.close()
-    return records
+# Bump when parse_zetti_pdf changes its output so cached files get re-parsed
+PARSER_VERSION = 3
+
+# Zetti detailed report ("documentos ... actualizado"): after the entity lines
+#   APELLIDO, NOMBRE
+#   20-XXXXXXXX-X
+# every document is a block of lines:
+#   CUENTA CORRIENTE                       <- starts the block
+#   INGRESADO / COBRADO                    status
+#   $ X.XXX,XX  x3                         Importe Total / Acum. / Pend.
+#   FV XXXX-XXXXXXXX / NAME                reference (first line with "/")
+#   DD/MM/YYYY  x2                         issue / due date
+#   BRANCH
+# The lines of all pages are read as one stream (page header and footer
+# dropped) by a small state machine, so a block cut by a page break goes on
+# where it left off and records are yielded as soon as they are complete.
+# A block interrupted by the next "CUENTA CORRIENTE", an entity "Total:" or
+# the end of the file is dropped: counted in stats as blocks_malformed and,
+# stats or not, reported on stderr when the file is done.
+
+DATE_PATTERN = re.compile(r'(\d{2}/\d{2}/\d{4})')
+# Match strings like "$ 1.234,56" or "$ 0,00" (money.py grammar, so every
+# match converts; "$ 1234.567,89" is not an amount line)
+MONEY_PATTERN = re.compile(r'\$\s*(' + AMOUNT_PATTERN + ')')
+CUIT_PATTERN = re.compile(r'\d{2}-\d{8}-\d{1}')
+BLOCK_START = "CUENTA CORRIENTE"
+ENTITY_TOTAL = "Total:"
+HEADER_END = "Nodo"        # last column title of the header repeated on every page
+HEADER_LINES = 30
+FOOTER = "Página "
+
+def parse_zetti_pdf(file_path, branch, cache=None, stats=NO_STATS, limit=None):
+    # -> list of records; whole files are cached, a limited sample never is
+    if cache and limit is None:
+        return cache.file(file_path, f"zetti:{PARSER_VERSION}:{branch}",
+                          lambda: list(iter_zetti_pdf(file_path, branch, cache, stats)))
+    return list(iter_zetti_pdf(file_path, branch, cache, stats, limit))
+
+def _body_lines(doc, cache=None, stats=NO_STATS):
+    # Stripped lines of every page without the page header / footer; only
+    # the text of the current page is held in memory
+    for page in stats.timed_iter("page_load", doc):
+        stats.count("pages")
+        with stats.stage("page_text"):
+            text = cache.page(page, "text:fitz", lambda p: p.get_text("text")) if cache else page.get_text("text")
+        lines = [line.strip() for line in text.split('\n')]
+        stats.count("lines", len(lines))
+        if HEADER_END in lines[:HEADER_LINES]:
+            lines = lines[lines.index(HEADER_END) + 1:]
+        for line in lines:
+            if line and not line.startswith(FOOTER):
+                yield line
+
+def _record(n, entity, cuit, branch, status_line, amounts, ref, dates):
+    issue_date = dates[0]
+
+    # Zetti logic:
+    # If status is COBRADO -> Credit
+    # If status is INGRESADO -> Debit
+    # BUT if Reference has NC -> Credit
+    debit = 0.0
+    credit = 0.0
+    is_nc = "NC" in ref or "CREDITO" in status_line.upper()
+
+    # The "Importe Pend." is usually the 3rd amount or the highest non-zero
+    # For simplicty, Zetti detailed layout usually shows Total in one of them.
+    # We take the max non-zero value as the primary transaction value
+    amount = pesos(max(cents(a) for a in amounts))
+
+    if is_nc or "COBRADO" in status_line.upper():
+        credit = amount
+    else:
+        debit = amount
+
+    return {
+        "id": f"{ref}-{issue_date}-{amount}-{n}",
+        "entity": entity,
+        "cuit": cuit,
+        "date": issue_date,
+        "type": "NC" if is_nc else status_line,
+        "reference": ref,
+        "branch": branch,
+        "debit": debit,
+        "credit": credit,
+        "status": status_line,
+        "raw_line": f"{ref} | {status_line} | {amount}"
+    }
+
+def iter_zetti_pdf(file_path, branch, cache=None, stats=NO_STATS, limit=None):
+    # Yields records in file order. limit: stop after that many records
+    # without reading the rest of the file
+    count = malformed = 0
+    entity, cuit = "Desconocido", ""
+    name = None       # "APELLIDO, NOMBRE" waiting for its CUIT line
+    step = None       # open block: "status" -> "amounts" -> "reference" -> "dates"
+
+    if limit is not None and limit <= 0:
+        return
+    with stats.stage("open"):
+        doc = fitz.open(file_path)
+    try:
+        for line in _body_lines(doc, cache, stats):
+            if step and (BLOCK_START in line or line == ENTITY_TOTAL):
+                stats.count("blocks_malformed")
+                malformed += 1
+                step = None
+
+            if step == "status":
+                status_line, amounts, step = line, [], "amounts"
+            elif step == "amounts":
+                m = MONEY_PATTERN.search(line)
+                if m:
+                    amounts.append(m.group(1))
+                    if len(amounts) == 3:
+                        step = "reference"
+            elif step == "reference" and "/" not in line:
+                continue
+            elif step:
+                if step == "reference":
+                    ref, dates, step = line.split('/')[0].strip(), [], "dates"
+                d = DATE_PATTERN.search(line)
+                if d:
+                    dates.append(d.group(0))
+                if len(dates) == 2:
+                    step = None
+                    yield _record(count, entity, cuit, branch, status_line, amounts, ref, dates)
+                    count += 1
+                    stats.count("records")
+                    if count == limit:
+                        return
+
+            elif name and CUIT_PATTERN.match(line):
+                entity, cuit, name = name, line, None
+                stats.count("entities")
+            elif BLOCK_START in line:
+                name, step = None, "status"
+            else:
+                name = line if "," in line and line.isupper() else None
+
+        if step:
+            stats.count("blocks_malformed")
+            malformed += 1
+    finally:
+        doc.close()
+        if malformed:
+            print(f"Aviso: {malformed} bloques incompletos descartados en {os.path.basename(file_path)}", file=sys.stderr)
 
 if __name__ == "__main__":
     paseo_pdf = r"c:\programacion\informes\ARCHIVOS\CUENTAS CORRIENTES\documentos paseo actualizado.pdf"
     chacras_pdf = r"c:\programacion\informes\ARCHIVOS\CUENTAS CORRIENTES\documentos chacras actualizado.pdf"
     
-    all_data = {}
-    if os.path.exists(paseo_pdf):
-        all_data["PASEO"] = parse_zetti_pdf(paseo_pdf, "FCIA BIOSALUD")
-    if os.path.exists(chacras_pdf):
-        all_data["CHACRAS"] = parse_zetti_pdf(chacras_pdf, "CHACRAS PARK")
-        
-    # Standard format the UI expects (either separate keys or GLOBAL)
-    # The previous good file had PASEO/CHACRAS keys, let's keep that.
-    # But for ManualImport compatibility, let's also add the GLOBAL key if needed.
-    
-    # Flatten for GLOBAL
-    flat = []
-    for k in all_data:
-        flat.extend(all_data[k])
-    
-    output = {
-        "PASEO": all_data.get("PASEO", []),
-        "CHACRAS": all_data.get("CHACRAS", []),
-        "GLOBAL": flat
-    }
-    
-    with open("current_accounts_updated.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
-        
-    print(f"Extraction complete. Total records: {len(flat)}")
+    cache = None if "--no-cache" in sys.argv else PdfCache()
+
+    # --stats report.json: time per stage and counters (pages, lines, entities,
+    # records, blocks_malformed); --profile cpu|mem for cProfile / tracemalloc
+    stats, stats_path, profile_mode = stats_from_argv("process_cc_pdfs", sys.argv)
+    stats = stats or NO_STATS
+
+    with profiled(profile_mode, "process_cc_pdfs"):
+        # --ndjson: one current_accounts_updated.<BRANCH>.ndjson + manifest per branch,
+        # each file written as soon as its PDF is parsed and without the GLOBAL copy
+        if "--ndjson" in sys.argv:
+            jobs = [("PASEO", paseo_pdf, "FCIA BIOSALUD"), ("CHACRAS", chacras_pdf, "CHACRAS PARK")]
+            with stats.stage("export"):
+                index = export_ndjson(".", "current_accounts_updated", (
+                    (key, parse_zetti_pdf(pdf, branch, cache, stats)) for key, pdf, branch in jobs if os.path.exists(pdf)
+                ))
+            print(f"Extraction complete. Total records: {index['records']}")
+        else:
+            all_data = {}
+            if os.path.exists(paseo_pdf):
+                all_data["PASEO"] = parse_zetti_pdf(paseo_pdf, "FCIA BIOSALUD", cache, stats)
+            if os.path.exists(chacras_pdf):
+                all_data["CHACRAS"] = parse_zetti_pdf(chacras_pdf, "CHACRAS PARK", cache, stats)
+
+            # Standard format the UI expects (either separate keys or GLOBAL)
+            # The previous good file had PASEO/CHACRAS keys, let's keep that.
+            # But for ManualImport compatibility, let's also add the GLOBAL key if needed.
+
+            # Flatten for GLOBAL
+            flat = []
+            for k in all_data:
+                flat.extend(all_data[k])
+
+            output = {
+                "PASEO": all_data.get("PASEO", []),
+                "CHACRAS": all_data.get("CHACRAS", []),
+                "GLOBAL": flat
+            }
+
+            with stats.stage("json_dump"):
+                with open("current_accounts_updated.json", "w", encoding="utf-8") as f:
+                    json.dump(output, f, indent=2, ensure_ascii=False)
+
+            print(f"Extraction complete. Total records: {len(flat)}")
+
+    if stats_path:
+        if cache:
+            stats.count("cache_hits", cache.hits)
+            stats.count("cache_misses", cache.misses)
+        stats.write(stats_path)
+        stats.print_summary()
@@ -1,26 +1,16 @@
-import docx
 import os
-import json
+from docx_text import docx_texts, docx_paths, open_cache
 
 def read_all_docx(directory):
     if not os.path.exists(directory):
         print(f"Directory not found: {directory}")
         return
         
-    files = [f for f in os.listdir(directory) if f.endswith('.docx') and not f.startswith('~$')]
     results = {}
-    
-    for filename in files:
-        file_path = os.path.join(directory, filename)
-        try:
-            doc = docx.Document(file_path)
-            full_text = []
-            for para in doc.paragraphs:
-                full_text.append(para.text)
-            results[filename] = "\n".join(full_text)
-        except Exception as e:
-            results[filename] = f"Error reading file: {str(e)}"
-            
+    for file_path, text, error in docx_texts(docx_paths([directory]), cache=open_cache()):
+        filename = os.path.basename(file_path)
+        results[filename] = text if error is None else f"Error reading file: {str(error)}"
+
     for filename, content in results.items():
         print(f"--- FILE: {filename} ---")
         print(content)
@@ -1,8 +1,10 @@
-import pandas as pd
+import csv
 import sys
+from xlsx_reader import iter_rows
 
 try:
-    df = pd.read_excel(r'e:\programacion\informes\ARCHIVOS\CODIGOS EXCEL.xlsx')
-    print(df.to_csv(index=False))
+    writer = csv.writer(sys.stdout, lineterminator='\n')
+    for row in iter_rows(r'e:\programacion\informes\ARCHIVOS\CODIGOS EXCEL.xlsx'):
+        writer.writerow(row)
 except Exception as e:
     print(f"Error: {e}")
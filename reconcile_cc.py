@@ -0,0 +1,247 @@
+import os
+import sys
+import csv
+import json
+import argparse
+from collections import defaultdict, deque
+from money import cents, cents_from_float
+from branches import canonical_branch
+from cc_line_rules import STATUS_RULES, DEFAULT_STATUS, REFERENCE_RULES, AMOUNTS
+
+# Reconciliation of the Zetti current-account CSV ("cuenta corrientes.CSV":
+# Entidad, Codificacion, Monto, FechaEmision, Estado, ...) against the records
+# parsed from the PDFs (parse_cc_pdf / parse_zetti_pdf / NDJSON export).
+# Hash join on (branch, reference, date, amount in cents):
+#   1. the CSV is read once into a multimap by full key and one by (ref, date)
+#   2. PDF records are streamed once and probe the full key -> matched
+#   3. PDF leftovers probe (ref, date)   -> amount mismatch, else missing in CSV
+#   4. CSV leftovers                    -> missing in PDF
+# Branches go through branches.canonical_branch (each export spells them
+# differently). CSV documents of branches no PDF source provided are left out
+# of "missing in PDF" and of the balances (only the PASEO PDF -> only PASEO).
+# Entities are keyed by CUIT; the CSV has no CUIT column, so its names are
+# looked up in the CUIT-by-name index built from the PDF side, and a name
+# that never appears there stays keyed by the name itself.
+#   python reconcile_cc.py --csv "ARCHIVOS/cuenta corrientes.CSV" --pdf PASEO.pdf "FCIA BIOSALUD"
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ARCHIVOS", "cuenta corrientes.CSV")
+TRANSFER_CODES = {r["code"] for r in REFERENCE_RULES if r["transfer"]}
+STATUS_SIDES = {r["status"]: r["side"] for r in STATUS_RULES + [DEFAULT_STATUS]}
+
+def normalize_reference(ref):
+    return " ".join((ref or "").upper().split())
+
+def normalize_name(name):
+    return " ".join((name or "").upper().replace(",", " ").split())
+
+def amount_key(cents):
+    # The CSV books credit notes as negative amounts, the PDFs as positive credits
+    return abs(cents) if cents is not None else None
+
+def is_transfer(reference):
+    return reference.split(" ", 1)[0] in TRANSFER_CODES
+
+def iter_csv_documents(csv_path, encoding='latin1'):
+    # One dict per document row; "Entidad" is only filled on the first row of
+    # each entity, and the extra TipoOperacion-only lines carry no document
+    with open(csv_path, 'r', encoding=encoding, newline='') as f:
+        entity = ""
+        for row in csv.DictReader(f):
+            if row.get("Entidad"):
+                entity = row["Entidad"].strip()
+            if not row.get("Codificacion"):
+                continue
+            yield {
+                "entity": entity,
+                "reference": normalize_reference(row["Codificacion"]),
+                "date": (row.get("FechaEmision") or "").strip(),
+                "amount": cents(row.get("Monto")),
+                "status": (row.get("Estado") or "").strip().upper(),
+                "branch": canonical_branch(row.get("Nodo")),
+            }
+
+def pdf_amount(rec):
+    # debit/credit in cents; transfers carry 0/0 in the records, so their
+    # amount comes from the last money value of the raw line
+    amount = rec.get("debit") or rec.get("credit") or 0.0
+    if not amount and rec.get("is_transfer"):
+        found = AMOUNTS.findall(rec.get("raw_line", ""))
+        if found:
+            return cents(found[-1])
+    return cents_from_float(amount)
+
+class Reconciliation:
+    def __init__(self):
+        self.csv_docs = []
+        self.csv_used = []
+        self.by_key = defaultdict(deque)       # (branch, ref, date, cents) -> csv indexes
+        self.by_ref_date = defaultdict(deque)  # (branch, ref, date) -> csv indexes
+        self.pdf_branches = set()
+        self.cuit_by_name = {}
+        self.pdf_pending = []
+        self.matched = []
+        self.amount_mismatch = []
+        self.missing_in_csv = []
+        self.missing_in_pdf = []
+        self.status_differs = 0
+
+    def load_csv(self, docs):
+        for doc in docs:
+            idx = len(self.csv_docs)
+            self.csv_docs.append(doc)
+            self.csv_used.append(False)
+            self.by_key[(doc["branch"], doc["reference"], doc["date"], amount_key(doc["amount"]))].append(idx)
+            self.by_ref_date[(doc["branch"], doc["reference"], doc["date"])].append(idx)
+
+    def _take(self, index, key):
+        # First CSV row under key that no PDF record has claimed yet
+        rows = index.get(key)
+        while rows:
+            idx = rows.popleft()
+            if not self.csv_used[idx]:
+                self.csv_used[idx] = True
+                return idx
+        return None
+
+    def probe(self, records):
+        for rec in records:
+            if rec.get("cuit"):
+                self.cuit_by_name.setdefault(normalize_name(rec.get("entity")), rec["cuit"])
+            pdf = {
+                "entity": rec.get("entity"),
+                "cuit": rec.get("cuit") or None,
+                "reference": normalize_reference(rec.get("reference")),
+                "date": rec.get("date"),
+                "amount": pdf_amount(rec),
+                "debit": cents_from_float(rec.get("debit") or 0.0),
+                "credit": cents_from_float(rec.get("credit") or 0.0),
+                "status": (rec.get("status") or "").upper(),
+                "branch": canonical_branch(rec.get("branch")),
+                "id": rec.get("id"),
+            }
+            self.pdf_branches.add(pdf["branch"])
+            idx = self._take(self.by_key, (pdf["branch"], pdf["reference"], pdf["date"], amount_key(pdf["amount"])))
+            if idx is None:
+                self.pdf_pending.append(pdf)
+                continue
+            if self.csv_docs[idx]["status"] != pdf["status"]:
+                self.status_differs += 1
+            self.matched.append((self.csv_docs[idx], pdf))
+
+    def finish(self):
+        for pdf in self.pdf_pending:
+            idx = self._take(self.by_ref_date, (pdf["branch"], pdf["reference"], pdf["date"]))
+            if idx is None:
+                self.missing_in_csv.append(pdf)
+            else:
+                self.amount_mismatch.append((self.csv_docs[idx], pdf))
+        self.pdf_pending = []
+        self.missing_in_pdf = [doc for doc, used in zip(self.csv_docs, self.csv_used)
+                               if not used and doc["branch"] in self.pdf_branches]
+
+    def csv_in_scope(self):
+        # CSV documents of the branches the PDF side provided
+        return [doc for doc in self.csv_docs if doc["branch"] in self.pdf_branches]
+
+    def entity_key(self, entity, cuit=None):
+        if cuit:
+            return cuit
+        name = normalize_name(entity)
+        return self.cuit_by_name.get(name) or f"NOMBRE:{name}"
+
+    def balances(self, pdf_records_seen):
+        # {entity key: {"entity", "csv_debit", "csv_credit", "pdf_debit", "pdf_credit", "diff"}}
+        # in cents; transfers are informative only and statuses outside the
+        # status rules (IGNORADO, TEMPORAL, ...) are not booked
+        result = {}
+
+        def slot(key, name):
+            return result.setdefault(key, {"entity": name, "csv_debit": 0, "csv_credit": 0,
+                                           "pdf_debit": 0, "pdf_credit": 0, "unbooked": 0})
+
+        for doc in self.csv_in_scope():
+            acc = slot(self.entity_key(doc["entity"]), doc["entity"])
+            side = STATUS_SIDES.get(doc["status"])
+            if side is None or is_transfer(doc["reference"]) or doc["amount"] is None:
+                acc["unbooked"] += 1
+                continue
+            acc["csv_" + side] += doc["amount"]
+        for pdf in pdf_records_seen:
+            acc = slot(self.entity_key(pdf["entity"], pdf["cuit"]), pdf["entity"])
+            acc["pdf_debit"] += pdf["debit"]
+            acc["pdf_credit"] += pdf["credit"]
+        for acc in result.values():
+            acc["diff"] = (acc["csv_debit"] - acc["csv_credit"]) - (acc["pdf_debit"] - acc["pdf_credit"])
+        return result
+
+    def pdf_records(self):
+        return [pdf for _, pdf in self.matched] + [pdf for _, pdf in self.amount_mismatch] + self.missing_in_csv
+
+def _pdf_sources(args):
+    # Generators over every PDF-side source; heavy imports only when needed
+    if args.pdf:
+        from parse_cc_full import iter_cc_pdf
+        for path, branch in args.pdf:
+            yield from iter_cc_pdf(path, branch)
+    if args.zetti:
+        from process_cc_pdfs import iter_zetti_pdf
+        for path, branch in args.zetti:
+            yield from iter_zetti_pdf(path, branch)
+    if args.ndjson:
+        from ndjson_export import read_ndjson
+        for path in args.ndjson:
+            yield from read_ndjson(path)
+
+def _money(cents):
+    return f"${cents / 100:,.2f}"
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Conciliación cuenta corriente CSV vs PDF")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--pdf", nargs=2, action="append", metavar=("PDF", "SUCURSAL"), help="Documentos Pendientes (parse_cc_full)")
+    parser.add_argument("--zetti", nargs=2, action="append", metavar=("PDF", "SUCURSAL"), help="reporte detallado (process_cc_pdfs)")
+    parser.add_argument("--ndjson", nargs="+", help="exportaciones .ndjson ya parseadas")
+    parser.add_argument("--out", default="reconciliation.json")
+    parser.add_argument("--top", type=int, default=10, help="entidades con diferencia a listar")
+    args = parser.parse_args(argv)
+    if not (args.pdf or args.zetti or args.ndjson):
+        parser.error("falta al menos una fuente PDF (--pdf, --zetti o --ndjson)")
+
+    rec = Reconciliation()
+    rec.load_csv(iter_csv_documents(args.csv))
+    rec.probe(_pdf_sources(args))
+    rec.finish()
+    balances = rec.balances(rec.pdf_records())
+
+    print(f"\n=== CONCILIACIÓN {os.path.basename(args.csv)} ===")
+    in_scope = len(rec.csv_in_scope())
+    print(f"CSV: {in_scope:,} documentos de {', '.join(sorted(rec.pdf_branches))} | PDF: {len(rec.pdf_records()):,} registros")
+    if in_scope < len(rec.csv_docs):
+        print(f"  ({len(rec.csv_docs) - in_scope:,} documentos del CSV de otras sucursales, fuera de la conciliación)")
+    print(f"  Coinciden:            {len(rec.matched):,} ({rec.status_differs:,} con otro estado)")
+    print(f"  Importe distinto:     {len(rec.amount_mismatch):,}")
+    print(f"  Faltan en el PDF:     {len(rec.missing_in_pdf):,}")
+    print(f"  Faltan en el CSV:     {len(rec.missing_in_csv):,}")
+
+    for doc, pdf in rec.amount_mismatch[:args.top]:
+        print(f"    {doc['reference']} {doc['date']}: CSV {_money(doc['amount'] or 0)} / PDF {_money(pdf['amount'])}")
+
+    differing = sorted((b for b in balances.values() if b["diff"]), key=lambda b: -abs(b["diff"]))
+    print(f"\nEntidades con saldo distinto: {len(differing):,} de {len(balances):,}")
+    for b in differing[:args.top]:
+        print(f"  {b['entity']}: CSV {_money(b['csv_debit'] - b['csv_credit'])} | PDF {_money(b['pdf_debit'] - b['pdf_credit'])} | Dif {_money(b['diff'])}")
+
+    tmp = args.out + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({
+            "matched": [{"csv": doc, "pdf": pdf} for doc, pdf in rec.matched],
+            "amount_mismatch": [{"csv": doc, "pdf": pdf} for doc, pdf in rec.amount_mismatch],
+            "missing_in_pdf": rec.missing_in_pdf,
+            "missing_in_csv": rec.missing_in_csv,
+            "balances": balances,
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, args.out)
+    print(f"\nDetalle en {args.out} (importes en centavos)")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
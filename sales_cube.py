@@ -0,0 +1,307 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+import numpy as np
+from money import parse_cents, MISSING, pesos
+
+# Pre-aggregated sales cubes for the heatmap / live dashboards.
+# One dense int64 array per source ("caja" tickets, "comisiones" lines) and month:
+#   [nodo, dia (1-31), hora, vendedor, pago, medida]   medida: importe (cents), cantidad
+# Labels of nodo / vendedor / pago live in cubes.json and only grow, so a code
+# means the same in every month (arrays saved before a new label are padded
+# with zeros when loaded). Folding an export replaces the (nodo, dia) slices
+# it contains and adds its rows with a single bincount: a daily export
+# ("facturacion dia 9.CSV", "comisiones dia 9.CSV") costs a few ms and a
+# re-exported day never counts twice. dia_semana is a roll-up of the days.
+#   python sales_cube.py fold "ARCHIVOS/testers/facturacion dia 9.CSV" "ARCHIVOS/testers/comisiones dia 9.CSV"
+#   python sales_cube.py heatmap --fuente caja --mes 2026-01 --nodo "FCIA BIOSALUD"
+#   python sales_cube.py query --fuente comisiones --mes 2026-01 --by vendedor dia_semana
+
+CUBE_VERSION = 1
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "cubos")
+SOURCES = ("caja", "comisiones")
+LABEL_DIMENSIONS = ("nodo", "vendedor", "pago")
+DIMENSIONS = ("nodo", "dia", "hora", "vendedor", "pago")
+MEASURES = ("importe", "cantidad")
+DAYS, HOURS = 31, 24
+WEEKDAYS = ["LUN", "MAR", "MIE", "JUE", "VIE", "SAB", "DOM"]
+NO_PAYMENT = "-"
+
+def _strip(values):
+    return np.strings.strip(np.asarray(values, dtype=str))
+
+def payment_types(table):
+    # Caja ticket -> how it was paid: the card / wallet of "Tarjeta" when there
+    # is one, else the first non-zero of cuenta corriente, efectivo, obra social
+    def nonzero(name):
+        values = np.asarray(table[name]) if name in table.columns else np.zeros(len(table), dtype=np.int64)
+        return (values != 0) & (values != MISSING)
+    cards = np.asarray(table.dictionaries["Tarjeta"] + [""], dtype=str)[np.asarray(table["Tarjeta"])]
+    return np.select([cards != "", nonzero("Imp. Cta Cte"), nonzero("Imp. Billete"), nonzero("Imp. Cobertura")],
+                     [cards, "CTA CTE", "EFECTIVO", "OBRA SOCIAL"], "OTRO")
+
+def read_caja(path):
+    # -> {"nodo", "vendedor", "pago": str arrays, "minuto": datetime64[m], "importe": int64 cents}
+    from caja_loader import load_caja
+    table = load_caja(path)
+    label = lambda name: _strip(np.asarray(table.dictionaries[name] + [""], dtype=str)[np.asarray(table[name])])
+    keep = ~np.isnat(np.asarray(table["Fecha y Hora"]))
+    if "Anulado" in table.dictionaries:
+        keep &= np.asarray(table["Anulado"]) != table.code_of("Anulado", "Si")
+    amounts = np.asarray(table["Imp. Neto"], dtype=np.int64)
+    return {"nodo": label("Nodo")[keep], "vendedor": label("Vendedor")[keep], "pago": payment_types(table)[keep],
+            "minuto": np.asarray(table["Fecha y Hora"])[keep], "importe": np.where(amounts == MISSING, 0, amounts)[keep]}
+
+def read_comisiones(path, encoding='latin1'):
+    # Same columns from a COMISIONES export; one row per product line, no payment type
+    from comisiones_store import parse_ticket_dates
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        rows = [r for r in reader if r]
+    width = len(header)
+    raw = dict(zip(header, zip(*[r + [""] * (width - len(r)) for r in rows]))) if rows else {h: () for h in header}
+    stamps = parse_ticket_dates(raw["Fecha Ticket"])
+    keep = ~np.isnat(stamps)
+    amounts = parse_cents(raw["$"], "$") if rows else np.zeros(0, dtype=np.int64)
+    return {"nodo": _strip(raw["Nodo_venta"])[keep], "vendedor": _strip(raw["Usuario"])[keep],
+            "pago": np.full(int(keep.sum()), NO_PAYMENT), "minuto": stamps[keep],
+            "importe": np.where(amounts == MISSING, 0, amounts)[keep]}
+
+def source_of(path, encoding='latin1'):
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        header = [h.strip() for h in next(csv.reader(f), [])]
+    if "Fecha y Hora" in header and "Imp. Neto" in header:
+        return "caja"
+    if "Fecha Ticket" in header and "$" in header:
+        return "comisiones"
+    return None
+
+READERS = {"caja": read_caja, "comisiones": read_comisiones}
+
+class SalesCube:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.meta_path = os.path.join(root, "cubes.json")
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get("version") != CUBE_VERSION:
+                raise ValueError(f"Version de cubos no soportada en {root}: {self.meta.get('version')}")
+        else:
+            self.meta = {"version": CUBE_VERSION,
+                         "labels": {s: {d: [] for d in LABEL_DIMENSIONS} for s in SOURCES},
+                         "months": {s: [] for s in SOURCES}, "files": {}}
+        self.index = {s: {d: {v: i for i, v in enumerate(self.meta["labels"][s][d])} for d in LABEL_DIMENSIONS}
+                      for s in SOURCES}
+
+    def save_meta(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    def _encode(self, source, dim, values):
+        uniq, inverse = np.unique(values, return_inverse=True)
+        index = self.index[source][dim]
+        labels = self.meta["labels"][source][dim]
+        codes = np.empty(len(uniq), dtype=np.int64)
+        for i, v in enumerate(uniq.tolist()):
+            if v not in index:
+                index[v] = len(labels)
+                labels.append(v)
+            codes[i] = index[v]
+        return codes[inverse]
+
+    def shape(self, source):
+        labels = self.meta["labels"][source]
+        return (max(len(labels["nodo"]), 1), DAYS, HOURS, max(len(labels["vendedor"]), 1),
+                max(len(labels["pago"]), 1), len(MEASURES))
+
+    def _path(self, source, month):
+        return os.path.join(self.root, source, f"{month}.npy")
+
+    def cube(self, source, month):
+        # Dense array of one month, zero-padded up to the current labels
+        shape = self.shape(source)
+        path = self._path(source, month)
+        if not os.path.exists(path):
+            return np.zeros(shape, dtype=np.int64)
+        arr = np.load(path)
+        if arr.shape != shape:
+            arr = np.pad(arr, [(0, want - have) for have, want in zip(arr.shape, shape)])
+        return arr
+
+    def _save_cube(self, source, month, arr):
+        path = self._path(source, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npy"
+        np.save(tmp, arr)
+        os.replace(tmp, path)
+        if month not in self.meta["months"][source]:
+            self.meta["months"][source] = sorted(self.meta["months"][source] + [month])
+
+    def fold(self, path, force=False):
+        # -> (source, rows, {month: [days]}) or None when the file is unchanged
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        key = os.path.abspath(path)
+        if not force and self.meta["files"].get(key, {}).get("stamp") == stamp:
+            return None
+        source = source_of(path)
+        if source is None:
+            raise ValueError(f"{path}: no es un export de caja ni de comisiones")
+        data = READERS[source](path)
+
+        codes = {dim: self._encode(source, dim, data[dim]) for dim in LABEL_DIMENSIONS}
+        minutes = data["minuto"]
+        months = minutes.astype("datetime64[M]")
+        days = (minutes.astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+        hours = (minutes - minutes.astype("datetime64[D]")).astype("timedelta64[h]").astype(np.int64)
+        shape = self.shape(source)
+        folded = {}
+        for month in np.unique(months).tolist() if len(months) else []:
+            label = str(np.datetime64(month, "M"))
+            rows = months == np.datetime64(month, "M")
+            arr = self.cube(source, label)
+            # The export is the new truth for every (nodo, dia) it contains
+            node_days = np.unique(np.stack([codes["nodo"][rows], days[rows]], axis=1), axis=0)
+            arr[node_days[:, 0], node_days[:, 1]] = 0
+            flat = np.ravel_multi_index((codes["nodo"][rows], days[rows], hours[rows],
+                                         codes["vendedor"][rows], codes["pago"][rows]), shape[:-1])
+            size = int(np.prod(shape[:-1]))
+            # Cents stay exact: float weights are whole numbers far below 2**53
+            arr[..., 0] += np.rint(np.bincount(flat, weights=data["importe"][rows], minlength=size)).astype(np.int64).reshape(shape[:-1])
+            arr[..., 1] += np.bincount(flat, minlength=size).reshape(shape[:-1])
+            self._save_cube(source, label, arr)
+            folded[label] = sorted(set((days[rows] + 1).tolist()))
+        self.meta["files"][key] = {"stamp": stamp, "source": source, "months": folded}
+        self.save_meta()
+        return source, len(minutes), folded
+
+    def query(self, source, months, by, where=None, measure="importe"):
+        # -> (labels per "by" dimension, array with one axis per "by" dimension).
+        # by: nodo / dia / dia_semana / hora / vendedor / pago (dia only with one month);
+        # where: {dimension: label} for nodo / vendedor / pago
+        if "dia" in by and len(months) != 1:
+            raise ValueError("dia solo se puede pedir para un mes")
+        labels = self.meta["labels"][source]
+        m = MEASURES.index(measure)
+        total = None
+        for month in months:
+            arr = self.cube(source, month)[..., m]
+            for dim, value in (where or {}).items():
+                axis = DIMENSIONS.index(dim)
+                code = self.index[source][dim].get(value)
+                mask = np.zeros(arr.shape[axis], dtype=bool)
+                if code is not None:
+                    mask[code] = True
+                arr = np.where(mask.reshape([-1 if a == axis else 1 for a in range(arr.ndim)]), arr, 0)
+            if "dia_semana" in by:
+                # Day d of the month -> weekday; 1970-01-01 was a Thursday
+                first = (np.datetime64(month, "D").astype(np.int64) + 3) % 7
+                weekday = (first + np.arange(DAYS)) % 7
+                arr = np.stack([arr[:, weekday == w].sum(axis=1) for w in range(7)], axis=1)
+            keep = [DIMENSIONS.index("dia" if d == "dia_semana" else d) for d in by]
+            arr = arr.sum(axis=tuple(a for a in range(arr.ndim) if a not in keep))
+            arr = np.transpose(arr, np.argsort(np.argsort(keep)))
+            total = arr if total is None else total + arr
+        axis_labels = []
+        for d in by:
+            if d == "dia":
+                axis_labels.append([str(i + 1) for i in range(DAYS)])
+            elif d == "dia_semana":
+                axis_labels.append(WEEKDAYS)
+            elif d == "hora":
+                axis_labels.append([f"{h:02d}" for h in range(HOURS)])
+            else:
+                axis_labels.append(labels[d] or [""])
+        return axis_labels, total
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def _where(args):
+    return {d: getattr(args, d) for d in LABEL_DIMENSIONS if getattr(args, d)}
+
+def _format(value, measure):
+    return f"{pesos(int(value)):,.2f}" if measure == "importe" else f"{int(value):,}"
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Cubos de ventas por nodo, día, hora, vendedor y medio de pago")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("fold", help="sumar exports de caja / comisiones (reemplaza los días que traen)")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--force", action="store_true", help="volver a sumar aunque no hayan cambiado")
+
+    def filters(p):
+        p.add_argument("--fuente", choices=SOURCES, default="caja")
+        p.add_argument("--mes", nargs="+", help="YYYY-MM (por defecto todos)")
+        p.add_argument("--nodo")
+        p.add_argument("--vendedor")
+        p.add_argument("--pago")
+        p.add_argument("--valor", choices=MEASURES, default="importe")
+
+    p = sub.add_parser("heatmap", help="día de semana x hora")
+    filters(p)
+    p = sub.add_parser("query", help="totales agrupados")
+    filters(p)
+    p.add_argument("--by", nargs="+", default=["nodo"], choices=("nodo", "dia", "dia_semana", "hora", "vendedor", "pago"))
+    sub.add_parser("list", help="meses y archivos sumados")
+    args = parser.parse_args(argv)
+
+    cubes = SalesCube(args.root)
+
+    if args.command == "fold":
+        for path in _expand(args.files):
+            result = cubes.fold(path, args.force)
+            if result is None:
+                print(f"{os.path.basename(path)}: sin cambios")
+                continue
+            source, rows, folded = result
+            days = "; ".join(f"{m}: {', '.join(map(str, d))}" for m, d in folded.items())
+            print(f"{os.path.basename(path)} [{source}]: {rows:,} filas -> {days}")
+        return
+
+    if args.command == "list":
+        for source in SOURCES:
+            print(f"{source}: {', '.join(cubes.meta['months'][source]) or 'sin datos'}")
+        for path, info in sorted(cubes.meta["files"].items()):
+            print(f"  {os.path.basename(path)} [{info['source']}]: {', '.join(info['months'])}")
+        return
+
+    months = args.mes or cubes.meta["months"][args.fuente]
+    if not months:
+        print(f"Sin datos de {args.fuente}")
+        return
+    if args.command == "heatmap":
+        (days, hours), grid = cubes.query(args.fuente, months, ["dia_semana", "hora"], _where(args), args.valor)
+        used = np.flatnonzero(grid.any(axis=0))
+        hours = [hours[h] for h in used]
+        grid = grid[:, used]
+        if args.valor == "importe":
+            grid = np.rint(grid / 100_000).astype(np.int64)
+            print("(miles de $)")
+        print("     " + "".join(f"{h:>7}" for h in hours))
+        for day, row in zip(days, grid):
+            print(f"{day:<5}" + "".join(f"{int(v):>7,}" for v in row))
+        return
+
+    axis_labels, totals = cubes.query(args.fuente, months, args.by, _where(args), args.valor)
+    for idx in zip(*np.nonzero(totals)):
+        key = " | ".join(axis_labels[a][i] for a, i in enumerate(idx))
+        print(f"{key}: {_format(totals[idx], args.valor)}")
+    print(f"TOTAL: {_format(totals.sum(), args.valor)}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
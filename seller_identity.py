@@ -0,0 +1,260 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+import unicodedata
+from difflib import SequenceMatcher
+from collections import Counter, defaultdict
+
+# Identity index for sellers across horarios, caja and comisiones.
+# The same person appears as "CORIA, BETIANA" (reloj), "BETIANA CORIA"
+# (Usuario / Vendedor), "RABINO SOL MILAGROS" / "RABINO SOL " (Vendedor /
+# Cajero) or "DIAMELA, OJEDA". Every string is reduced to a key of sorted,
+# accent-free tokens ("BETIANA CORIA"); known keys resolve with one dict
+# lookup. Unknown keys are compared only against the aliases that share
+# character trigrams with them (blocking), never against the whole table.
+# Accepted matches are written back as aliases, so the next run is exact.
+#   python seller_identity.py seed employees_import_initial.json
+#   python seller_identity.py resolve "ARCHIVOS/testers/COMISIONES*.CSV" --learn
+
+TABLE_VERSION = 1
+DEFAULT_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seller_identities.json")
+SELLER_COLUMNS = ("Nombre", "Vendedor", "Cajero", "Usuario")
+
+MIN_SCORE = 0.85      # token similarity needed to accept a fuzzy match
+MIN_MARGIN = 0.05     # over the second best person, or it's ambiguous
+MIN_SHARED_GRAMS = 2  # trigrams in common to become a candidate
+TOKEN_RATIO = 0.8     # per-token SequenceMatcher ratio that still counts ("ALEXIS"/"ALEXYS")
+
+def normalize_key(raw):
+    # "Coria,  Betiana " -> "BETIANA CORIA"
+    text = unicodedata.normalize("NFKD", raw or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).upper()
+    text = "".join(ch if ch.isalnum() else " " for ch in text)
+    return " ".join(sorted(text.split()))
+
+def token_grams(key):
+    grams = set()
+    for token in key.split():
+        padded = f"^{token}$"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def _token_similarity(a, b):
+    if a == b:
+        return 1.0
+    if len(a) >= 3 and len(b) >= 3 and (a.startswith(b) or b.startswith(a)):
+        return 0.9  # "FLOR" / "FLORENCIA"
+    ratio = SequenceMatcher(None, a, b).ratio()
+    return ratio if ratio >= TOKEN_RATIO else 0.0
+
+def key_similarity(a, b):
+    # Every token of the shorter name must find a partner in the longer one:
+    # "RABINO SOL" fits "MILAGROS RABINO SOL", "FERRER" fits "ENRIQUE FERRER"
+    ta, tb = a.split(), b.split()
+    if len(ta) > len(tb):
+        ta, tb = tb, ta
+    if not ta:
+        return 0.0
+    return sum(max(_token_similarity(t, u) for u in tb) for t in ta) / len(ta)
+
+class SellerIndex:
+    def __init__(self, path=DEFAULT_TABLE):
+        self.path = path
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.table = json.load(f)
+        else:
+            self.table = {"version": TABLE_VERSION, "people": {}, "aliases": {}}
+        if self.table.get("version") != TABLE_VERSION:
+            raise ValueError(f"Version de tabla no soportada en {path}: {self.table.get('version')}")
+        self.blocks = defaultdict(set)  # trigram -> alias keys
+        for key in self.table["aliases"]:
+            self._block(key)
+        self.memo = {}                  # raw string -> resolution, for this run
+        self.dirty = False
+
+    def _block(self, key):
+        for gram in token_grams(key):
+            self.blocks[gram].add(key)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.table, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def person(self, person_id):
+        return self.table["people"].get(person_id)
+
+    def add_person(self, name, cuil=None, branch=None):
+        key = normalize_key(name)
+        person_id = cuil or f"GEN-{key.replace(' ', '')}"
+        self.table["people"][person_id] = {"name": name.strip(), "cuil": cuil, "branch": branch}
+        self.add_alias(name, person_id, "seed")
+        return person_id
+
+    def add_alias(self, raw, person_id, source):
+        key = normalize_key(raw)
+        if not key:
+            return
+        if key not in self.table["aliases"]:
+            self._block(key)
+        self.table["aliases"][key] = {"id": person_id, "source": source, "raw": raw.strip()}
+        self.memo.clear()
+        self.dirty = True
+
+    def candidates(self, key):
+        # Alias keys sharing enough trigrams with the query
+        hits = Counter()
+        for gram in token_grams(key):
+            for alias in self.blocks.get(gram, ()):
+                hits[alias] += 1
+        return [alias for alias, n in hits.items() if n >= MIN_SHARED_GRAMS]
+
+    def resolve(self, raw, learn=False):
+        # -> (person id or None, how, detail)
+        #    how: "exact" | "fuzzy" | "ambiguous" | "unknown" | "empty"
+        found = self.memo.get(raw)
+        if found is not None:
+            return found
+        key = normalize_key(raw)
+        if not key:
+            result = (None, "empty", None)
+        elif key in self.table["aliases"]:
+            result = (self.table["aliases"][key]["id"], "exact", None)
+        else:
+            best = {}
+            for alias in self.candidates(key):
+                person_id = self.table["aliases"][alias]["id"]
+                score = key_similarity(key, alias)
+                if score > best.get(person_id, (0.0, None))[0]:
+                    best[person_id] = (score, alias)
+            ranked = sorted(best.items(), key=lambda kv: -kv[1][0])
+            if not ranked or ranked[0][1][0] < MIN_SCORE:
+                result = (None, "unknown", None)
+            elif len(ranked) > 1 and ranked[0][1][0] - ranked[1][1][0] < MIN_MARGIN:
+                result = (None, "ambiguous", [pid for pid, (score, _) in ranked if score >= MIN_SCORE])
+            else:
+                person_id, (score, alias) = ranked[0]
+                result = (person_id, "fuzzy", f"{alias} ({score:.2f})")
+                if learn:
+                    self.add_alias(raw, person_id, "auto")
+        self.memo[raw] = result
+        return result
+
+    def seed_employees(self, employees):
+        # employees_import_initial.json rows; ones with CUIL go first so the
+        # person id is the CUIL whenever any of its spellings has one
+        added = 0
+        for e in sorted(employees, key=lambda e: e.get("cuil") in (None, "", "00-00000000-0")):
+            cuil = e.get("cuil")
+            if cuil == "00-00000000-0":
+                cuil = None
+            person_id, how, _ = self.resolve(e["name"])
+            if person_id is None:
+                person_id = self.add_person(e["name"], cuil, e.get("branch"))
+                added += 1
+            else:
+                self.add_alias(e["name"], person_id, "seed")
+            # Guessed Zetti seller name, kept as a hint only
+            if e.get("zettiSellerName"):
+                self.table["people"][person_id].setdefault("zetti", e["zettiSellerName"])
+        return added
+
+def seller_counts(path, encoding='latin1'):
+    # {column: Counter(raw value -> rows)} for the seller columns of a horario
+    # (";"-separated), caja or comisiones export
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        header_line = f.readline()
+        delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+        f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        header = [h.strip() for h in next(reader)]
+        columns = [(header.index(c), c) for c in SELLER_COLUMNS if c in header]
+        counts = {c: Counter() for _, c in columns}
+        for row in reader:
+            for idx, name in columns:
+                if idx < len(row):
+                    counts[name][row[idx]] += 1
+    return counts
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Índice de identidades de vendedores")
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed = sub.add_parser("seed", help="cargar empleados (employees_import_initial.json)")
+    seed.add_argument("employees", nargs="?", default="employees_import_initial.json")
+
+    resolve = sub.add_parser("resolve", help="resolver los vendedores de uno o más archivos")
+    resolve.add_argument("files", nargs="+")
+    resolve.add_argument("--learn", action="store_true", help="guardar los matches aproximados como alias")
+    resolve.add_argument("--add-new", action="store_true", help="dar de alta los nombres sin resolver")
+    resolve.add_argument("-v", "--verbose", action="store_true", help="mostrar también los exactos")
+
+    sub.add_parser("list", help="mostrar la tabla")
+    args = parser.parse_args(argv)
+
+    index = SellerIndex(args.table)
+
+    if args.command == "seed":
+        with open(args.employees, 'r', encoding='utf-8') as f:
+            employees = json.load(f)
+        added = index.seed_employees(employees)
+        index.save()
+        print(f"{added} personas nuevas, {len(index.table['people'])} en total, {len(index.table['aliases'])} alias")
+        return
+
+    if args.command == "list":
+        by_person = defaultdict(list)
+        for key, alias in index.table["aliases"].items():
+            by_person[alias["id"]].append(f"{alias['raw']} [{alias['source']}]")
+        for person_id, person in sorted(index.table["people"].items(), key=lambda kv: kv[1]["name"]):
+            print(f"{person['name']} ({person_id}, {person.get('branch') or 'sin sucursal'})")
+            for alias in sorted(by_person[person_id]):
+                print(f"  - {alias}")
+        return
+
+    unresolved = Counter()
+    for path in _expand(args.files):
+        for column, counts in seller_counts(path).items():
+            print(f"\n{os.path.basename(path)} [{column}]: {sum(counts.values()):,} filas, {len(counts)} nombres")
+            for raw, rows in sorted(counts.items()):
+                person_id, how, detail = index.resolve(raw, learn=args.learn)
+                if how == "empty":
+                    continue
+                if person_id is not None:
+                    if how != "exact" or args.verbose:
+                        name = index.person(person_id)["name"]
+                        extra = f" ~ {detail}" if detail else ""
+                        print(f"  {raw.strip()} -> {name} [{how}{extra}]")
+                    continue
+                if how == "ambiguous":
+                    names = ", ".join(index.person(pid)["name"] for pid in detail)
+                    print(f"  {raw.strip()} -> ¿{names}? [ambiguo]")
+                unresolved[raw.strip()] += rows
+
+    if unresolved:
+        print(f"\nSIN RESOLVER ({len(unresolved)}):")
+        for raw, rows in unresolved.most_common():
+            print(f"  {raw} ({rows:,} filas)")
+        if args.add_new:
+            for raw in unresolved:
+                if index.resolve(raw)[1] == "unknown":
+                    index.add_person(raw)
+    if index.dirty:
+        index.save()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
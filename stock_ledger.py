@@ -0,0 +1,454 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+import numpy as np
+from comisiones_store import parse_numbers
+
+# Stock ledger over the Zetti "movimiento stock" / "stock dia" exports
+# (Producto, Cod.barra, Fecha, Deposito, Tipo de mov., Comprobante, Unidades,
+# Stock Actual, ..., Nodo). Every movement of every file goes into one set of
+# columns sorted by a composite int64:
+#   key << 36 | day << 20 | line in its file
+# where key is the (barcode, nodo, deposito) code, so all movements of one
+# product in one depot are contiguous and in date order (file order breaks
+# ties inside a day, the exports carry no time). "Stock of X on D" and "moves
+# of X between D1 and D2" are two searchsorted calls on the memory-mapped
+# column, no scan. Unidades is positive when stock goes out ("Stock Actual" is
+# the stock after the movement): expected stock = previous stock - Unidades.
+# A new daily file is sorted on its own and spliced into the sorted columns;
+# re-adding a file replaces its earlier rows. Month-end stock of every key is
+# kept as a snapshot (snapshots/YYYY-MM.npy) for full-inventory listings.
+#   python stock_ledger.py build "ARCHIVOS/testers/movimiento stock 9.CSV" "ARCHIVOS/testers/stock dia 30.CSV"
+#   python stock_ledger.py stock 7793094000478 --fecha 2026-01-09
+#   python stock_ledger.py flags --tipo negativo
+
+LEDGER_VERSION = 1
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "stock")
+
+KEY_SHIFT = 36
+DAY_SHIFT = 20
+MAX_LINES = 1 << DAY_SHIFT
+
+# Client remito and its billing adjustment: stock that goes negative around
+# this pair usually means the adjustment did not give the units back
+REMITO_TYPES = ("REMITO A CLIENTE", "AJUSTE FACTURACION REMITO (+)")
+
+FLAG_NEGATIVE = 1   # "Stock Actual" < 0 after the movement
+FLAG_JUMP = 2       # stock does not follow from the previous movement and Unidades (same loaded stretch)
+FLAG_REMITO = 4     # negative on a REMITO A CLIENTE / AJUSTE FACTURACION REMITO pair
+FLAG_NAMES = {"negativo": FLAG_NEGATIVE, "salto": FLAG_JUMP, "remito": FLAG_REMITO}
+
+# Stored columns (data/<name>.npy); "comp" is the sort key
+COLUMNS = ("comp", "key", "day", "units", "stock", "type", "voucher", "source", "flags")
+DICTIONARIES = ("barcode", "node", "depot", "type", "voucher")
+
+def parse_days(values):
+    # "dd/mm/yyyy" -> datetime64[D], NaT when the cell is not a date
+    iso = []
+    for v in values:
+        v = v.strip()
+        if len(v) == 10 and v[2] == "/" and v[5] == "/":
+            iso.append(f"{v[6:10]}-{v[3:5]}-{v[0:2]}")
+        else:
+            iso.append("NaT")
+    return np.array(iso, dtype="datetime64[D]")
+
+def composite(keys, days, lines):
+    return (np.asarray(keys, dtype=np.int64) << KEY_SHIFT) | (np.asarray(days, dtype="datetime64[D]").astype(np.int64) << DAY_SHIFT) | lines
+
+def coverage_runs(days, coverage):
+    # Run number of each day: days inside one unbroken stretch of loaded files
+    # ([min, max] of every source) share it, so two movements with different
+    # runs have some never-loaded day between them
+    days = np.asarray(days, dtype="datetime64[D]")
+    if not len(days) or not coverage:
+        return np.zeros(len(days), dtype=np.int64)
+    lo = np.array([c[0] for c in coverage], dtype="datetime64[D]")
+    hi = np.array([c[1] for c in coverage], dtype="datetime64[D]")
+    first = min(lo.min(), days.min())
+    covered = np.zeros(int((max(hi.max(), days.max()) - first).astype(np.int64)) + 1, dtype=bool)
+    for a, b in zip((lo - first).astype(np.int64), (hi - first).astype(np.int64)):
+        covered[a:b + 1] = True
+    return np.cumsum(~covered)[(days - first).astype(np.int64)]
+
+def compute_flags(key, days, units, stock, type_codes, remito_codes, coverage):
+    # Movements are only compared with the previous one of the same key when
+    # no unloaded day lies between them: across a gap the stock moved by
+    # movements we never saw, that is not a jump
+    runs = coverage_runs(days, coverage)
+    same = np.zeros(len(key), dtype=bool)
+    same[1:] = (key[1:] == key[:-1]) & (runs[1:] == runs[:-1])
+    expected = np.full(len(key), np.nan)
+    expected[1:] = stock[:-1] - units[1:]
+    negative = stock < 0
+    jump = same & (np.abs(stock - expected) > 1e-9)
+    remito = np.isin(type_codes, remito_codes)
+    prev_remito = np.zeros(len(key), dtype=bool)
+    prev_remito[1:] = remito[:-1]
+    remito_negative = negative & (remito | (same & prev_remito))
+    return (negative * FLAG_NEGATIVE | jump * FLAG_JUMP | remito_negative * FLAG_REMITO).astype(np.int8)
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def _read_csv(csv_path, encoding='latin1'):
+    with open(csv_path, 'r', encoding=encoding, newline='') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        width = len(header)
+        rows = [r + [""] * (width - len(r)) if len(r) < width else r[:width] for r in reader if r]
+    return header, rows
+
+class StockLedger:
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = root
+        self.data_dir = os.path.join(root, "data")
+        self.meta_path = os.path.join(root, "ledger.json")
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {"version": LEDGER_VERSION, "dictionaries": {name: [] for name in DICTIONARIES},
+                         "keys": [], "products": {}, "sources": {}, "rows": 0, "min": None, "max": None, "snapshots": []}
+        if self.meta.get("version") != LEDGER_VERSION:
+            raise ValueError(f"Version de ledger no soportada en {root}: {self.meta.get('version')}")
+        self._index = {name: {v: i for i, v in enumerate(values)} for name, values in self.meta["dictionaries"].items()}
+        self._keys = {tuple(k): i for i, k in enumerate(self.meta["keys"])}
+        self._by_barcode = {}
+        for i, (barcode, _, _) in enumerate(self.meta["keys"]):
+            self._by_barcode.setdefault(barcode, []).append(i)
+        self._columns = {}
+
+    # --- escritura ---
+
+    def _encode(self, name, values):
+        # Append-only: new values get the next code, old codes never move
+        values_list = self.meta["dictionaries"][name]
+        index = self._index[name]
+        uniq, inverse = np.unique(np.char.strip(np.asarray(values, dtype=str)), return_inverse=True)
+        mapping = np.empty(len(uniq), dtype=np.int32)
+        for i, v in enumerate(uniq.tolist()):
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(values_list)
+                values_list.append(v)
+            mapping[i] = code
+        return mapping[inverse]
+
+    def _encode_keys(self, barcodes, nodes, depots):
+        triples = np.stack([barcodes, nodes, depots], axis=1)
+        uniq, inverse = np.unique(triples, axis=0, return_inverse=True)
+        mapping = np.empty(len(uniq), dtype=np.int32)
+        for i, triple in enumerate(map(tuple, uniq.tolist())):
+            code = self._keys.get(triple)
+            if code is None:
+                code = self._keys[triple] = len(self.meta["keys"])
+                self.meta["keys"].append(list(triple))
+                self._by_barcode.setdefault(triple[0], []).append(code)
+            mapping[i] = code
+        return mapping[inverse.reshape(-1)]
+
+    def _load_all(self):
+        if not self.meta["rows"]:
+            return {name: np.zeros(0, dtype=dtype) for name, dtype in zip(COLUMNS, (
+                np.int64, np.int32, "datetime64[D]", np.float64, np.float64, np.int32, np.int32, np.int16, np.int8))}
+        return {name: np.load(os.path.join(self.data_dir, name + ".npy")) for name in COLUMNS}
+
+    def add_csv(self, csv_path, force=False):
+        # -> (rows stored, rows without date, flagged rows in the whole ledger);
+        # None if the file did not change since it was added
+        name = os.path.basename(csv_path)
+        stamp = _source_stamp(csv_path)
+        known = self.meta["sources"].get(name)
+        if not force and known and known["stamp"] == stamp:
+            return None
+
+        header, rows = _read_csv(csv_path)
+        if len(rows) >= MAX_LINES:
+            raise ValueError(f"{name}: más de {MAX_LINES - 1:,} movimientos en un archivo")
+        raw = dict(zip(header, zip(*rows))) if rows else {h: () for h in header}
+        days = parse_days(raw.get("Fecha", ()))
+        valid = ~np.isnat(days)
+        keep = np.flatnonzero(valid)
+        col = lambda h: np.asarray(raw.get(h, ()), dtype=str)[keep] if len(keep) else np.zeros(0, dtype=str)
+
+        barcodes = np.char.strip(col("Cod.barra"))
+        for barcode, product in zip(barcodes.tolist(), col("Producto").tolist()):
+            self.meta["products"].setdefault(barcode, product.strip())
+        keys = self._encode_keys(self._encode("barcode", barcodes), self._encode("node", col("Nodo")), self._encode("depot", col("Deposito")))
+        source = known["code"] if known else len(self.meta["sources"])
+        new = {
+            "comp": composite(keys, days[keep], keep.astype(np.int64)),
+            "key": keys,
+            "day": days[keep],
+            "units": parse_numbers(col("Unidades")),
+            "stock": parse_numbers(col("Stock Actual")),
+            "type": self._encode("type", col("Tipo de mov.")),
+            "voucher": self._encode("voucher", col("Comprobante")),
+            "source": np.full(len(keep), source, dtype=np.int16),
+        }
+        order = np.argsort(new["comp"], kind="stable")
+        new = {n: a[order] for n, a in new.items()}
+
+        # Splice: the old columns are already sorted, so the new block goes in
+        # with one searchsorted + insert per column (a re-added file first
+        # drops its earlier rows)
+        old = self._load_all()
+        if known:
+            mask = old["source"] != source
+            old = {n: a[mask] for n, a in old.items()}
+        at = np.searchsorted(old["comp"], new["comp"], side="right")
+        columns = {n: np.insert(old[n], at, new[n]) for n in COLUMNS if n != "flags"}
+        entry = {"stamp": stamp, "code": source, "rows": int(len(keep)),
+                 "min": str(days[keep].min()) if len(keep) else None,
+                 "max": str(days[keep].max()) if len(keep) else None}
+        coverage = [(info["min"], info["max"]) for info in {**self.meta["sources"], name: entry}.values() if info["min"]]
+        remito_codes = [self._index["type"][t] for t in REMITO_TYPES if t in self._index["type"]]
+        columns["flags"] = compute_flags(columns["key"], columns["day"], columns["units"], columns["stock"], columns["type"], remito_codes, coverage)
+
+        self._write(columns)
+        self.meta["sources"][name] = entry
+        self._save_meta()
+        return len(keep), int((~valid).sum()), int((columns["flags"] != 0).sum())
+
+    def _write(self, columns):
+        # Columns and month-end snapshots go to a temp dir swapped in whole
+        tmp_dir = self.data_dir + ".tmp"
+        os.makedirs(os.path.join(tmp_dir, "snapshots"), exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(tmp_dir, name + ".npy"), columns[name])
+        months = []
+        days = columns["day"]
+        if len(days):
+            first, last = days.min().astype("datetime64[M]"), days.max().astype("datetime64[M]")
+            for month in np.arange(first, last + 1):
+                month_end = (month + 1).astype("datetime64[D]") - 1
+                np.save(os.path.join(tmp_dir, "snapshots", f"{month}.npy"), self._stock_all(columns["comp"], columns["stock"], month_end))
+                months.append(str(month))
+        if os.path.isdir(self.data_dir):
+            old_dir = self.data_dir + ".old"
+            os.replace(self.data_dir, old_dir)
+            os.replace(tmp_dir, self.data_dir)
+            for folder, _, files in os.walk(old_dir, topdown=False):
+                for f in files:
+                    os.remove(os.path.join(folder, f))
+                os.rmdir(folder)
+        else:
+            os.replace(tmp_dir, self.data_dir)
+        self._columns = {}
+        self.meta["rows"] = int(len(days))
+        self.meta["min"] = str(days.min()) if len(days) else None
+        self.meta["max"] = str(days.max()) if len(days) else None
+        self.meta["snapshots"] = months
+
+    def _save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    # --- lectura ---
+
+    def column(self, name):
+        arr = self._columns.get(name)
+        if arr is None:
+            arr = self._columns[name] = np.load(os.path.join(self.data_dir, name + ".npy"), mmap_mode='r')
+        return arr
+
+    def key_label(self, key):
+        barcode, node, depot = self.meta["keys"][key]
+        d = self.meta["dictionaries"]
+        return d["barcode"][barcode], d["node"][node], d["depot"][depot]
+
+    def keys_for(self, barcode, node=None, depot=None):
+        code = self._index["barcode"].get(barcode.strip(), -1)
+        found = []
+        for key in self._by_barcode.get(code, ()):
+            _, key_node, key_depot = self.key_label(key)
+            if (node is None or key_node == node) and (depot is None or key_depot == depot):
+                found.append(key)
+        return found
+
+    def _bounds(self, key, start=None, end=None):
+        # Row range of key with start <= day < end (datetime64[D] or None)
+        comp = self.column("comp")
+        lo_day = start.astype(np.int64) if start is not None else 0
+        lo = np.searchsorted(comp, (key << KEY_SHIFT) | (lo_day << DAY_SHIFT), side="left")
+        if end is None:
+            hi = np.searchsorted(comp, (key + 1) << KEY_SHIFT, side="left")
+        else:
+            hi = np.searchsorted(comp, (key << KEY_SHIFT) | (end.astype(np.int64) << DAY_SHIFT), side="left")
+        return int(lo), int(hi)
+
+    def stock_at(self, barcode, day, node=None, depot=None):
+        # -> {(nodo, deposito): (stock, day of the last movement)} as of the
+        # end of day; keys without movements up to then are left out
+        end = np.datetime64(day, "D") + 1
+        result = {}
+        for key in self.keys_for(barcode, node, depot):
+            lo, hi = self._bounds(key, None, end)
+            if hi > lo:
+                _, key_node, key_depot = self.key_label(key)
+                result[(key_node, key_depot)] = (float(self.column("stock")[hi - 1]), str(self.column("day")[hi - 1]))
+        return result
+
+    def movements(self, barcode, start=None, end=None, node=None, depot=None):
+        # Movements with start <= day <= end, per key in date order
+        start = np.datetime64(start, "D") if start else None
+        end = np.datetime64(end, "D") + 1 if end else None
+        d = self.meta["dictionaries"]
+        moves = []
+        for key in self.keys_for(barcode, node, depot):
+            lo, hi = self._bounds(key, start, end)
+            _, key_node, key_depot = self.key_label(key)
+            for i in range(lo, hi):
+                moves.append({
+                    "day": str(self.column("day")[i]), "node": key_node, "depot": key_depot,
+                    "type": d["type"][self.column("type")[i]], "voucher": d["voucher"][self.column("voucher")[i]],
+                    "units": float(self.column("units")[i]), "stock": float(self.column("stock")[i]),
+                    "flags": [n for n, bit in FLAG_NAMES.items() if self.column("flags")[i] & bit],
+                })
+        return moves
+
+    @staticmethod
+    def _stock_all(comp, stock, day):
+        # Stock of every key as of the end of day (NaN: no movement yet), one
+        # vectorized searchsorted for all keys
+        if not len(comp):
+            return np.zeros(0)
+        n_keys = int(comp[-1] >> KEY_SHIFT) + 1
+        keys = np.arange(n_keys, dtype=np.int64)
+        probe = (keys << KEY_SHIFT) | ((np.datetime64(day, "D") + 1).astype(np.int64) << DAY_SHIFT)
+        last = np.searchsorted(comp, probe, side="left") - 1
+        found = (last >= 0) & ((np.asarray(comp)[np.maximum(last, 0)] >> KEY_SHIFT) == keys)
+        return np.where(found, np.asarray(stock)[np.maximum(last, 0)], np.nan)
+
+    def stock_all(self, day):
+        # Month ends come from the snapshot; other days are computed
+        day = np.datetime64(day, "D")
+        month = day.astype("datetime64[M]")
+        if str(month) in self.meta["snapshots"] and day == (month + 1).astype("datetime64[D]") - 1:
+            values = np.load(os.path.join(self.data_dir, "snapshots", f"{month}.npy"))
+        else:
+            values = self._stock_all(self.column("comp"), self.column("stock"), day)
+        # Keys added after the snapshot have no value in it
+        return np.concatenate([values, np.full(len(self.meta["keys"]) - len(values), np.nan)])
+
+    def flagged(self, mask=FLAG_NEGATIVE | FLAG_JUMP | FLAG_REMITO):
+        # Row numbers whose flags intersect mask
+        return np.flatnonzero(np.asarray(self.column("flags")) & mask)
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def _units(value):
+    return f"{value:g}"
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Ledger de stock por código de barras")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="importar CSVs de movimientos de stock")
+    build.add_argument("files", nargs="+")
+    build.add_argument("--force", action="store_true", help="reimportar aunque no hayan cambiado")
+
+    stock = sub.add_parser("stock", help="stock de un producto a una fecha")
+    stock.add_argument("barcode")
+    stock.add_argument("--fecha", help="yyyy-mm-dd (por defecto el último día cargado)")
+    stock.add_argument("--nodo")
+
+    movs = sub.add_parser("movs", help="movimientos de un producto en un rango")
+    movs.add_argument("barcode")
+    movs.add_argument("--desde", help="yyyy-mm-dd (inclusive)")
+    movs.add_argument("--hasta", help="yyyy-mm-dd (inclusive)")
+    movs.add_argument("--nodo")
+
+    flags = sub.add_parser("flags", help="movimientos inconsistentes")
+    flags.add_argument("--tipo", nargs="+", choices=sorted(FLAG_NAMES), default=sorted(FLAG_NAMES))
+    flags.add_argument("--top", type=int, default=50)
+
+    listing = sub.add_parser("listado", help="stock de todos los productos a una fecha")
+    listing.add_argument("--fecha", help="yyyy-mm-dd (por defecto el último día cargado)")
+    listing.add_argument("--negativos", action="store_true", help="solo stock negativo")
+    args = parser.parse_args(argv)
+
+    ledger = StockLedger(args.store)
+    if args.command == "build":
+        os.makedirs(args.store, exist_ok=True)
+        for path in _expand(args.files):
+            res = ledger.add_csv(path, force=args.force)
+            if res is None:
+                print(f"{os.path.basename(path)}: sin cambios")
+                continue
+            rows, skipped, _ = res
+            extra = f", {skipped} sin fecha" if skipped else ""
+            print(f"{os.path.basename(path)}: {rows:,} movimientos{extra}")
+        flagged = len(ledger.flagged()) if ledger.meta["rows"] else 0
+        print(f"Ledger: {ledger.meta['rows']:,} movimientos, {len(ledger.meta['keys']):,} producto/depósito, "
+              f"{ledger.meta['min']} a {ledger.meta['max']}, {flagged:,} con alerta")
+        return
+
+    if not ledger.meta["rows"]:
+        print("Ledger vacío: primero 'build'")
+        return 1
+
+    if args.command == "stock":
+        day = args.fecha or ledger.meta["max"]
+        product = ledger.meta["products"].get(args.barcode, "?")
+        print(f"{args.barcode} {product} al {day}:")
+        found = ledger.stock_at(args.barcode, day, args.nodo)
+        for (node, depot), (value, last) in sorted(found.items()):
+            print(f"  {node} / {depot}: {_units(value)} (último movimiento {last})")
+        if not found:
+            print("  sin movimientos")
+        return
+
+    if args.command == "movs":
+        moves = ledger.movements(args.barcode, args.desde, args.hasta, args.nodo)
+        print(f"{args.barcode} {ledger.meta['products'].get(args.barcode, '?')}: {len(moves)} movimientos")
+        for m in moves:
+            alert = f"  <- {', '.join(m['flags'])}" if m["flags"] else ""
+            print(f"  {m['day']} {m['node']}/{m['depot']} {m['type']:<32}{_units(m['units']):>6} -> {_units(m['stock']):>6}  {m['voucher']}{alert}")
+        return
+
+    if args.command == "flags":
+        mask = 0
+        for name in args.tipo:
+            mask |= FLAG_NAMES[name]
+        rows = ledger.flagged(mask)
+        flags_col = ledger.column("flags")
+        for name in args.tipo:
+            print(f"{name}: {int((np.asarray(flags_col)[rows] & FLAG_NAMES[name] != 0).sum()):,}")
+        d = ledger.meta["dictionaries"]
+        for i in rows[:args.top]:
+            barcode, node, depot = ledger.key_label(int(ledger.column("key")[i]))
+            names = ", ".join(n for n, bit in FLAG_NAMES.items() if flags_col[i] & bit)
+            print(f"  {ledger.column('day')[i]} {barcode} {ledger.meta['products'].get(barcode, '')[:30]:<30} {node}/{depot} "
+                  f"{d['type'][ledger.column('type')[i]]}: {_units(ledger.column('units')[i])} -> {_units(ledger.column('stock')[i])} [{names}]")
+        if len(rows) > args.top:
+            print(f"  ... {len(rows) - args.top:,} más")
+        return
+
+    day = args.fecha or ledger.meta["max"]
+    values = ledger.stock_all(day)
+    shown = 0
+    for key in sorted(range(len(values)), key=ledger.key_label):
+        value = values[key]
+        if np.isnan(value) or (args.negativos and value >= 0):
+            continue
+        barcode, node, depot = ledger.key_label(key)
+        print(f"{barcode:<15}{ledger.meta['products'].get(barcode, '')[:40]:<42}{node:<16}{depot:<8}{_units(value):>8}")
+        shown += 1
+    print(f"\n{shown:,} productos al {day}")
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
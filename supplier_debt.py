@@ -0,0 +1,353 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+import numpy as np
+from money import parse_cents, MISSING
+from stock_ledger import parse_days
+
+# Supplier debt index over the Zetti document exports ("proveedores sin items
+# ...CSV", PROVEEDORES ANUAL.CSV, GASTOS EXTERNOS.CSV: Entidad, Codificacion,
+# TipoValor, Monto, FechaEmision, FechaVenc, Nodo, Estado). Documents are
+# partitioned by book (proveedores / gastos), month of FechaEmision and Nodo:
+#   <store>/<book>/<YYYY-MM>/<nodo code>/  one .npy per column
+# and store.json keeps, per partition, the min/max due date and per-supplier
+# totals (invoiced, credited, open). Top debtors and month-by-month running
+# balances are answered from those totals alone. Aging depends on the --fecha
+# asked for, so it is computed at query time, not stored: it only opens the
+# partitions whose due dates straddle a bucket boundary, every older one goes
+# straight to 90+ from its totals. An export only replaces the (book, month,
+# node) partitions it contains (the last one added wins), so dated exports
+# ("proveedores 2024.CSV", then "proveedores 2025.CSV") add up. A re-export
+# under the same file name also drops the partitions its earlier version
+# wrote and the new one no longer has.
+# "Open" is the status at export time: documents INGRESADO, not yet paid.
+#   python supplier_debt.py build "ARCHIVOS/proveedores/*.CSV" "ARCHIVOS/testers/GASTOS EXTERNOS.CSV"
+#   python supplier_debt.py aging --fecha 2026-02-05
+#   python supplier_debt.py deudores --top 20
+
+STORE_VERSION = 1
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "proveedores")
+
+OPEN_STATUSES = ("INGRESADO",)
+IGNORED_STATUSES = ("IGNORADO",)
+AGING_BUCKETS = ("0-30", "31-60", "61-90", "90+")
+AGING_LIMITS = (30, 60, 90)   # days past FechaVenc closing each bucket but the last
+COLUMNS = ("entity", "reference", "type", "status", "amount", "issued", "due")
+
+def book_of(csv_path):
+    return "gastos" if "gastos" in os.path.basename(csv_path).lower() else "proveedores"
+
+def iter_documents(csv_path, encoding='latin1'):
+    # "Entidad" only comes on the first row of each supplier, and the
+    # TipoOperacion-only lines carry no document
+    with open(csv_path, 'r', encoding=encoding, newline='') as f:
+        entity = ""
+        for row in csv.DictReader(f):
+            if row.get("Entidad"):
+                entity = row["Entidad"].strip()
+            if not row.get("Codificacion"):
+                continue
+            yield entity, row
+
+def aging_bucket(days_overdue):
+    # Not yet due counts as 0-30
+    return np.searchsorted(np.array(AGING_LIMITS), days_overdue, side="left")
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+class SupplierDebt:
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = root
+        self.meta_path = os.path.join(root, "store.json")
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {"version": STORE_VERSION, "dictionaries": {}, "partitions": {}, "sources": {}}
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Version de store no soportada en {root}: {self.meta.get('version')}")
+        self._index = {name: {v: i for i, v in enumerate(values)} for name, values in self.meta["dictionaries"].items()}
+
+    # --- escritura ---
+
+    def _encode(self, name, values):
+        # Append-only: new values get the next code, old codes never move
+        values_list = self.meta["dictionaries"].setdefault(name, [])
+        index = self._index.setdefault(name, {})
+        uniq, inverse = np.unique(np.char.strip(np.asarray(values, dtype=str)), return_inverse=True)
+        mapping = np.empty(len(uniq), dtype=np.int32)
+        for i, v in enumerate(uniq.tolist()):
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(values_list)
+                values_list.append(v)
+            mapping[i] = code
+        return mapping[inverse]
+
+    def _codes(self, name, values):
+        return [self._index.get(name, {}).get(v, -1) for v in values]
+
+    def _save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    def _write_partition(self, pid, book, month, node, columns, source):
+        part_dir = os.path.join(self.root, pid)
+        tmp_dir = part_dir + ".tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(tmp_dir, name + ".npy"), columns[name])
+        if os.path.isdir(part_dir):
+            for name in os.listdir(part_dir):
+                os.remove(os.path.join(part_dir, name))
+            os.rmdir(part_dir)
+        os.replace(tmp_dir, part_dir)
+
+        # Per-supplier totals: invoiced, credited (credit notes come negative), open
+        amount = columns["amount"]
+        is_open = np.isin(columns["status"], self._codes("status", OPEN_STATUSES))
+        suppliers = {}
+        for code in np.unique(columns["entity"]).tolist():
+            rows = columns["entity"] == code
+            suppliers[str(code)] = [int(amount[rows & (amount > 0)].sum()), int(-amount[rows & (amount < 0)].sum()),
+                                    int(amount[rows & is_open].sum())]
+        due = columns["due"][is_open]
+        self.meta["partitions"][pid] = {
+            "book": book, "month": month, "node": node, "rows": int(len(amount)), "source": source,
+            "open_min_due": str(due.min()) if len(due) else None,
+            "open_max_due": str(due.max()) if len(due) else None,
+            "suppliers": suppliers,
+        }
+
+    def add_csv(self, csv_path, force=False):
+        # -> (documents stored, documents skipped, partitions written); None if unchanged
+        name = os.path.basename(csv_path)
+        stamp = _source_stamp(csv_path)
+        if not force and self.meta["sources"].get(name) == stamp:
+            return None
+        book = book_of(csv_path)
+
+        entities, rows = [], []
+        for entity, row in iter_documents(csv_path):
+            entities.append(entity)
+            rows.append(row)
+        field = lambda h: [(r.get(h) or "").strip() for r in rows]
+        issued = parse_days(field("FechaEmision"))
+        due = parse_days(field("FechaVenc"))
+        due = np.where(np.isnat(due), issued, due)
+        status = np.asarray(field("Estado"), dtype=str)
+        amounts = parse_cents(field("Monto"), "Monto")
+        valid = ~np.isnat(issued) & (amounts != MISSING) & ~np.isin(status, IGNORED_STATUSES)
+        keep = np.flatnonzero(valid)
+        pick = lambda values: np.asarray(values, dtype=str)[keep] if len(keep) else np.zeros(0, dtype=str)
+
+        columns = {
+            "entity": self._encode("entity", pick(entities)),
+            "reference": self._encode("reference", pick(field("Codificacion"))),
+            "type": self._encode("type", pick(field("TipoValor"))),
+            "status": self._encode("status", pick(status)),
+            "amount": amounts[keep],
+            "issued": issued[keep],
+            "due": due[keep],
+        }
+        nodes = self._encode("node", pick(field("Nodo")))
+        months = issued[keep].astype("datetime64[M]")
+        groups = np.unique(np.stack([months.astype(np.int64), nodes.astype(np.int64)], axis=1), axis=0) if len(keep) else []
+        written = []
+        for month_num, node in (map(int, g) for g in groups):
+            month = str(np.datetime64(month_num, "M"))
+            rows_in = np.flatnonzero((months.astype(np.int64) == month_num) & (nodes == node))
+            order = rows_in[np.argsort(columns["due"][rows_in], kind="stable")]
+            pid = f"{book}/{month}/{node}"
+            self._write_partition(pid, book, month, node, {n: a[order] for n, a in columns.items()}, name)
+            written.append(pid)
+
+        # What the earlier version of this same file wrote and this one didn't
+        stale = [pid for pid, info in self.meta["partitions"].items()
+                 if info["source"] == name and pid not in written]
+        for pid in stale:
+            del self.meta["partitions"][pid]
+        # Sources with no partition left (entirely overwritten by later files)
+        alive = {info["source"] for info in self.meta["partitions"].values()}
+        for old in [s for s in self.meta["sources"] if s != name and s not in alive]:
+            del self.meta["sources"][old]
+        self.meta["sources"][name] = stamp
+        self._save_meta()
+        for pid in stale:
+            part_dir = os.path.join(self.root, pid)
+            for file_name in os.listdir(part_dir):
+                os.remove(os.path.join(part_dir, file_name))
+            os.rmdir(part_dir)
+        return len(keep), int((~valid).sum()), written
+
+    # --- lectura ---
+
+    def column(self, pid, name):
+        return np.load(os.path.join(self.root, pid, name + ".npy"), mmap_mode='r')
+
+    def partitions(self, book=None, node=None, until=None):
+        # until: "YYYY-MM", inclusive
+        node_code = self._index.get("node", {}).get(node, -1) if node else None
+        for pid, info in sorted(self.meta["partitions"].items(), key=lambda kv: (kv[1]["month"], kv[0])):
+            if book and info["book"] != book:
+                continue
+            if node_code is not None and info["node"] != node_code:
+                continue
+            if until and info["month"] > until:
+                continue
+            yield pid, info
+
+    def entity_name(self, code):
+        return self.meta["dictionaries"]["entity"][int(code)]
+
+    def totals(self, book=None, node=None, until=None):
+        # -> {supplier code: [invoiced, credited, open]} in cents, from the
+        # partition totals only
+        result = {}
+        for _, info in self.partitions(book, node, until):
+            for code, values in info["suppliers"].items():
+                acc = result.setdefault(int(code), [0, 0, 0])
+                for i, v in enumerate(values):
+                    acc[i] += v
+        return result
+
+    def history(self, entity_code, book=None, node=None):
+        # -> [(month, invoiced, credited, open, running open)] for one supplier
+        months = {}
+        for _, info in self.partitions(book, node):
+            values = info["suppliers"].get(str(entity_code))
+            if values:
+                acc = months.setdefault(info["month"], [0, 0, 0])
+                for i, v in enumerate(values):
+                    acc[i] += v
+        running = 0
+        result = []
+        for month in sorted(months):
+            invoiced, credited, opened = months[month]
+            running += opened
+            result.append((month, invoiced, credited, opened, running))
+        return result
+
+    def aging(self, as_of, book=None, node=None):
+        # -> {supplier code: [cents per AGING_BUCKETS]} of the open documents
+        # issued up to as_of, by days past FechaVenc (computed per query)
+        as_of = np.datetime64(as_of, "D")
+        oldest_limit = as_of - AGING_LIMITS[-1]
+        open_codes = self._codes("status", OPEN_STATUSES)
+        result = {}
+        for pid, info in self.partitions(book, node, str(as_of.astype("datetime64[M]"))):
+            if info["open_max_due"] is None:
+                continue
+            if np.datetime64(info["open_max_due"]) < oldest_limit:
+                # Whole partition is 90+: no rows read
+                for code, values in info["suppliers"].items():
+                    if values[2]:
+                        result.setdefault(int(code), [0] * len(AGING_BUCKETS))[-1] += values[2]
+                continue
+            status = np.asarray(self.column(pid, "status"))
+            issued = np.asarray(self.column(pid, "issued"))
+            mask = np.isin(status, open_codes) & (issued <= as_of)
+            entity = np.asarray(self.column(pid, "entity"))[mask]
+            amount = np.asarray(self.column(pid, "amount"))[mask]
+            days = (as_of - np.asarray(self.column(pid, "due"))[mask]).astype(np.int64)
+            buckets = aging_bucket(days)
+            uniq, inverse = np.unique(entity.astype(np.int64) * len(AGING_BUCKETS) + buckets, return_inverse=True)
+            sums = np.zeros(len(uniq), dtype=np.int64)
+            np.add.at(sums, inverse, amount)
+            for k, total in zip(uniq.tolist(), sums.tolist()):
+                code, bucket = divmod(k, len(AGING_BUCKETS))
+                result.setdefault(code, [0] * len(AGING_BUCKETS))[bucket] += total
+        return result
+
+def _expand(patterns):
+    # Los comodines también se expanden acá (la consola de Windows no lo hace)
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+def _money(cents):
+    return f"${cents / 100:,.2f}"
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Índice de deuda con proveedores")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="importar exportaciones de proveedores / gastos")
+    build.add_argument("files", nargs="+")
+    build.add_argument("--force", action="store_true", help="reimportar aunque no hayan cambiado")
+
+    def filters(p):
+        p.add_argument("--libro", choices=["proveedores", "gastos"])
+        p.add_argument("--nodo")
+        p.add_argument("--top", type=int, default=20)
+
+    aging = sub.add_parser("aging", help="deuda abierta por antigüedad (días desde el vencimiento)")
+    aging.add_argument("--fecha", help="yyyy-mm-dd (por defecto hoy)")
+    filters(aging)
+
+    debtors = sub.add_parser("deudores", help="proveedores con más deuda abierta")
+    debtors.add_argument("--hasta", help="yyyy-mm, meses de emisión incluidos")
+    filters(debtors)
+
+    history = sub.add_parser("historial", help="saldo mes a mes de un proveedor")
+    history.add_argument("entidad", help="nombre o parte del nombre")
+    history.add_argument("--libro", choices=["proveedores", "gastos"])
+    history.add_argument("--nodo")
+    args = parser.parse_args(argv)
+
+    store = SupplierDebt(args.store)
+    if args.command == "build":
+        os.makedirs(args.store, exist_ok=True)
+        for path in _expand(args.files):
+            res = store.add_csv(path, force=args.force)
+            if res is None:
+                print(f"{os.path.basename(path)}: sin cambios")
+                continue
+            rows, skipped, written = res
+            extra = f", {skipped} omitidos" if skipped else ""
+            print(f"{os.path.basename(path)} [{book_of(path)}]: {rows:,} documentos -> {len(written)} particiones{extra}")
+        return
+
+    if args.command == "aging":
+        as_of = args.fecha or str(np.datetime64("today", "D"))
+        result = store.aging(as_of, args.libro, args.nodo)
+        print(f"\n=== DEUDA ABIERTA AL {as_of} por días desde el vencimiento ===")
+        print(f"{'Entidad':<40}" + "".join(f"{b:>16}" for b in AGING_BUCKETS) + f"{'Total':>16}")
+        grand = [0] * len(AGING_BUCKETS)
+        for code, buckets in sorted(result.items(), key=lambda kv: -sum(kv[1]))[:args.top]:
+            print(f"{store.entity_name(code)[:38]:<40}" + "".join(f"{_money(v):>16}" for v in buckets) + f"{_money(sum(buckets)):>16}")
+        for buckets in result.values():
+            grand = [g + v for g, v in zip(grand, buckets)]
+        print(f"{'TOTAL (' + str(len(result)) + ' entidades)':<40}" + "".join(f"{_money(v):>16}" for v in grand) + f"{_money(sum(grand)):>16}")
+        return
+
+    if args.command == "deudores":
+        totals = store.totals(args.libro, args.nodo, args.hasta)
+        ranked = sorted(((code, t) for code, t in totals.items() if t[2]), key=lambda kv: -kv[1][2])
+        print(f"\n=== DEUDA ABIERTA ({len(ranked)} entidades) ===")
+        for code, (invoiced, credited, opened) in ranked[:args.top]:
+            print(f"  {store.entity_name(code)[:40]:<42}{_money(opened):>18}  (facturado {_money(invoiced)}, NC {_money(credited)})")
+        print(f"\nTOTAL: {_money(sum(t[2] for _, t in ranked))}")
+        return
+
+    needle = args.entidad.upper()
+    matches = [i for i, name in enumerate(store.meta["dictionaries"].get("entity", [])) if needle in name.upper()]
+    if not matches:
+        print(f"Sin entidades que contengan '{args.entidad}'")
+        return 1
+    for code in matches:
+        print(f"\n{store.entity_name(code)}")
+        for month, invoiced, credited, opened, running in store.history(code, args.libro, args.nodo):
+            print(f"  {month}: facturado {_money(invoiced):>16} | NC {_money(credited):>14} | abierto {_money(opened):>14} | acumulado {_money(running):>16}")
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+import os
+from supplier_debt import SupplierDebt
+
+# Incremental loads of supplier exports: dated exports add up, a re-export
+# under the same name replaces what its earlier version wrote.
+#   python -m pytest -q test_supplier_debt.py
+
+HEADER = "Entidad,Codificacion,TipoValor,EntSec,Monto,FechaEmision,FechaVenc,Nodo,Estado,Transmision,TipoOperacion\n"
+
+def _export(folder, name, docs):
+    # docs: (entidad, codificacion, monto, emision dd/mm/yyyy, nodo, estado)
+    path = os.path.join(folder, name)
+    with open(path, 'w', encoding='latin1', newline='') as f:
+        f.write(HEADER)
+        for entity, ref, amount, issued, node, status in docs:
+            f.write(f'{entity},{ref},FACTURA DE COMPRA,,"$ {amount}",{issued},{issued},{node},{status},,PVD-03\n')
+    return path
+
+def _partitions(store):
+    return {pid: info["source"] for pid, info in store.meta["partitions"].items()}
+
+def test_dated_exports_add_up(tmp_path):
+    store = SupplierDebt(str(tmp_path / "store"))
+    os.makedirs(store.root)
+    old = _export(str(tmp_path), "proveedores 2024.CSV", [
+        ("DROGUERIA SUR", "0001-00000001", "1.000,00", "10/03/2024", "FCIA BIOSALUD", "INGRESADO"),
+        ("DROGUERIA SUR", "0001-00000002", "2.000,00", "15/05/2024", "FCIA BIOSALUD", "PAGADO"),
+        ("LAB NORTE", "0002-00000003", "500,50", "20/05/2024", "BIOSALUD CHACRAS ", "INGRESADO"),
+    ])
+    new = _export(str(tmp_path), "proveedores 2025.CSV", [
+        ("DROGUERIA SUR", "0001-00000010", "750,00", "02/01/2025", "FCIA BIOSALUD", "INGRESADO"),
+    ])
+    store.add_csv(old)
+    store.add_csv(new)
+
+    parts = _partitions(store)
+    assert sorted(info["month"] for info in store.meta["partitions"].values()) == ["2024-03", "2024-05", "2024-05", "2025-01"]
+    assert set(parts.values()) == {"proveedores 2024.CSV", "proveedores 2025.CSV"}
+    assert set(store.meta["sources"]) == {"proveedores 2024.CSV", "proveedores 2025.CSV"}
+    assert all(os.path.isdir(os.path.join(store.root, pid)) for pid in parts)
+    # open: 1.000,00 + 500,50 + 750,00
+    assert sum(t[2] for t in store.totals().values()) == 225050
+
+def test_reexport_same_name_replaces_its_partitions(tmp_path):
+    store = SupplierDebt(str(tmp_path / "store"))
+    os.makedirs(store.root)
+    path = _export(str(tmp_path), "PROVEEDORES ANUAL.CSV", [
+        ("DROGUERIA SUR", "0001-00000001", "1.000,00", "10/03/2024", "FCIA BIOSALUD", "INGRESADO"),
+        ("DROGUERIA SUR", "0001-00000002", "2.000,00", "15/05/2024", "FCIA BIOSALUD", "INGRESADO"),
+    ])
+    store.add_csv(path)
+    before = set(_partitions(store))
+    _export(str(tmp_path), "PROVEEDORES ANUAL.CSV", [
+        ("DROGUERIA SUR", "0001-00000002", "2.000,00", "15/05/2024", "FCIA BIOSALUD", "PAGADO"),
+    ])
+    store.add_csv(path, force=True)
+
+    parts = _partitions(store)
+    assert [info["month"] for info in store.meta["partitions"].values()] == ["2024-05"]
+    gone = before - set(parts)
+    assert len(gone) == 1 and not os.path.exists(os.path.join(store.root, gone.pop()))
+    assert sum(t[2] for t in store.totals().values()) == 0
+    assert list(parts.values()) == ["PROVEEDORES ANUAL.CSV"]
@@ -0,0 +1,125 @@
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+# Streaming XLSX reader (no openpyxl/pandas): rows come out of iterparse one at
+# a time and are cleared right away, so memory stays flat on big Zetti exports.
+# Only the shared strings table is kept in memory, as Excel requires.
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+DOC_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+def column_index(ref):
+    # "A1" -> 0, "Z7" -> 25, "AA3" -> 26
+    idx = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        idx = idx * 26 + (ord(ch.upper()) - 64)
+    return idx - 1
+
+def _text_of(elem):
+    # Plain <t> or rich text runs <r><t>; phonetic hints (<rPh>) are skipped
+    t = elem.find(NS + 't')
+    if t is not None:
+        return t.text or ""
+    return "".join((r.findtext(NS + 't') or "") for r in elem.findall(NS + 'r'))
+
+def read_shared_strings(z):
+    strings = []
+    if 'xl/sharedStrings.xml' not in z.namelist():
+        return strings
+    with z.open('xl/sharedStrings.xml') as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == NS + 'si':
+                strings.append(_text_of(elem))
+                elem.clear()
+    return strings
+
+def list_sheets(z):
+    # [(name, path inside the zip), ...] in workbook order
+    rels = {}
+    with z.open('xl/_rels/workbook.xml.rels') as f:
+        for rel in ET.parse(f).getroot().iter(PKG_REL_NS + 'Relationship'):
+            target = rel.get('Target')
+            target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            rels[rel.get('Id')] = target
+    with z.open('xl/workbook.xml') as f:
+        root = ET.parse(f).getroot()
+    return [(s.get('name'), rels[s.get(DOC_REL_NS + 'id')]) for s in root.iter(NS + 'sheet')]
+
+def _cell_value(cell, shared_strings):
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        inline = cell.find(NS + 'is')
+        return _text_of(inline) if inline is not None else ""
+    v = cell.findtext(NS + 'v')
+    if v is None:
+        return None
+    if kind == 's':
+        return shared_strings[int(v)]
+    if kind == 'b':
+        return v == '1'
+    if kind == 'n':
+        try:
+            return int(v)
+        except ValueError:
+            pass
+        try:
+            return float(v)
+        except ValueError:
+            return v
+    # 'str' (formula result), 'e' (error like #N/A), 'd' (ISO date)
+    return v
+
+def _iter_sheet_rows(z, path, shared_strings, skip_empty):
+    with z.open(path) as f:
+        sheet_data = None
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == NS + 'sheetData':
+                    sheet_data = elem
+                continue
+            if elem.tag != NS + 'row':
+                continue
+            values = []
+            next_col = 0
+            for cell in elem.iter(NS + 'c'):
+                ref = cell.get('r')
+                col = column_index(ref) if ref else next_col
+                value = _cell_value(cell, shared_strings)
+                if value is not None:
+                    if col >= len(values):
+                        values.extend([""] * (col + 1 - len(values)))
+                    values[col] = value
+                next_col = col + 1
+            elem.clear()
+            if sheet_data is not None:
+                sheet_data.clear()
+            if values or not skip_empty:
+                yield values
+
+def iter_rows(file_path, sheet=0, skip_empty=True):
+    # sheet: index or name. Yields one list per row, cells at their real column
+    # (missing cells are ""); numbers come back as int/float, booleans as bool.
+    with zipfile.ZipFile(file_path, 'r') as z:
+        sheets = list_sheets(z)
+        if isinstance(sheet, int):
+            path = sheets[sheet][1]
+        else:
+            path = dict(sheets)[sheet]
+        shared_strings = read_shared_strings(z)
+        yield from _iter_sheet_rows(z, path, shared_strings, skip_empty)
+
+def iter_all_sheets(file_path, skip_empty=True):
+    # Yields (sheet name, row) for every row of every sheet, in workbook order
+    with zipfile.ZipFile(file_path, 'r') as z:
+        shared_strings = read_shared_strings(z)
+        for name, path in list_sheets(z):
+            for row in _iter_sheet_rows(z, path, shared_strings, skip_empty):
+                yield name, row
+
+def sheet_names(file_path):
+    with zipfile.ZipFile(file_path, 'r') as z:
+        return [name for name, _ in list_sheets(z)]